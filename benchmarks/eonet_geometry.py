@@ -0,0 +1,77 @@
+"""
+Benchmark of EONET geometry simplification on the largest event tracks
+
+Usage:
+    python benchmarks/eonet_geometry.py [--events 10] [--file events.json]
+                                        [--tolerance 0.1] [--interval 12]
+
+Events come from --file (a saved events response), the local EONET store
+when EONET_STORE_PATH is set, or live from EONET (closed storms and
+icebergs, which carry the longest tracks). The events with the most
+geometry points are compared as returned and in each simplification mode.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nasa_apis.eonet import EONETAPI  # noqa: E402
+from nasa_apis.eonet_store import get_eonet_store  # noqa: E402
+from nasa_apis.event_geometry import simplify_event  # noqa: E402
+
+
+def load_events(path: str) -> list:
+    if path:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get('events', data) if isinstance(data, dict) else data
+    store = get_eonet_store()
+    if store is not None and len(store) > 0:
+        return store.query(status='all')
+    result = EONETAPI().fetch_events({'status': 'closed', 'category': 'severeStorms,seaLakeIce', 'limit': 500})
+    if "error" in result:
+        sys.exit(f"Could not fetch events: {result['error']} (use --file or EONET_STORE_PATH)")
+    return result.get('events', [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=10, help='number of largest events to use')
+    parser.add_argument('--file', default='', help='saved EONET events response')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='line simplification tolerance (degrees)')
+    parser.add_argument('--interval', type=float, default=12.0, help='temporal downsampling interval (hours)')
+    parser.add_argument('--precision', type=int, default=3, help='decimal places of compact coordinates')
+    args = parser.parse_args()
+
+    events = sorted(load_events(args.file), key=lambda event: len(event.get('geometry') or []), reverse=True)
+    events = events[:args.events]
+    if not events:
+        sys.exit("No events to benchmark")
+    points = sum(len(event.get('geometry') or []) for event in events)
+    print(f"events: {len(events)} largest, {points:,} geometry points "
+          f"(largest: {events[0].get('id')}, {len(events[0].get('geometry') or []):,} points)")
+
+    modes = [
+        ("raw", {}),
+        ("compact", {'compact': True}),
+        (f"tolerance {args.tolerance}", {'tolerance': args.tolerance}),
+        (f"interval {args.interval:g}h", {'min_interval_hours': args.interval}),
+        ("tolerance+interval+compact", {'tolerance': args.tolerance, 'min_interval_hours': args.interval,
+                                        'compact': True, 'precision': args.precision}),
+    ]
+    raw_bytes = len(json.dumps(events).encode())
+    print(f"{'mode':30}{'bytes':>12}{'ratio':>8}{'kept':>9}{'dropped':>9}{'ms':>9}")
+    for name, options in modes:
+        started = time.perf_counter()
+        output = [simplify_event(event, **options) for event in events] if options else events
+        elapsed = (time.perf_counter() - started) * 1000
+        size = len(json.dumps(output).encode())
+        kept = sum(event['simplification']['kept'] for event in output) if options else points
+        print(f"{name:30}{size:>12,}{size / raw_bytes:>8.2f}{kept:>9,}{points - kept:>9,}{elapsed:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
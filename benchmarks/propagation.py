@@ -0,0 +1,74 @@
+"""
+Benchmark of the Keplerian propagator: many asteroids over many epochs
+
+Usage:
+    python benchmarks/propagation.py [--bodies 2000] [--epochs 2000] [--python]
+
+Uses the local NEO store when NEO_STORE_PATH points to a crawled catalog,
+otherwise random near-Earth orbits. --python forces the pure Python path
+even when numpy is installed.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nasa_apis import orbits  # noqa: E402
+from nasa_apis.neo_store import get_neo_store  # noqa: E402
+
+
+def random_elements(count: int) -> orbits.OrbitalElements:
+    rng = random.Random(42)
+    elements = orbits.OrbitalElements()
+    for i in range(count):
+        elements.add(str(i), f"synthetic {i}", {
+            'epoch_osculation': 2460600.5,
+            'semi_major_axis': rng.uniform(0.6, 4.0),
+            'eccentricity': rng.uniform(0.0, 0.9),
+            'inclination': rng.uniform(0.0, 40.0),
+            'ascending_node_longitude': rng.uniform(0.0, 360.0),
+            'perihelion_argument': rng.uniform(0.0, 360.0),
+            'mean_anomaly': rng.uniform(0.0, 360.0),
+        })
+    return elements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bodies', type=int, default=2000)
+    parser.add_argument('--epochs', type=int, default=2000)
+    parser.add_argument('--python', action='store_true', help='force the pure Python path')
+    args = parser.parse_args()
+
+    if args.python:
+        orbits.numpy = None
+
+    store = get_neo_store()
+    if store is not None and len(store) > 0:
+        elements = orbits.OrbitalElements.from_store(store, range(min(args.bodies, len(store))))
+        source = f"NEO store ({store.path})"
+    else:
+        elements = random_elements(args.bodies)
+        source = "random orbits"
+    epochs = [2460600.5 + i for i in range(args.epochs)]
+
+    started = time.perf_counter()
+    positions = orbits.propagate(elements, epochs)
+    propagated = time.perf_counter()
+    orbits.earth_distances(elements, epochs, positions)
+    finished = time.perf_counter()
+
+    samples = len(elements) * len(epochs)
+    print(f"source:        {source}")
+    print(f"backend:       {'numpy' if orbits.numpy is not None else 'pure Python'}")
+    print(f"grid:          {len(elements)} bodies x {len(epochs)} epochs = {samples:,} samples")
+    print(f"propagation:   {propagated - started:.3f} s ({samples / (propagated - started):,.0f} samples/s)")
+    print(f"earth distance:{finished - propagated:.3f} s")
+    print(f"total:         {finished - started:.3f} s")
+
+
+if __name__ == '__main__':
+    main()
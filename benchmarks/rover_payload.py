@@ -0,0 +1,98 @@
+"""
+Benchmark of the raw and compact rover photo response formats
+
+Usage:
+    python benchmarks/rover_payload.py [--photos 25] [--cameras 3] [--rounds 200]
+
+Builds a photos page in the shape the API returns (every photo carrying
+its full rover and camera objects) and compares it with the compact form
+on JSON payload size, JSON parse time and estimated in-memory footprint.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nasa_apis.mars_rover import compact_photos  # noqa: E402
+from nasa_apis.memory import estimate_size  # noqa: E402
+
+
+ROVER = {
+    "id": 5,
+    "name": "Curiosity",
+    "landing_date": "2012-08-06",
+    "launch_date": "2011-11-26",
+    "status": "active",
+    "max_sol": 4102,
+    "max_date": "2024-02-19",
+    "total_photos": 695670,
+    "cameras": [
+        {"name": name, "full_name": full_name} for name, full_name in (
+            ("FHAZ", "Front Hazard Avoidance Camera"),
+            ("NAVCAM", "Navigation Camera"),
+            ("MAST", "Mast Camera"),
+            ("CHEMCAM", "Chemistry and Camera Complex"),
+            ("MAHLI", "Mars Hand Lens Imager"),
+            ("MARDI", "Mars Descent Imager"),
+            ("RHAZ", "Rear Hazard Avoidance Camera"),
+        )
+    ],
+}
+
+
+def raw_page(photos: int, cameras: int) -> dict:
+    camera_objects = [
+        {"id": 20 + i, "name": camera["name"], "rover_id": ROVER["id"], "full_name": camera["full_name"]}
+        for i, camera in enumerate(ROVER["cameras"][:cameras])
+    ]
+    return {"photos": [
+        {
+            "id": 102693 + i,
+            "sol": 1000,
+            "camera": camera_objects[i % cameras],
+            "img_src": f"http://mars.jpl.nasa.gov/msl-raw-images/proj/msl/redops/ods/surface/sol/01000/opgs/"
+                       f"edr/fcam/FLB_486265257EDR_F0481570FHAZ00323M_{i}.JPG",
+            "earth_date": "2015-05-30",
+            "rover": ROVER,
+        }
+        for i in range(photos)
+    ]}
+
+
+def parse_time(payload: str, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        json.loads(payload)
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--photos', type=int, default=25)
+    parser.add_argument('--cameras', type=int, default=3)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    raw = raw_page(args.photos, max(1, min(args.cameras, len(ROVER["cameras"]))))
+    compact = compact_photos(raw["photos"])
+    # Parsed responses hold separate copies of the shared objects, so the
+    # footprint is measured on a parsed payload, as it sits in the cache
+    raw_payload, compact_payload = json.dumps(raw), json.dumps(compact)
+    raw_parsed, compact_parsed = json.loads(raw_payload), json.loads(compact_payload)
+
+    rows = [
+        ("payload bytes", len(raw_payload.encode()), len(compact_payload.encode())),
+        ("parse time (us)", parse_time(raw_payload, args.rounds) * 1e6, parse_time(compact_payload, args.rounds) * 1e6),
+        ("cache footprint (bytes)", estimate_size(raw_parsed), estimate_size(compact_parsed)),
+    ]
+    print(f"page:  {args.photos} photos, {args.cameras} cameras")
+    print(f"{'':26}{'raw':>12}{'compact':>12}{'ratio':>8}")
+    for name, raw_value, compact_value in rows:
+        print(f"{name:26}{raw_value:>12,.0f}{compact_value:>12,.0f}{compact_value / raw_value:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -30,10 +30,68 @@ class Config:
         # Cache configuration
         self.enable_cache = os.getenv('ENABLE_CACHE', 'false').lower() == 'true'
         self.cache_ttl = int(os.getenv('CACHE_TTL', '300'))  # 5 minutes default
+        self.cache_max_entries = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+        # Manifest lifetime for rovers still sending data (retired rovers never expire)
+        self.rover_manifest_ttl = int(os.getenv('ROVER_MANIFEST_TTL', '3600'))
+        # Interval between checks for new EPIC imagery dates
+        self.epic_dates_refresh_seconds = int(os.getenv('EPIC_DATES_REFRESH_SECONDS', '3600'))
+        
+        # Concurrency configuration (parallel upstream requests per call)
+        self.max_concurrency = int(os.getenv('MAX_CONCURRENCY', '4'))
+        # Pages fetched ahead of the consumer by auto-paginating iterators
+        self.page_read_ahead = int(os.getenv('PAGE_READ_AHEAD', '2'))
+        # Combined byte rate of image downloads (0 for no cap)
+        self.download_max_bytes_per_second = int(os.getenv('DOWNLOAD_MAX_BYTES_PER_SECOND', '0'))
         
         # Logging configuration
         self.log_level = os.getenv('LOG_LEVEL', 'INFO')
         self.log_file = os.getenv('LOG_FILE', 'nasa_apis.log')
+        self.log_max_bytes = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+        self.log_backup_count = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+        self.log_queue_size = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+        
+        # APOD archive mirror configuration (disabled unless a path is set)
+        self.apod_archive_path = os.getenv('APOD_ARCHIVE_PATH', '')
+        self.apod_archive_auto_sync = os.getenv('APOD_ARCHIVE_AUTO_SYNC', 'false').lower() == 'true'
+        self.apod_archive_sync_interval_hours = float(os.getenv('APOD_ARCHIVE_SYNC_INTERVAL_HOURS', '24'))
+        
+        # Rover photo index configuration (disabled unless a path is set)
+        self.rover_index_path = os.getenv('ROVER_INDEX_PATH', '')
+        self.rover_index_auto_sync = os.getenv('ROVER_INDEX_AUTO_SYNC', 'false').lower() == 'true'
+        self.rover_index_sync_interval_hours = float(os.getenv('ROVER_INDEX_SYNC_INTERVAL_HOURS', '24'))
+        
+        # NEO catalog store configuration
+        self.neo_store_path = os.getenv('NEO_STORE_PATH', '')
+        
+        # EONET event store configuration (disabled unless a path is set)
+        self.eonet_store_path = os.getenv('EONET_STORE_PATH', '')
+        self.eonet_store_auto_sync = os.getenv('EONET_STORE_AUTO_SYNC', 'false').lower() == 'true'
+        self.eonet_store_sync_interval_minutes = float(os.getenv('EONET_STORE_SYNC_INTERVAL_MINUTES', '30'))
+        
+        # Downloaded images (content-addressed; empty disables image downloads)
+        self.image_store_path = os.getenv('IMAGE_STORE_PATH', 'image_store')
+        
+        # Tracing configuration
+        self.enable_tracing = os.getenv('ENABLE_TRACING', 'false').lower() == 'true'
+        self.trace_sample_rate = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+        self.trace_export_file = os.getenv('TRACE_EXPORT_FILE', 'traces.jsonl')
+        self.trace_export_url = os.getenv('TRACE_EXPORT_URL', '')
+        
+        # Flight recorder configuration
+        self.flight_recorder_size = int(os.getenv('FLIGHT_RECORDER_SIZE', '256'))
+        self.flight_recorder_slow_threshold = float(os.getenv('FLIGHT_RECORDER_SLOW_THRESHOLD', '30'))
+        self.flight_recorder_dump_dir = os.getenv('FLIGHT_RECORDER_DUMP_DIR', 'flight_recorder')
+        
+        # Profiling configuration
+        self.profile_output_dir = os.getenv('PROFILE_OUTPUT_DIR', 'profiles')
+        self.profile_interval_ms = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+        self.profile_tool = os.getenv('PROFILE_TOOL', '')
+        self.profile_tool_calls = int(os.getenv('PROFILE_TOOL_CALLS', '1'))
+        self.profile_window_seconds = float(os.getenv('PROFILE_WINDOW_SECONDS', '0'))
+        
+        # Memory accounting configuration
+        self.enable_memory_profiling = os.getenv('ENABLE_MEMORY_PROFILING', 'false').lower() == 'true'
+        self.memory_alert_threshold_mb = float(os.getenv('MEMORY_ALERT_THRESHOLD_MB', '50'))
         
         # MCP Server configuration
         self.mcp_server_name = os.getenv('MCP_SERVER_NAME', 'nasa-apis-mcp')
@@ -58,14 +116,100 @@ class Config:
         return {
             'timeout': self.request_timeout,
             'max_retries': self.max_retries,
-            'retry_delay': self.retry_delay
+            'retry_delay': self.retry_delay,
+            'max_concurrency': self.max_concurrency,
+            'page_read_ahead': self.page_read_ahead,
+            'download_max_bytes_per_second': self.download_max_bytes_per_second
         }
     
     def get_cache_config(self) -> dict:
         """Get cache configuration"""
         return {
             'enabled': self.enable_cache,
-            'ttl': self.cache_ttl
+            'ttl': self.cache_ttl,
+            'max_entries': self.cache_max_entries,
+            'rover_manifest_ttl': self.rover_manifest_ttl,
+            'epic_dates_refresh_seconds': self.epic_dates_refresh_seconds
+        }
+    
+    def get_apod_archive_config(self) -> dict:
+        """Get APOD archive mirror configuration"""
+        return {
+            'path': self.apod_archive_path,
+            'auto_sync': self.apod_archive_auto_sync,
+            'sync_interval_hours': self.apod_archive_sync_interval_hours
+        }
+    
+    def get_rover_index_config(self) -> dict:
+        """Get rover photo index configuration"""
+        return {
+            'path': self.rover_index_path,
+            'auto_sync': self.rover_index_auto_sync,
+            'sync_interval_hours': self.rover_index_sync_interval_hours
+        }
+    
+    def get_neo_store_config(self) -> dict:
+        """Get local NEO catalog store configuration"""
+        return {
+            'path': self.neo_store_path
+        }
+    
+    def get_eonet_store_config(self) -> dict:
+        """Get local EONET event store configuration"""
+        return {
+            'path': self.eonet_store_path,
+            'auto_sync': self.eonet_store_auto_sync,
+            'sync_interval_minutes': self.eonet_store_sync_interval_minutes
+        }
+    
+    def get_image_store_config(self) -> dict:
+        """Get downloaded image store configuration"""
+        return {
+            'path': self.image_store_path
+        }
+    
+    def get_log_config(self) -> dict:
+        """Get logging configuration"""
+        return {
+            'level': self.log_level,
+            'file': self.log_file,
+            'max_bytes': self.log_max_bytes,
+            'backup_count': self.log_backup_count,
+            'queue_size': self.log_queue_size
+        }
+    
+    def get_tracing_config(self) -> dict:
+        """Get tracing configuration"""
+        return {
+            'enabled': self.enable_tracing,
+            'sample_rate': self.trace_sample_rate,
+            'export_file': self.trace_export_file,
+            'export_url': self.trace_export_url
+        }
+    
+    def get_flight_recorder_config(self) -> dict:
+        """Get flight recorder configuration"""
+        return {
+            'size': self.flight_recorder_size,
+            'slow_threshold': self.flight_recorder_slow_threshold,
+            'dump_dir': self.flight_recorder_dump_dir
+        }
+    
+    def get_profiling_config(self) -> dict:
+        """Get profiling configuration"""
+        return {
+            'output_dir': self.profile_output_dir,
+            'interval_ms': self.profile_interval_ms,
+            'tool': self.profile_tool,
+            'tool_calls': self.profile_tool_calls,
+            'window_seconds': self.profile_window_seconds
+        }
+    
+    def get_memory_config(self) -> dict:
+        """Get memory accounting configuration"""
+        return {
+            'enabled': self.enable_memory_profiling,
+            'alert_threshold_mb': self.memory_alert_threshold_mb
         }
 
 
@@ -97,10 +241,22 @@ def validate_config() -> dict:
     elif config.request_timeout > 60:
         warnings.append("Request timeout is very high - may cause slow responses")
     
+    # Check concurrency
+    if config.max_concurrency < 1:
+        issues.append("Max concurrency must be at least 1")
+    if config.page_read_ahead < 0:
+        issues.append("Page read-ahead must not be negative")
+    if config.download_max_bytes_per_second < 0:
+        issues.append("Download byte rate cap must not be negative")
+    
     # Check retry configuration
     if config.max_retries > 5:
         warnings.append("Max retries is high - may cause slow responses on failures")
     
+    # Check tracing configuration
+    if not 0.0 <= config.trace_sample_rate <= 1.0:
+        issues.append("Trace sample rate must be between 0.0 and 1.0")
+    
     return {
         'valid': len(issues) == 0,
         'issues': issues,
@@ -109,6 +265,7 @@ def validate_config() -> dict:
             'nasa_api_key': '***HIDDEN***' if not config.is_demo_key() else 'DEMO_KEY',
             'rate_limits': config.get_rate_limits(),
             'request_config': config.get_request_config(),
-            'cache_config': config.get_cache_config()
+            'cache_config': config.get_cache_config(),
+            'tracing_config': config.get_tracing_config()
         }
     }
@@ -1,17 +1,32 @@
 """
 APOD - Astronomy Picture of the Day API
 """
+from .apod_archive import get_apod_archive
 from .base import NASAAPIBase
+from .cache import NO_EXPIRY, create_cache
 from typing import Dict, Any, Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+
+
+# Most uncached days fetched by one get_pictures_by_date_range call; longer
+# ranges are truncated
+MAX_FETCH_DAYS = 366
+
+# APOD entries keyed by date, shared by all clients (entries don't depend on the
+# API key). Always enabled: ranges and single days are served from it.
+_day_cache = create_cache('apod_days', enabled=True)
 
 
 class APODAPI(NASAAPIBase):
     """NASA Astronomy Picture of the Day API client"""
     
+    # Longest date range fetched in a single upstream request
+    range_chunk_days = 31
+    
     def __init__(self, api_key: str = "DEMO_KEY"):
         super().__init__(api_key)
         self.endpoint = f"{self.base_url}/planetary/apod"
+        self.day_cache = _day_cache
     
     def get_picture_of_the_day(self, date: Optional[str] = None, hd: bool = True) -> Dict[str, Any]:
         """
@@ -27,10 +42,15 @@ class APODAPI(NASAAPIBase):
         params = {}
         if date:
             params['date'] = date
+            cached = self.day_cache.get(date)
+            if cached is not None:
+                return cached
         if hd:
             params['hd'] = 'true'
             
-        return self._make_request(self.endpoint, params)
+        result = self._make_request(self.endpoint, params)
+        self._cache_entries([result])
+        return result
     
     def get_pictures_by_date_range(self, start_date: str, end_date: str) -> Dict[str, Any]:
         """
@@ -41,14 +61,76 @@ class APODAPI(NASAAPIBase):
             end_date: End date in YYYY-MM-DD format
             
         Returns:
-            List of APOD data
+            List of APOD data. If the range is truncated or some chunks
+            fail, a dictionary with the pictures, "truncated" and
+            "next_start_date" to continue from, and the per-chunk errors
+        
+        Days already cached are served locally; the missing days are fetched
+        in chunks of at most range_chunk_days, concurrently, and merged in
+        date order. At most MAX_FETCH_DAYS uncached days are fetched per
+        call; the range stops before the first day past that.
         """
-        params = {
-            'start_date': start_date,
-            'end_date': end_date
-        }
+        try:
+            start = datetime.strptime(self._format_date(start_date), '%Y-%m-%d').date()
+            end = datetime.strptime(self._format_date(end_date), '%Y-%m-%d').date()
+        except ValueError as e:
+            return {"error": str(e)}
+        if end < start:
+            return {"error": "end_date must not be before start_date"}
+        
+        dates = self._date_range(start, end)
+        entries = self.day_cache.get_many(dates)
+        missing = [date for date in dates if date not in entries]
+        next_start_date = None
+        if len(missing) > MAX_FETCH_DAYS:
+            next_start_date = missing[MAX_FETCH_DAYS]
+            dates = [date for date in dates if date < next_start_date]
+            missing = missing[:MAX_FETCH_DAYS]
+        
+        fetched = self.fetch_days(missing)
+        if fetched["errors"] and not fetched["entries"] and not entries:
+            return {"error": fetched["errors"][0]["error"], "errors": fetched["errors"]}
+        for entry in self._cache_entries(list(fetched["entries"].values())):
+            entries[entry['date']] = entry
         
-        return self._make_request(self.endpoint, params)
+        pictures = [entries[date] for date in dates if date in entries]
+        if not fetched["errors"] and next_start_date is None:
+            return pictures
+        result = {"pictures": pictures, "errors": fetched["errors"]}
+        if next_start_date is not None:
+            result["truncated"] = True
+            result["next_start_date"] = next_start_date
+        return result
+    
+    def fetch_days(self, dates: List[str]) -> Dict[str, Any]:
+        """
+        Fetch APOD entries for the given sorted dates, bypassing the cache
+        
+        Args:
+            dates: Dates in YYYY-MM-DD format, in ascending order
+            
+        Returns:
+            Dictionary containing "entries", mapping each date to its APOD
+            entry (days without an entry are absent), and "errors", one per
+            failed chunk with its start and end date
+        """
+        chunks = self._group_consecutive_dates(dates, self.range_chunk_days)
+        results = self._map_concurrently(
+            lambda chunk: self._make_request(self.endpoint, {'start_date': chunk[0], 'end_date': chunk[-1]}),
+            chunks
+        )
+        
+        entries = {}
+        errors = []
+        for chunk, result in zip(chunks, results):
+            if not isinstance(result, list):
+                error = result.get("error", "Unexpected response") if isinstance(result, dict) else "Unexpected response"
+                errors.append({"start_date": chunk[0], "end_date": chunk[-1], "error": error})
+                continue
+            for entry in result:
+                if isinstance(entry, dict) and 'date' in entry:
+                    entries[entry['date']] = entry
+        return {"entries": entries, "errors": errors}
     
     def get_random_pictures(self, count: int = 1) -> Dict[str, Any]:
         """
@@ -59,9 +141,34 @@ class APODAPI(NASAAPIBase):
             
         Returns:
             List of random APOD data
+        
+        When the local archive mirror has been synced up to date, pictures
+        are sampled from it without an upstream request. A mirror still in
+        its first sync only holds the oldest days, so the API is used then.
         """
+        archive = get_apod_archive()
+        if archive is not None and archive.is_caught_up():
+            return archive.random(min(count, 100))
+        
         params = {
             'count': min(count, 100)  # API limit
         }
         
-        return self._make_request(self.endpoint, params)
+        result = self._make_request(self.endpoint, params)
+        self._cache_entries(result)
+        return result
+    
+    def _cache_entries(self, result: Any) -> List[Dict[str, Any]]:
+        """Store every APOD entry of a response under its date and return the entries"""
+        if isinstance(result, dict):
+            result = [result]
+        if not isinstance(result, list):
+            return []
+        
+        # Entries are final once their day is over; today's may still be updated
+        cutoff = (datetime.now(timezone.utc).date() - timedelta(days=1)).isoformat()
+        entries = [entry for entry in result if isinstance(entry, dict) and 'date' in entry]
+        for entry in entries:
+            ttl = NO_EXPIRY if entry['date'] < cutoff else self.day_cache.ttl
+            self.day_cache.set(entry['date'], entry, ttl)
+        return entries
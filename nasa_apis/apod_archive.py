@@ -0,0 +1,234 @@
+"""
+Local APOD archive mirror with full-text search
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+
+from config import get_config
+
+
+logger = logging.getLogger(__name__)
+
+# First day of the APOD archive
+ARCHIVE_START = date(1995, 6, 16)
+
+# Days the checkpoint may trail today for the mirror to count as caught up;
+# syncs stop at yesterday and run about daily
+MAX_SYNC_LAG_DAYS = 2
+
+# Fields stored in their own columns; everything else goes into the extra JSON
+_COLUMNS = ('date', 'title', 'explanation', 'media_type', 'url')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apod (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL DEFAULT '',
+    explanation TEXT NOT NULL DEFAULT '',
+    media_type TEXT,
+    url TEXT,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS apod_fts USING fts5(
+    title, explanation, content='apod', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS apod_ai AFTER INSERT ON apod BEGIN
+    INSERT INTO apod_fts(rowid, title, explanation) VALUES (new.id, new.title, new.explanation);
+END;
+CREATE TRIGGER IF NOT EXISTS apod_ad AFTER DELETE ON apod BEGIN
+    INSERT INTO apod_fts(apod_fts, rowid, title, explanation) VALUES ('delete', old.id, old.title, old.explanation);
+END;
+CREATE TRIGGER IF NOT EXISTS apod_au AFTER UPDATE ON apod BEGIN
+    INSERT INTO apod_fts(apod_fts, rowid, title, explanation) VALUES ('delete', old.id, old.title, old.explanation);
+    INSERT INTO apod_fts(rowid, title, explanation) VALUES (new.id, new.title, new.explanation);
+END;
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class APODArchive:
+    """
+    SQLite mirror of the APOD archive
+
+    Entries live in a plain table with an external-content FTS5 index over
+    title and explanation, so text is stored once. Sync progress is kept
+    in the same file, which makes bulk syncs resumable.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM apod').fetchone()[0]
+
+    def last_synced_date(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = 'last_date'").fetchone()
+        return row[0] if row else None
+
+    def is_caught_up(self) -> bool:
+        """Whether the sync checkpoint is within MAX_SYNC_LAG_DAYS of today (UTC)"""
+        last = self.last_synced_date()
+        earliest = datetime.now(timezone.utc).date() - timedelta(days=MAX_SYNC_LAG_DAYS)
+        return last is not None and last >= earliest.isoformat()
+
+    def upsert(self, entries: List[Dict[str, Any]], last_date: Optional[str] = None) -> None:
+        """Insert or replace entries and optionally advance the sync checkpoint, atomically"""
+        rows = []
+        for entry in entries:
+            extra = {key: value for key, value in entry.items() if key not in _COLUMNS}
+            rows.append((entry['date'], entry.get('title') or '', entry.get('explanation') or '',
+                         entry.get('media_type'), entry.get('url'), json.dumps(extra, separators=(',', ':'))))
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    """INSERT INTO apod (date, title, explanation, media_type, url, extra)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(date) DO UPDATE SET title = excluded.title,
+                           explanation = excluded.explanation, media_type = excluded.media_type,
+                           url = excluded.url, extra = excluded.extra""",
+                    rows
+                )
+                if last_date is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_date', ?)", (last_date,)
+                    )
+
+    def _row_to_entry(self, row: sqlite3.Row) -> Dict[str, Any]:
+        entry = json.loads(row['extra'])
+        entry.update({column: row[column] for column in _COLUMNS if row[column] is not None})
+        return entry
+
+    def get(self, day: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM apod WHERE date = ?', (day,)).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def random(self, count: int) -> List[Dict[str, Any]]:
+        """Sample count random entries"""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM apod ORDER BY RANDOM() LIMIT ?', (count,)).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def search(self, query: str, limit: int = 20, start_date: Optional[str] = None,
+               end_date: Optional[str] = None, media_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Full-text search over titles and explanations, best matches first
+
+        All words of the query must match; words are stemmed, so "nebulae"
+        also finds "nebula". Title matches rank higher than explanation
+        matches.
+        """
+        words = re.findall(r'\w+', query)
+        if not words:
+            return []
+        match = ' '.join('"%s"' % word for word in words)
+
+        sql = """SELECT apod.date, apod.title, apod.media_type, apod.url,
+                        snippet(apod_fts, 1, '[', ']', '...', 16) AS snippet
+                 FROM apod_fts JOIN apod ON apod.id = apod_fts.rowid
+                 WHERE apod_fts MATCH ?"""
+        params: List[Any] = [match]
+        if start_date:
+            sql += ' AND apod.date >= ?'
+            params.append(start_date)
+        if end_date:
+            sql += ' AND apod.date <= ?'
+            params.append(end_date)
+        if media_type:
+            sql += ' AND apod.media_type = ?'
+            params.append(media_type)
+        sql += ' ORDER BY bm25(apod_fts, 10.0, 1.0) LIMIT ?'
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def sync(self, client, max_days: Optional[int] = None, batch_days: int = 365) -> Dict[str, Any]:
+        """
+        Mirror days after the last checkpoint up to yesterday (UTC)
+
+        Days are fetched through client.fetch_days in batches; each batch is
+        written together with its checkpoint, so an interrupted sync resumes
+        where it stopped. max_days bounds the number of days covered by one
+        call.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return {"error": "A sync of the APOD archive is already running"}
+        try:
+            last = self.last_synced_date()
+            start = ARCHIVE_START if last is None else datetime.strptime(last, '%Y-%m-%d').date() + timedelta(days=1)
+            # Today's APOD may not be published yet in US time zones
+            end = datetime.now(timezone.utc).date() - timedelta(days=1)
+            if max_days is not None:
+                end = min(end, start + timedelta(days=max_days - 1))
+
+            synced = 0
+            while start <= end:
+                batch_end = min(end, start + timedelta(days=batch_days - 1))
+                days = [(start + timedelta(days=i)).isoformat() for i in range((batch_end - start).days + 1)]
+                fetched = client.fetch_days(days)
+                # The checkpoint covers the whole batch, so a batch is only written once every chunk succeeded
+                if fetched["errors"]:
+                    return {"error": fetched["errors"][0]["error"], "synced_entries": synced,
+                            "last_synced_date": self.last_synced_date()}
+                self.upsert(list(fetched["entries"].values()), batch_end.isoformat())
+                synced += len(fetched["entries"])
+                logger.info("APOD archive synced through %s (%d entries)", batch_end, synced)
+                start = batch_end + timedelta(days=1)
+
+            return {"synced_entries": synced, "last_synced_date": self.last_synced_date(),
+                    "total_entries": self.count()}
+        finally:
+            self._sync_lock.release()
+
+    def start_periodic_sync(self, client, interval_hours: float = 24) -> threading.Thread:
+        """Run sync now and then every interval_hours on a daemon thread"""
+        def run():
+            while True:
+                try:
+                    result = self.sync(client)
+                    if "error" in result:
+                        logger.warning("APOD archive sync stopped: %s", result["error"])
+                except Exception as e:
+                    logger.error("APOD archive sync failed: %s", e)
+                time.sleep(interval_hours * 3600)
+
+        thread = threading.Thread(target=run, name='nasa-apod-sync', daemon=True)
+        thread.start()
+        return thread
+
+
+_archive: Optional[APODArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_apod_archive() -> Optional[APODArchive]:
+    """Get the APOD archive mirror, or None if APOD_ARCHIVE_PATH is not set"""
+    global _archive
+    path = get_config().get_apod_archive_config()['path']
+    if not path:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = APODArchive(path)
+        return _archive
@@ -2,16 +2,39 @@
 Asteroids NeoWs - Near Earth Object Web Service API
 """
 from .base import NASAAPIBase
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+from .cache import create_cache
+from typing import Dict, Any, Optional, List
+from datetime import datetime, timedelta, timezone
+
+
+# Close approaches keyed by date, shared by all clients (the feed doesn't depend on the API key)
+# Always enabled, so overlapping and sliding windows only fetch the new days.
+_feed_day_cache = create_cache('neo_feed_days', enabled=True)
+
+# Most days covered by one get_feed call; longer ranges are truncated
+MAX_FEED_DAYS = 92
+
+# Asteroid lookups keyed by NeoWs ID
+_asteroid_cache = create_cache('neo_asteroids')
+
+# Orbital elements kept by the orbital_summary projection
+_ORBITAL_SUMMARY_FIELDS = ('epoch_osculation', 'eccentricity', 'semi_major_axis', 'inclination',
+                           'ascending_node_longitude', 'perihelion_argument', 'mean_anomaly', 'mean_motion',
+                           'perihelion_distance', 'aphelion_distance', 'orbital_period')
 
 
 class AsteroidsAPI(NASAAPIBase):
     """NASA Near Earth Object Web Service API client"""
     
+    # Most dates (inclusive) in a single feed request; the endpoint accepts
+    # end_date - start_date <= 7
+    feed_chunk_days = 8
+    
     def __init__(self, api_key: str = "DEMO_KEY"):
         super().__init__(api_key)
         self.base_endpoint = f"{self.base_url}/neo/rest/v1"
+        self.day_cache = _feed_day_cache
+        self.asteroid_cache = _asteroid_cache
     
     def get_feed(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -22,17 +45,64 @@ class AsteroidsAPI(NASAAPIBase):
             end_date: End date in YYYY-MM-DD format (optional, defaults to 7 days from start)
             
         Returns:
-            Dictionary containing asteroid feed data
+            Dictionary containing asteroid feed data. A range longer than
+            MAX_FEED_DAYS is cut short, with "truncated" set and
+            "next_start_date" giving where to continue; chunks that failed
+            are listed under "errors" with their date spans.
+        
+        The range may be longer than the 7 days the feed endpoint accepts.
+        Days already cached are served locally; the missing days are fetched
+        in chunks of at most feed_chunk_days, concurrently, and merged by
+        date with element_count recomputed.
         """
-        params = {}
+        try:
+            start = (datetime.strptime(self._format_date(start_date), '%Y-%m-%d').date()
+                     if start_date else datetime.now(timezone.utc).date())
+            end = (datetime.strptime(self._format_date(end_date), '%Y-%m-%d').date()
+                   if end_date else start + timedelta(days=7))
+        except ValueError as e:
+            return {"error": str(e)}
+        if end < start:
+            return {"error": "end_date must not be before start_date"}
+        truncated = (end - start).days >= MAX_FEED_DAYS
+        if truncated:
+            end = start + timedelta(days=MAX_FEED_DAYS - 1)
         
-        if start_date:
-            params['start_date'] = start_date
-        if end_date:
-            params['end_date'] = end_date
-            
+        dates = self._date_range(start, end)
+        days = self.day_cache.get_many(dates)
+        missing = [date for date in dates if date not in days]
+        
+        chunks = self._group_consecutive_dates(missing, self.feed_chunk_days)
+        results = self._map_concurrently(self._fetch_feed_chunk, chunks)
+        errors = []
+        for chunk, result in zip(chunks, results):
+            if "error" in result:
+                errors.append({"start_date": chunk[0], "end_date": chunk[-1], "error": result["error"]})
+                continue
+            neos_by_date = result.get('near_earth_objects', {})
+            for date in chunk:
+                # Days without close approaches are cached too, as empty lists
+                days[date] = neos_by_date.get(date, [])
+                self.day_cache.set(date, days[date])
+        
+        if errors and len(errors) == len(chunks) and len(days) == 0:
+            return {"error": errors[0]["error"], "errors": errors}
+        
+        near_earth_objects = {date: days[date] for date in dates if days.get(date)}
+        result = {
+            'element_count': sum(len(neos) for neos in near_earth_objects.values()),
+            'near_earth_objects': near_earth_objects
+        }
+        if truncated:
+            result['truncated'] = True
+            result['next_start_date'] = (end + timedelta(days=1)).isoformat()
+        if errors:
+            result['errors'] = errors
+        return result
+    
+    def _fetch_feed_chunk(self, dates: List[str]) -> Dict[str, Any]:
         endpoint = f"{self.base_endpoint}/feed"
-        return self._make_request(endpoint, params)
+        return self._make_request(endpoint, {'start_date': dates[0], 'end_date': dates[-1]})
     
     def get_asteroid_by_id(self, asteroid_id: str) -> Dict[str, Any]:
         """
@@ -44,8 +114,95 @@ class AsteroidsAPI(NASAAPIBase):
         Returns:
             Dictionary containing asteroid details
         """
+        cached = self.asteroid_cache.get(asteroid_id)
+        if cached is not None:
+            return cached
+        return self._fetch_asteroid(asteroid_id)
+    
+    def get_asteroids_by_ids(self, asteroid_ids: List[str], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get many asteroids by ID
+        
+        Args:
+            asteroid_ids: NASA JPL asteroid database IDs (duplicates are fetched once)
+            fields: Fields to keep for each asteroid (optional, defaults to all).
+                Besides top-level NeoWs fields, "orbital_summary" gives the main
+                orbital elements and "approach_summary" the next and closest
+                Earth approaches.
+            
+        Returns:
+            Dictionary containing asteroids keyed by ID, per-ID errors and
+            the number of asteroids served from cache and fetched
+        
+        Cached asteroids are served locally; the rest are fetched
+        concurrently under the shared rate limiter.
+        """
+        ids = list(dict.fromkeys(str(asteroid_id) for asteroid_id in asteroid_ids))
+        asteroids = self.asteroid_cache.get_many(ids)
+        cached = len(asteroids)
+        missing = [asteroid_id for asteroid_id in ids if asteroid_id not in asteroids]
+        
+        errors = {}
+        for asteroid_id, result in zip(missing, self._map_concurrently(self._fetch_asteroid, missing)):
+            if "error" in result:
+                errors[asteroid_id] = result["error"]
+            else:
+                asteroids[asteroid_id] = result
+        
+        results = {asteroid_id: (self._project(asteroids[asteroid_id], fields) if fields else asteroids[asteroid_id])
+                   for asteroid_id in ids if asteroid_id in asteroids}
+        return {'results': results, 'errors': errors, 'cached': cached, 'fetched': len(missing) - len(errors)}
+    
+    def _fetch_asteroid(self, asteroid_id: str) -> Dict[str, Any]:
         endpoint = f"{self.base_endpoint}/neo/{asteroid_id}"
-        return self._make_request(endpoint)
+        result = self._make_request(endpoint)
+        if "error" not in result:
+            self.asteroid_cache.set(asteroid_id, result)
+        return result
+    
+    def _project(self, asteroid: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+        """Keep the requested fields of an asteroid, computing the summary projections"""
+        projected = {'id': asteroid.get('id')}
+        for field in fields:
+            if field == 'orbital_summary':
+                orbital_data = asteroid.get('orbital_data') or {}
+                summary = {key: orbital_data[key] for key in _ORBITAL_SUMMARY_FIELDS if key in orbital_data}
+                summary['orbit_class'] = (orbital_data.get('orbit_class') or {}).get('orbit_class_type')
+                projected[field] = summary
+            elif field == 'approach_summary':
+                projected[field] = self._summarize_approaches(asteroid.get('close_approach_data') or [])
+            elif field in asteroid:
+                projected[field] = asteroid[field]
+        return projected
+    
+    def _summarize_approaches(self, approaches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        today = datetime.now(timezone.utc).date().isoformat()
+        earth = [approach for approach in approaches if approach.get('orbiting_body') == 'Earth']
+        
+        def brief(approach: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if approach is None:
+                return None
+            return {
+                'date': approach.get('close_approach_date_full') or approach.get('close_approach_date'),
+                'miss_distance_km': approach.get('miss_distance', {}).get('kilometers'),
+                'relative_velocity_kms': approach.get('relative_velocity', {}).get('kilometers_per_second')
+            }
+        
+        upcoming = [approach for approach in earth if approach.get('close_approach_date', '') >= today]
+        
+        def miss_km(approach: Dict[str, Any]) -> float:
+            try:
+                return float(approach['miss_distance']['kilometers'])
+            except (KeyError, TypeError, ValueError):
+                return float('inf')
+        
+        closest = min(earth, key=miss_km, default=None)
+        return {
+            'earth_approaches': len(earth),
+            'next_earth_approach': brief(min(upcoming, key=lambda approach: approach['close_approach_date'],
+                                             default=None)),
+            'closest_earth_approach': brief(closest)
+        }
     
     def browse_asteroids(self, page: int = 0, size: int = 20) -> Dict[str, Any]:
         """
@@ -66,6 +223,20 @@ class AsteroidsAPI(NASAAPIBase):
         endpoint = f"{self.base_endpoint}/neo/browse"
         return self._make_request(endpoint, params)
     
+    def browse_pages(self, pages: List[int], size: int = 20) -> List[Dict[str, Any]]:
+        """
+        Fetch several browse pages concurrently
+        
+        Args:
+            pages: Page numbers (0-based)
+            size: Number of asteroids per page (max 100)
+            
+        Returns:
+            List of page responses in the order of pages; failed pages are
+            dictionaries with an "error" key
+        """
+        return self._map_concurrently(lambda page: self.browse_asteroids(page, size), pages)
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         Get Near Earth Object statistics
@@ -2,27 +2,42 @@
 Base class for NASA API clients
 """
 import requests
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterable, List, Optional
+import inspect
 import time
 import logging
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from config import get_config
+from .flight_recorder import get_flight_recorder
+from .instrumentation import get_current_tool
+from .logging_setup import configure_logging
+from .metrics import get_metrics
+from .rate_limiter import get_rate_limiter
+from .redaction import redact_params
+from .tracing import bind_context, get_current_span, get_tracer, traced
+from .transport import PHASES, create_session, decode_json, iter_body, new_timing, send
 
 
 class NASAAPIBase:
     """Base class for all NASA API clients"""
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Give every public (synchronous) client method its own tracing span
+        for name, value in list(vars(cls).items()):
+            if (not name.startswith('_') and inspect.isfunction(value)
+                    and not inspect.iscoroutinefunction(value) and not inspect.isasyncgenfunction(value)):
+                setattr(cls, name, traced(f"{cls.__name__}.{name}")(value))
+
     def __init__(self, api_key: str = "DEMO_KEY"):
         self.config = get_config()
         self.api_key = api_key or self.config.get_nasa_api_key()
-        self.session = requests.Session()
+        self.session = create_session()
         self.base_url = "https://api.nasa.gov"
 
-        # Setup logging
-        logging.basicConfig(
-            level=getattr(logging, self.config.log_level),
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+        # Setup logging (once per process)
+        configure_logging()
         self.logger = logging.getLogger(self.__class__.__name__)
         
     def _make_request(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -36,21 +51,78 @@ class NASAAPIBase:
         params['api_key'] = self.api_key
 
         # Log request
-        self.logger.debug(f"Making request to {url} with params: {params}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Making request to %s with params: %s", url, redact_params(params))
+
+        attempts = []
+        started = time.time()
+        start = time.perf_counter()
+        result = self._request_with_retries(url, params, attempts)
+        self._record_request(url, params, attempts, started, time.perf_counter() - start, result)
+        return result
+
+    def _make_binary_request(self, url: str, params: Optional[Dict[str, Any]], store: Any,
+                             ref: Optional[str] = None, byte_limiter: Any = None) -> Dict[str, Any]:
+        """
+        Make HTTP request for a binary body, streaming it into a blob store
+
+        The body is written to store chunk by chunk (under ref, if given)
+        and never held in memory as a whole; byte_limiter, if given, caps
+        the read rate. JSON bodies (the API reports some errors with a 200
+        status) are decoded as usual.
+
+        Returns:
+            The store's description of the saved blob, the decoded JSON
+            body, or a dictionary with an "error" key
+        """
+        if params is None:
+            params = {}
+        params['api_key'] = self.api_key
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Making binary request to %s with params: %s", url, redact_params(params))
+
+        def save(response, timing):
+            content_type = response.headers.get('Content-Type', '')
+            if content_type.startswith('application/json'):
+                return decode_json(response, timing)
+            chunks = iter_body(response, timing)
+            if byte_limiter is not None:
+                chunks = byte_limiter.throttle(chunks)
+            return store.put(chunks, content_type, ref)
+
+        attempts = []
+        started = time.time()
+        start = time.perf_counter()
+        result = self._request_with_retries(url, params, attempts, save)
+        self._record_request(url, params, attempts, started, time.perf_counter() - start, result)
+        return result
+
+    def _request_with_retries(self, url: str, params: Dict[str, Any], attempts: list,
+                              read_body: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        Send request, retrying on rate limiting, server errors and timeouts
 
+        Successful bodies are decoded as JSON, or passed unread to
+        read_body(response, timing) when given.
+        """
         max_retries = self.config.max_retries
         retry_delay = self.config.retry_delay
         timeout = self.config.request_timeout
 
         for attempt in range(max_retries + 1):
+            get_rate_limiter(self.api_key).acquire()
+            timing = new_timing(url)
+            attempts.append(timing)
             try:
-                response = self.session.get(url, params=params, timeout=timeout)
+                response = send(self.session, url, params, timeout, timing, read_body=read_body is None)
 
                 # Handle rate limiting
                 if response.status_code == 429:
+                    response.close()
                     retry_after = int(response.headers.get('Retry-After', 60))
-                    self.logger.warning(f"Rate limited. Waiting {retry_after} seconds...")
-                    time.sleep(retry_after)
+                    self.logger.warning("Rate limited. Waiting %s seconds...", retry_after)
+                    self._sleep('rate_limit.wait', retry_after)
                     continue
 
                 # Handle other HTTP errors
@@ -60,43 +132,51 @@ class NASAAPIBase:
 
                     if attempt < max_retries and response.status_code >= 500:
                         # Retry on server errors
-                        self.logger.info(f"Retrying in {retry_delay} seconds... (attempt {attempt + 1}/{max_retries})")
-                        time.sleep(retry_delay)
+                        self.logger.info("Retrying in %s seconds... (attempt %d/%d)", retry_delay, attempt + 1, max_retries)
+                        self._sleep('retry.wait', retry_delay)
                         continue
 
                     return {"error": error_msg}
 
                 # Success
-                self.logger.debug(f"Request successful: {response.status_code}")
-                return response.json()
+                self.logger.debug("Request successful: %s", response.status_code)
+                if read_body is not None:
+                    return read_body(response, timing)
+                return decode_json(response, timing)
 
             except requests.exceptions.Timeout:
                 error_msg = f"Request timeout after {timeout} seconds"
+                timing['error'] = error_msg
                 self.logger.error(error_msg)
 
                 if attempt < max_retries:
-                    self.logger.info(f"Retrying in {retry_delay} seconds... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(retry_delay)
+                    self.logger.info("Retrying in %s seconds... (attempt %d/%d)", retry_delay, attempt + 1, max_retries)
+                    self._sleep('retry.wait', retry_delay)
                     continue
 
                 return {"error": error_msg}
 
             except requests.exceptions.RequestException as e:
                 error_msg = f"Request failed: {str(e)}"
+                timing['error'] = error_msg
                 self.logger.error(error_msg)
 
                 if attempt < max_retries:
-                    self.logger.info(f"Retrying in {retry_delay} seconds... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(retry_delay)
+                    self.logger.info("Retrying in %s seconds... (attempt %d/%d)", retry_delay, attempt + 1, max_retries)
+                    self._sleep('retry.wait', retry_delay)
                     continue
 
                 return {"error": error_msg}
 
             except Exception as e:
                 error_msg = f"Unexpected error: {str(e)}"
+                timing['error'] = error_msg
                 self.logger.error(error_msg)
                 return {"error": error_msg}
 
+            finally:
+                self._record_attempt(timing, attempt + 1)
+
         return {"error": "Max retries exceeded"}
     
     def _make_external_request(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -106,15 +186,102 @@ class NASAAPIBase:
         if params is None:
             params = {}
             
+        timing = new_timing(url)
+        start = time.perf_counter()
         try:
-            response = self.session.get(url, params=params, timeout=30)
+            response = send(self.session, url, params, 30, timing)
             response.raise_for_status()
-            return response.json()
+            result = decode_json(response, timing)
             
         except requests.exceptions.RequestException as e:
-            return {"error": f"Request failed: {str(e)}"}
+            timing['error'] = f"Request failed: {str(e)}"
+            result = {"error": timing['error']}
         except Exception as e:
-            return {"error": f"An error occurred: {str(e)}"}
+            timing['error'] = f"An error occurred: {str(e)}"
+            result = {"error": timing['error']}
+        finally:
+            self._record_attempt(timing, 1)
+
+        self._record_request(url, params, [timing], timing['start_time'], time.perf_counter() - start, result)
+        return result
+
+    def _map_concurrently(self, func: Callable, items: Iterable) -> List[Any]:
+        """
+        Call func on every item using up to max_concurrency threads
+
+        Results are returned in the order of items. Requests made through
+        _make_request still go through the shared rate limiter, and each
+        task keeps the caller's trace context.
+        """
+        items = list(items)
+        workers = min(self.config.max_concurrency, len(items))
+        if workers <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='nasa-fetch') as executor:
+            futures = [executor.submit(bind_context(func), item) for item in items]
+            return [future.result() for future in futures]
+
+    def _record_attempt(self, timing: Dict[str, Any], attempt: int) -> None:
+        """Report a finished HTTP attempt to the metrics and tracing surfaces"""
+        get_metrics().record_request(timing)
+
+        tracer = get_tracer()
+        if tracer.enabled:
+            attributes = {
+                'http.host': timing['host'],
+                'http.status_code': timing['status'],
+                'attempt': attempt,
+                'reused_connection': timing['reused_connection'],
+                'bytes': timing['bytes'],
+                'wire_bytes': timing['wire_bytes']
+            }
+            for phase in PHASES:
+                attributes[f"{phase}_ms"] = round(timing[phase] * 1000, 3)
+            error = timing['error']
+            if error is None and timing['status'] is not None and timing['status'] >= 400:
+                error = f"HTTP {timing['status']}"
+            tracer.record_span('http.attempt', timing['start_time'], timing['elapsed'], attributes, error)
+
+    def _record_request(self, url: str, params: Dict[str, Any], attempts: list,
+                        started: float, duration: float, result: Any) -> None:
+        """Add a finished request, including all of its attempts, to the flight recorder"""
+        recorder = get_flight_recorder()
+        if not recorder.enabled:
+            return
+
+        recorder.record({
+            'started': started,
+            'duration': duration,
+            'tool': get_current_tool(),
+            'trace_id': get_current_span().trace_id,
+            'client': self.__class__.__name__,
+            'endpoint': url,
+            'params': redact_params(params),
+            'attempts': attempts,
+            'error': result.get('error') if isinstance(result, dict) else None
+        })
+
+    def _sleep(self, span_name: str, seconds: float) -> None:
+        """Wait between attempts inside a span so the wait shows up in traces"""
+        with get_tracer().start_span(span_name, seconds=seconds):
+            time.sleep(seconds)
+
+    def _date_range(self, start: date, end: date) -> List[str]:
+        """All dates from start to end inclusive, in YYYY-MM-DD format"""
+        return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+    def _group_consecutive_dates(self, dates: List[str], max_days: int) -> List[List[str]]:
+        """Split sorted YYYY-MM-DD dates into runs of consecutive days, each at most max_days long"""
+        runs = []
+        previous = None
+        for date_str in dates:
+            day = datetime.strptime(date_str, '%Y-%m-%d').date()
+            if previous is None or day - previous != timedelta(days=1) or len(runs[-1]) >= max_days:
+                runs.append([])
+            runs[-1].append(date_str)
+            previous = day
+        return runs
 
     def _format_date(self, date_str: str) -> str:
         """Validate and format date string"""
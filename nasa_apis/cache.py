@@ -0,0 +1,126 @@
+"""
+In-memory response caches shared by the NASA API clients
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional
+
+from config import get_config
+from .memory import estimate_size
+from .metrics import get_metrics
+from .tracing import get_tracer
+
+
+# Marker for "no expiry" when passed as ttl to TTLCache.set
+NO_EXPIRY = None
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry
+
+    Each cache is a named tier: it reports entry count, hit/miss counters
+    and approximate size through the metrics surface, and lookups are
+    traced as cache.lookup spans.
+    """
+
+    def __init__(self, name: str, ttl: Optional[float] = 300, max_entries: int = 10000,
+                 enabled: bool = True):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        get_metrics().register_cache_tier(name, self.stats)
+
+    def _lookup(self, key: Any, now: float) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Get a cached value, or default if missing or expired"""
+        if not self.enabled:
+            return default
+        with get_tracer().start_span('cache.lookup', cache=self.name, keys=1) as span:
+            with self._lock:
+                entry = self._lookup(key, time.monotonic())
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            span.set_attribute('hits', 0 if entry is None else 1)
+        return default if entry is None else entry[1]
+
+    def get_many(self, keys: Iterable[Any]) -> Dict[Any, Any]:
+        """Get all cached values among keys, as a dict of the hits"""
+        if not self.enabled:
+            return {}
+        keys = list(keys)
+        found = {}
+        with get_tracer().start_span('cache.lookup', cache=self.name, keys=len(keys)) as span:
+            with self._lock:
+                now = time.monotonic()
+                for key in keys:
+                    entry = self._lookup(key, now)
+                    if entry is not None:
+                        found[key] = entry[1]
+                self.hits += len(found)
+                self.misses += len(keys) - len(found)
+            span.set_attribute('hits', len(found))
+        return found
+
+    def set(self, key: Any, value: Any, ttl: Any = ...) -> None:
+        """Store a value; ttl defaults to the cache's ttl, NO_EXPIRY keeps it until evicted"""
+        if not self.enabled:
+            return
+        if ttl is ...:
+            ttl = self.ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, hit/miss counters and approximate size in bytes"""
+        with self._lock:
+            values = [value for _, value in self._entries.values()]
+            hits, misses = self.hits, self.misses
+        return {
+            'enabled': self.enabled,
+            'entries': len(values),
+            'hits': hits,
+            'misses': misses,
+            'approx_bytes': estimate_size(values)
+        }
+
+
+def create_cache(name: str, ttl: Any = ..., max_entries: Optional[int] = None,
+                 enabled: Optional[bool] = None) -> TTLCache:
+    """Create a cache tier with defaults taken from the cache configuration"""
+    cache_config = get_config().get_cache_config()
+    return TTLCache(
+        name,
+        ttl=cache_config['ttl'] if ttl is ... else ttl,
+        max_entries=cache_config['max_entries'] if max_entries is None else max_entries,
+        enabled=cache_config['enabled'] if enabled is None else enabled
+    )
@@ -2,10 +2,100 @@
 DONKI - Space Weather Database API
 """
 from .base import NASAAPIBase
-from typing import Dict, Any, Optional
+from .cache import create_cache
+from typing import Dict, Any, Iterable, List, Optional, Set, Union
 from datetime import datetime, timedelta
 
 
+# Event types in timeline order: getter, ID field and time field of each
+EVENT_TYPES = {
+    'FLR': ('get_solar_flares', 'flrID', 'beginTime'),
+    'CME': ('get_coronal_mass_ejections', 'activityID', 'startTime'),
+    'SEP': ('get_solar_energetic_particles', 'sepID', 'eventTime'),
+    'IPS': ('get_interplanetary_shocks', 'activityID', 'eventTime'),
+    'HSS': ('get_high_speed_streams', 'hssID', 'eventTime'),
+    'MPC': ('get_magnetopause_crossings', 'mpcID', 'eventTime'),
+    'GST': ('get_geomagnetic_storms', 'gstID', 'startTime'),
+    'RBE': ('get_radiation_belt_enhancements', 'rbeID', 'eventTime'),
+}
+
+# Event graphs keyed by window and event types
+_timeline_cache = create_cache('donki_timelines')
+
+
+def event_type_of(activity_id: str) -> Optional[str]:
+    """Event type of a DONKI activity ID such as 2024-05-10T06:54:00-CME-001"""
+    parts = str(activity_id).split('-')
+    return parts[-2] if len(parts) >= 2 and parts[-2] in EVENT_TYPES else None
+
+
+class EventGraph:
+    """
+    DONKI events of a window linked through their linkedEvents
+
+    Links are kept in both directions, since DONKI does not always list a
+    link on both events. Links to events outside the window are kept as
+    unresolved IDs.
+    """
+
+    def __init__(self):
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.links: Dict[str, Set[str]] = {}
+
+    def add(self, event_type: str, event: Dict[str, Any]) -> None:
+        _, id_field, time_field = EVENT_TYPES[event_type]
+        event_id = event.get(id_field)
+        if not event_id:
+            return
+        self.events[event_id] = {'id': event_id, 'type': event_type, 'time': event.get(time_field), 'event': event}
+        self.links.setdefault(event_id, set())
+        for linked in event.get('linkedEvents') or []:
+            linked_id = linked.get('activityID')
+            if linked_id and linked_id != event_id:
+                self.links[event_id].add(linked_id)
+                self.links.setdefault(linked_id, set()).add(event_id)
+
+    def _order(self, event_ids: Iterable[str]) -> List[str]:
+        types = list(EVENT_TYPES)
+        return sorted(event_ids, key=lambda event_id: (self.events[event_id]['time'] or '',
+                                                      types.index(self.events[event_id]['type']), event_id))
+
+    def timeline(self) -> List[Dict[str, Any]]:
+        """Events in time order, each with its linked event IDs"""
+        return [dict(self.events[event_id], linked=sorted(self.links[event_id]))
+                for event_id in self._order(self.events)]
+
+    def unresolved(self) -> List[Dict[str, Any]]:
+        """Linked IDs that are not events of the graph, with the type read from the ID"""
+        return [{'id': event_id, 'type': event_type_of(event_id)}
+                for event_id in sorted(self.links) if event_id not in self.events]
+
+    def chain(self, event_id: str) -> List[str]:
+        """IDs of the events connected to event_id, directly or through others, in time order"""
+        if event_id not in self.events:
+            return []
+        seen = {event_id}
+        stack = [event_id]
+        while stack:
+            for linked in self.links[stack.pop()]:
+                if linked not in seen and linked in self.events:
+                    seen.add(linked)
+                    stack.append(linked)
+        return self._order(seen)
+
+    def chains(self) -> List[List[str]]:
+        """Every group of two or more linked events, ordered by their first event"""
+        seen: Set[str] = set()
+        chains = []
+        for event_id in self._order(self.events):
+            if event_id not in seen:
+                chain = self.chain(event_id)
+                seen.update(chain)
+                if len(chain) > 1:
+                    chains.append(chain)
+        return chains
+
+
 class DONKIAPI(NASAAPIBase):
     """NASA DONKI (Space Weather Database) API client"""
     
@@ -141,6 +231,87 @@ class DONKIAPI(NASAAPIBase):
         endpoint = f"{self.base_endpoint}/HSS"
         return self._make_request(endpoint, params)
     
+    def get_timeline(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     event_types: Optional[Union[str, List[str]]] = None, event_id: Optional[str] = None,
+                     include_details: bool = True) -> Dict[str, Any]:
+        """
+        Get DONKI events of several types as one time-ordered timeline
+        
+        Args:
+            start_date: Start date in YYYY-MM-DD format (defaults to 30 days ago)
+            end_date: End date in YYYY-MM-DD format (defaults to today)
+            event_types: Types to include, as a list or comma-separated codes
+                (CME, GST, IPS, FLR, SEP, MPC, RBE, HSS; defaults to all)
+            event_id: Also return the chain of events linked to this one (optional)
+            include_details: Include the full DONKI record of each event
+            
+        Returns:
+            Dictionary containing the timeline, event counts per type, the
+            chains of linked events, linked IDs outside the window and
+            per-type errors
+        
+        The types are fetched concurrently and their linkedEvents resolved
+        into an in-memory graph, so chains such as CME -> IPS -> GST are
+        followed without further requests. Graphs are cached by window.
+        """
+        if event_types is None:
+            types = list(EVENT_TYPES)
+        else:
+            requested = event_types.split(',') if isinstance(event_types, str) else event_types
+            requested = {str(code).strip().upper() for code in requested if str(code).strip()}
+            unknown = sorted(requested - set(EVENT_TYPES))
+            if unknown:
+                return {"error": f"Unknown event types: {', '.join(unknown)} "
+                                 f"(expected {', '.join(EVENT_TYPES)})"}
+            types = [code for code in EVENT_TYPES if code in requested]
+            if not types:
+                return {"error": "At least one event type is required"}
+        
+        params = self._get_date_params(start_date, end_date)
+        if params['endDate'] < params['startDate']:
+            return {"error": "end_date must not be before start_date"}
+        
+        key = (params['startDate'], params['endDate'], tuple(types))
+        cached = _timeline_cache.get(key)
+        if cached is not None:
+            graph, errors = cached
+        else:
+            results = self._map_concurrently(
+                lambda code: getattr(self, EVENT_TYPES[code][0])(params['startDate'], params['endDate']), types
+            )
+            graph = EventGraph()
+            errors = {}
+            for code, result in zip(types, results):
+                if isinstance(result, dict) and "error" in result:
+                    errors[code] = result["error"]
+                    continue
+                for event in result or []:
+                    graph.add(code, event)
+            if len(errors) == len(types):
+                return {"error": f"All event types failed: {errors[types[0]]}", "errors": errors}
+            # Windows with failed types are not cached, so the next call retries them
+            if not errors:
+                _timeline_cache.set(key, (graph, errors))
+        
+        timeline = graph.timeline()
+        if not include_details:
+            timeline = [{field: value for field, value in entry.items() if field != 'event'} for entry in timeline]
+        result = {
+            "start_date": params['startDate'],
+            "end_date": params['endDate'],
+            "event_types": types,
+            "counts": {code: sum(1 for entry in timeline if entry['type'] == code) for code in types},
+            "timeline": timeline,
+            "chains": graph.chains(),
+            "unresolved_links": graph.unresolved(),
+            "errors": errors
+        }
+        if event_id:
+            if event_id not in graph.events:
+                result["chain_error"] = f"Event {event_id} is not in the timeline"
+            result["chain"] = graph.chain(event_id)
+        return result
+    
     def _get_date_params(self, start_date: Optional[str], end_date: Optional[str]) -> Dict[str, str]:
         """Helper method to prepare date parameters"""
         params = {}
@@ -2,90 +2,269 @@
 Earth Imagery API
 """
 from .base import NASAAPIBase
-from typing import Dict, Any, Optional
+from .cache import create_cache
+from .image_store import get_image_store
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import math
+import os
+
+
+# Image sizes are rounded up to a multiple of DIM_STEP degrees so that
+# nearby dim values share grid cells
+DIM_STEP = 0.005
+MIN_DIM = 0.025
+MAX_DIM = 0.25
+
+# Most grid cells a batch may cover, cached or not
+MAX_BATCH_CELLS = 10000
+
+# Responses keyed by endpoint, grid cell, date and options
+_cell_cache = create_cache('earth_cells')
+
+Cell = Tuple[float, float, float]
+
+
+def _cell_size(dim: float) -> float:
+    return round(min(MAX_DIM, math.ceil(round(dim / DIM_STEP, 6)) * DIM_STEP), 3)
+
+
+def _cell_center(row: int, col: int, size: float) -> Cell:
+    lat = min(90.0, -90.0 + (row + 0.5) * size)
+    lon = min(180.0, -180.0 + (col + 0.5) * size)
+    return round(lat, 6), round(lon, 6), size
+
+
+def grid_cell(lat: float, lon: float, dim: float) -> Cell:
+    """
+    Grid cell holding a point, as (center lat, center lon, size)
+
+    The grid has square cells as wide as the image (dim rounded up to
+    DIM_STEP), so the image of a cell always contains every point in it
+    and requests for nearby coordinates map to the same cell.
+    """
+    size = _cell_size(dim)
+    return _cell_center(math.floor((lat + 90.0) / size), math.floor((lon + 180.0) / size), size)
+
+
+def grid_cell_count(min_lat: float, min_lon: float, max_lat: float, max_lon: float, dim: float) -> int:
+    """Number of grid cells covering a bounding box, without building them"""
+    size = _cell_size(dim)
+    rows = math.floor((max_lat + 90.0) / size) - math.floor((min_lat + 90.0) / size) + 1
+    cols = math.floor((max_lon + 180.0) / size) - math.floor((min_lon + 180.0) / size) + 1
+    return rows * cols
+
+
+def grid_cells_in_bbox(min_lat: float, min_lon: float, max_lat: float, max_lon: float, dim: float) -> List[Cell]:
+    """Grid cells covering a bounding box, row by row from the south-west corner"""
+    size = _cell_size(dim)
+    rows = range(math.floor((min_lat + 90.0) / size), math.floor((max_lat + 90.0) / size) + 1)
+    cols = range(math.floor((min_lon + 180.0) / size), math.floor((max_lon + 180.0) / size) + 1)
+    return [_cell_center(row, col, size) for row in rows for col in cols]
 
 
 class EarthAPI(NASAAPIBase):
     """NASA Earth Imagery API client"""
-    
+
     def __init__(self, api_key: str = "DEMO_KEY"):
         super().__init__(api_key)
         self.base_endpoint = f"{self.base_url}/planetary/earth"
-    
-    def get_imagery(self, lat: float, lon: float, date: Optional[str] = None, 
-                   dim: float = 0.15, cloud_score: bool = False) -> Dict[str, Any]:
+        self.cell_cache = _cell_cache
+
+    def get_imagery(self, lat: float, lon: float, date: Optional[str] = None,
+                   dim: float = 0.15, cloud_score: bool = False, snap: bool = True) -> Dict[str, Any]:
         """
         Get Earth imagery for specific coordinates
-        
+
         Args:
             lat: Latitude
-            lon: Longitude  
+            lon: Longitude
             date: Date in YYYY-MM-DD format (optional, defaults to most recent)
             dim: Width and height of image in degrees (0.025 to 0.25)
             cloud_score: Calculate cloud score for image
-            
+            snap: Request the image of the grid cell holding the point, so
+                nearby coordinates share cached responses
+
         Returns:
-            Dictionary containing Earth imagery data
-        """
-        if not (-90 <= lat <= 90):
-            return {"error": "Latitude must be between -90 and 90"}
-        if not (-180 <= lon <= 180):
-            return {"error": "Longitude must be between -180 and 180"}
-        if not (0.025 <= dim <= 0.25):
-            return {"error": "Dimension must be between 0.025 and 0.25"}
-        
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "dim": dim
-        }
+            Dictionary describing the image saved in the image store: path,
+            file URI, SHA-256, size in bytes and width/height in pixels
         
+        The PNG is streamed to the content-addressed image store rather
+        than returned, so identical images are kept on disk once.
+        """
+        error = self._validate(lat, lon, dim)
+        if error:
+            return error
+
         if date:
             try:
                 date = self._format_date(date)
-                params["date"] = date
             except ValueError as e:
                 return {"error": str(e)}
-        
-        if cloud_score:
-            params["cloud_score"] = "true"
-        
-        endpoint = f"{self.base_endpoint}/imagery"
-        return self._make_request(endpoint, params)
-    
-    def get_assets(self, lat: float, lon: float, date: Optional[str] = None, 
-                  dim: float = 0.15) -> Dict[str, Any]:
+
+        cell = grid_cell(lat, lon, dim) if snap else (lat, lon, dim)
+        return self._cell_request("imagery", cell, date, cloud_score)
+
+    def get_assets(self, lat: float, lon: float, date: Optional[str] = None,
+                  dim: float = 0.15, snap: bool = True) -> Dict[str, Any]:
         """
         Get available Earth imagery assets for specific coordinates
-        
+
         Args:
             lat: Latitude
             lon: Longitude
             date: Date in YYYY-MM-DD format (optional)
             dim: Width and height of search area in degrees
-            
+            snap: Search the grid cell holding the point, so nearby
+                coordinates share cached responses
+
         Returns:
             Dictionary containing available assets
         """
+        error = self._validate(lat, lon, dim)
+        if error:
+            return error
+
+        if date:
+            try:
+                date = self._format_date(date)
+            except ValueError as e:
+                return {"error": str(e)}
+
+        cell = grid_cell(lat, lon, dim) if snap else (lat, lon, dim)
+        return self._cell_request("assets", cell, date)
+
+    def get_batch(self, kind: str = "assets", points: Optional[Sequence[Sequence[float]]] = None,
+                  bbox: Optional[Sequence[float]] = None, date: Optional[str] = None, dim: float = 0.15,
+                  cloud_score: bool = False, max_requests: int = 50) -> Dict[str, Any]:
+        """
+        Get imagery or assets for many points, or for every cell of an area
+
+        Args:
+            kind: "assets" or "imagery"
+            points: [lat, lon] pairs (either points or bbox)
+            bbox: [min_lat, min_lon, max_lat, max_lon]
+            date: Date in YYYY-MM-DD format (optional)
+            dim: Cell size in degrees (0.025 to 0.25)
+            cloud_score: Calculate cloud score, for imagery
+            max_requests: Maximum number of upstream requests; the call is
+                refused if more uncached cells are needed
+
+        Returns:
+            Dictionary containing one result per distinct grid cell (with
+            the indexes of the points it covers), the number of cells served
+            from cache and fetched, and per-cell errors
+
+        Points falling in the same cell are requested once; uncached cells
+        are fetched concurrently through the shared rate limiter.
+        """
+        if kind not in ("assets", "imagery"):
+            return {"error": "kind must be one of assets, imagery"}
+        if (points is None) == (bbox is None):
+            return {"error": "Exactly one of points or bbox is required"}
+        if not (MIN_DIM <= dim <= MAX_DIM):
+            return {"error": f"Dimension must be between {MIN_DIM} and {MAX_DIM}"}
+        if date:
+            try:
+                date = self._format_date(date)
+            except ValueError as e:
+                return {"error": str(e)}
+
+        cells: Dict[Cell, List[int]] = {}
+        if points is not None:
+            for i, point in enumerate(points):
+                if len(point) != 2:
+                    return {"error": f"Point {i} must be a [lat, lon] pair"}
+                error = self._validate(point[0], point[1], dim)
+                if error:
+                    return {"error": f"Point {i}: {error['error']}"}
+                cells.setdefault(grid_cell(point[0], point[1], dim), []).append(i)
+        else:
+            if len(bbox) != 4:
+                return {"error": "bbox must be [min_lat, min_lon, max_lat, max_lon]"}
+            min_lat, min_lon, max_lat, max_lon = bbox
+            for lat, lon in ((min_lat, min_lon), (max_lat, max_lon)):
+                error = self._validate(lat, lon, dim)
+                if error:
+                    return error
+            if max_lat < min_lat or max_lon < min_lon:
+                return {"error": "bbox minimums must not exceed its maximums"}
+            count = grid_cell_count(min_lat, min_lon, max_lat, max_lon, dim)
+            if count > MAX_BATCH_CELLS:
+                return {"error": f"bbox covers {count} cells, more than {MAX_BATCH_CELLS}; "
+                                 f"narrow the area or increase dim"}
+            cells = {cell: [] for cell in grid_cells_in_bbox(min_lat, min_lon, max_lat, max_lon, dim)}
+
+        options = (date, cloud_score if kind == "imagery" else False)
+        cached = self.cell_cache.get_many((kind, cell) + options for cell in cells)
+        missing = [cell for cell in cells if (kind, cell) + options not in cached]
+        if len(missing) > max_requests:
+            return {"error": f"{len(missing)} uncached cells would need more than max_requests={max_requests} "
+                             f"requests; narrow the area, increase dim or raise max_requests"}
+
+        fetched = dict(zip(missing, self._map_concurrently(
+            lambda cell: self._cell_request(kind, cell, *options), missing
+        )))
+        results = []
+        errors = []
+        for cell, indexes in cells.items():
+            result = fetched[cell] if cell in fetched else cached[(kind, cell) + options]
+            entry = {"lat": cell[0], "lon": cell[1], "dim": cell[2]}
+            if points is not None:
+                entry["points"] = indexes
+            if "error" in result:
+                errors.append(dict(entry, error=result["error"]))
+            else:
+                results.append(dict(entry, result=result))
+        return {
+            "kind": kind,
+            "cells": len(cells),
+            "cached": len(cached),
+            "fetched": len(missing) - len(errors),
+            "results": results,
+            "errors": errors
+        }
+
+    def _validate(self, lat: float, lon: float, dim: float) -> Optional[Dict[str, Any]]:
+        """Error dictionary for out-of-range coordinates or dimension, or None"""
         if not (-90 <= lat <= 90):
             return {"error": "Latitude must be between -90 and 90"}
         if not (-180 <= lon <= 180):
             return {"error": "Longitude must be between -180 and 180"}
-        if not (0.025 <= dim <= 0.25):
-            return {"error": "Dimension must be between 0.025 and 0.25"}
-        
+        if not (MIN_DIM <= dim <= MAX_DIM):
+            return {"error": f"Dimension must be between {MIN_DIM} and {MAX_DIM}"}
+        return None
+
+    def _cell_request(self, kind: str, cell: Cell, date: Optional[str] = None,
+                      cloud_score: bool = False) -> Dict[str, Any]:
+        """Cached imagery or assets response of a cell"""
+        store = None
+        if kind == "imagery":
+            store = get_image_store()
+            if store is None:
+                return {"error": "Image store is not configured (set IMAGE_STORE_PATH)"}
+
+        key = (kind, cell, date, cloud_score)
+        result = self.cell_cache.get(key)
+        # Imagery entries point into the store; files removed since are fetched again
+        if result is not None and (store is None or os.path.exists(result.get("path", ""))):
+            return result
+
+        lat, lon, dim = cell
         params = {
             "lat": lat,
             "lon": lon,
             "dim": dim
         }
-        
         if date:
-            try:
-                date = self._format_date(date)
-                params["date"] = date
-            except ValueError as e:
-                return {"error": str(e)}
-        
-        endpoint = f"{self.base_endpoint}/assets"
-        return self._make_request(endpoint, params)
+            params["date"] = date
+        if cloud_score:
+            params["cloud_score"] = "true"
+
+        endpoint = f"{self.base_endpoint}/{kind}"
+        if store is not None:
+            result = self._make_binary_request(endpoint, params, store)
+        else:
+            result = self._make_request(endpoint, params)
+        if "error" not in result:
+            self.cell_cache.set(key, result)
+        return result
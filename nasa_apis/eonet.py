@@ -2,6 +2,8 @@
 EONET - Earth Observatory Natural Event Tracker API
 """
 from .base import NASAAPIBase
+from .eonet_store import get_eonet_store
+from .event_geometry import simplify_event
 from typing import Dict, Any, Optional, List
 
 
@@ -15,24 +17,58 @@ class EONETAPI(NASAAPIBase):
     
     def get_events(self, status: Optional[str] = None, limit: Optional[int] = None, 
                   days: Optional[int] = None, category: Optional[str] = None,
-                  source: Optional[str] = None, bbox: Optional[str] = None) -> Dict[str, Any]:
+                  source: Optional[str] = None, bbox: Optional[str] = None,
+                  tolerance: Optional[float] = None, min_interval_hours: Optional[float] = None,
+                  compact_geometry: bool = False, precision: Optional[int] = None) -> Dict[str, Any]:
         """
         Get natural events from EONET
         
         Args:
-            status: Event status ('open' or 'closed')
+            status: Event status ('open', 'closed' or 'all'; defaults to open)
             limit: Limit number of events returned
             days: Get events from last N days
-            category: Event category ID
-            source: Data source ID
-            bbox: Bounding box coordinates (minX,minY,maxX,maxY)
+            category: Event category ID (comma-separated for several)
+            source: Data source ID (comma-separated for several)
+            bbox: Bounding box as upper-left and lower-right corners (lon,lat,lon,lat)
+            tolerance: Simplify point tracks, dropping points within this many degrees of the line (optional)
+            min_interval_hours: Keep at most one track point per interval (optional)
+            compact_geometry: Encode point tracks as columns (offsets, coordinates, magnitudes)
+            precision: Decimal places of compact coordinates (optional)
             
         Returns:
             Dictionary containing natural events data
+        
+        When the local event store is configured and recently synced, the
+        query is answered from it instead of upstream. Filters always apply
+        to the full geometry; simplification only changes what is returned.
         """
+        result = self._get_events(status, limit, days, category, source, bbox)
+        if "error" in result or not (tolerance or min_interval_hours or compact_geometry):
+            return result
+        simplified = {key: value for key, value in result.items() if key != "events"}
+        simplified["events"] = [simplify_event(event, tolerance, min_interval_hours, compact_geometry, precision)
+                                for event in result.get("events", [])]
+        return simplified
+    
+    def _get_events(self, status: Optional[str], limit: Optional[int], days: Optional[int],
+                    category: Optional[str], source: Optional[str], bbox: Optional[str]) -> Dict[str, Any]:
+        """Events from the local store when it is fresh, otherwise from upstream"""
+        store = get_eonet_store()
+        if store is not None and store.is_fresh(2 * self.config.eonet_store_sync_interval_minutes * 60):
+            try:
+                events = store.query(status, limit, days, category, source, bbox)
+            except ValueError as e:
+                return {"error": str(e)}
+            return {
+                "title": "EONET Events",
+                "description": "Natural events from EONET.",
+                "link": f"{self.base_endpoint}/events",
+                "events": events
+            }
+        
         params = {}
         
-        if status and status.lower() in ['open', 'closed']:
+        if status and status.lower() in ['open', 'closed', 'all']:
             params['status'] = status.lower()
         if limit and isinstance(limit, int) and limit > 0:
             params['limit'] = limit
@@ -45,21 +81,46 @@ class EONETAPI(NASAAPIBase):
         if bbox:
             params['bbox'] = bbox
         
+        return self.fetch_events(params)
+    
+    def fetch_events(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Query the upstream events endpoint directly, bypassing the local store"""
         endpoint = f"{self.base_endpoint}/events"
         return self._make_external_request(endpoint, params)
     
-    def get_event_by_id(self, event_id: str) -> Dict[str, Any]:
+    def get_events_by_ids(self, event_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get several events by ID concurrently
+        
+        Args:
+            event_ids: EONET event IDs
+            
+        Returns:
+            Event details (or dictionaries with an "error" key), in the order of event_ids
+        """
+        return self._map_concurrently(self.get_event_by_id, event_ids)
+    
+    def get_event_by_id(self, event_id: str, tolerance: Optional[float] = None,
+                        min_interval_hours: Optional[float] = None, compact_geometry: bool = False,
+                        precision: Optional[int] = None) -> Dict[str, Any]:
         """
         Get specific event by ID
         
         Args:
             event_id: EONET event ID
+            tolerance: Simplify the point track, dropping points within this many degrees of the line (optional)
+            min_interval_hours: Keep at most one track point per interval (optional)
+            compact_geometry: Encode the point track as columns (offsets, coordinates, magnitudes)
+            precision: Decimal places of compact coordinates (optional)
             
         Returns:
             Dictionary containing event details
         """
         endpoint = f"{self.base_endpoint}/events/{event_id}"
-        return self._make_external_request(endpoint)
+        result = self._make_external_request(endpoint)
+        if "error" in result or not (tolerance or min_interval_hours or compact_geometry):
+            return result
+        return simplify_event(result, tolerance, min_interval_hours, compact_geometry, precision)
     
     def get_categories(self) -> Dict[str, Any]:
         """
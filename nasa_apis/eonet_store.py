@@ -0,0 +1,315 @@
+"""
+Local EONET event store with spatial and time indexes
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from config import get_config
+
+
+logger = logging.getLogger(__name__)
+
+# Width and height of the spatial grid cells, in degrees
+GRID_DEGREES = 2.0
+
+Cell = Tuple[int, int]
+
+
+def _timestamp(value: Any) -> float:
+    """Epoch seconds of an EONET date such as 2024-01-05T12:00:00Z, or -inf"""
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return -math.inf
+
+
+def _vertices(geometry: Dict[str, Any]) -> List[Tuple[float, float]]:
+    """(lon, lat) points of a Point or Polygon geometry"""
+    coordinates = geometry.get('coordinates') or []
+    if geometry.get('type') == 'Point':
+        return [(coordinates[0], coordinates[1])] if len(coordinates) >= 2 else []
+    points = []
+    stack = [coordinates]
+    while stack:
+        item = stack.pop()
+        if len(item) >= 2 and all(isinstance(value, (int, float)) for value in item[:2]):
+            points.append((item[0], item[1]))
+        else:
+            stack.extend(item)
+    return points
+
+
+def _cell(lon: float, lat: float) -> Cell:
+    return math.floor(lon / GRID_DEGREES), math.floor(lat / GRID_DEGREES)
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    (min lon, min lat, max lon, max lat) of an EONET bbox parameter
+
+    EONET takes the upper-left and lower-right corners as lon,lat,lon,lat;
+    the corners are normalized so either corner order is accepted.
+    """
+    values = [float(value) for value in bbox.split(',')]
+    if len(values) != 4:
+        raise ValueError("bbox must have four comma-separated numbers")
+    lon1, lat1, lon2, lat2 = values
+    return min(lon1, lon2), min(lat1, lat2), max(lon1, lon2), max(lat1, lat2)
+
+
+class EventStore:
+    """
+    EONET events kept locally and queried through in-memory indexes
+
+    Events are stored as returned by the API and indexed by status,
+    category, source, a GRID_DEGREES grid over all geometry points and
+    the time of their latest geometry. Queries follow the API's filter
+    semantics, so they return the events upstream would. The store is
+    persisted as a JSON snapshot at path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.synced_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._open: Set[str] = set()
+        self._by_category: Dict[str, Set[str]] = {}
+        self._by_source: Dict[str, Set[str]] = {}
+        self._by_cell: Dict[Cell, Set[str]] = {}
+        # (latest geometry timestamp, event id), sorted
+        self._by_time: List[Tuple[float, str]] = []
+        self._latest: Dict[str, float] = {}
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable EONET store %s: %s", self.path, e)
+            return
+        self.upsert(snapshot.get('events', []))
+        self.synced_at = snapshot.get('synced_at')
+
+    def _save(self) -> None:
+        with self._lock:
+            snapshot = {'synced_at': self.synced_at, 'events': list(self._events.values())}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def _index_keys(self, event: Dict[str, Any]) -> Tuple[Set[str], Set[str], Set[Cell]]:
+        categories = {str(category.get('id')) for category in event.get('categories') or []}
+        sources = {str(source.get('id')) for source in event.get('sources') or []}
+        cells = {_cell(lon, lat) for geometry in event.get('geometry') or [] for lon, lat in _vertices(geometry)}
+        return categories, sources, cells
+
+    def _remove(self, event_id: str) -> None:
+        event = self._events.pop(event_id, None)
+        if event is None:
+            return
+        categories, sources, cells = self._index_keys(event)
+        for index, keys in ((self._by_category, categories), (self._by_source, sources), (self._by_cell, cells)):
+            for key in keys:
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(event_id)
+                    if not ids:
+                        del index[key]
+        self._open.discard(event_id)
+        latest = self._latest.pop(event_id)
+        position = bisect_left(self._by_time, (latest, event_id))
+        del self._by_time[position]
+
+    def upsert(self, events: Iterable[Dict[str, Any]]) -> int:
+        """Add or replace events by ID; returns the number of events written"""
+        count = 0
+        with self._lock:
+            for event in events:
+                event_id = event.get('id')
+                if not event_id:
+                    continue
+                self._remove(event_id)
+                self._events[event_id] = event
+                categories, sources, cells = self._index_keys(event)
+                for index, keys in ((self._by_category, categories), (self._by_source, sources),
+                                    (self._by_cell, cells)):
+                    for key in keys:
+                        index.setdefault(key, set()).add(event_id)
+                if not event.get('closed'):
+                    self._open.add(event_id)
+                latest = max((_timestamp(geometry.get('date')) for geometry in event.get('geometry') or []),
+                             default=-math.inf)
+                self._latest[event_id] = latest
+                insort(self._by_time, (latest, event_id))
+                count += 1
+        return count
+
+    def open_ids(self) -> Set[str]:
+        with self._lock:
+            return set(self._open)
+
+    def is_fresh(self, max_age: float) -> bool:
+        """Whether the store has been synced within max_age seconds"""
+        return self.synced_at is not None and time.time() - self.synced_at <= max_age
+
+    def query(self, status: Optional[str] = None, limit: Optional[int] = None, days: Optional[int] = None,
+              category: Optional[str] = None, source: Optional[str] = None,
+              bbox: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Events matching EONET's events filters, most recent first
+
+        Args:
+            status: "open" (default), "closed" or "all"
+            limit: Maximum number of events
+            days: Only events with a geometry within the last N days
+            category: Comma-separated category IDs; events in any of them
+            source: Comma-separated source IDs; events from any of them
+            bbox: lon,lat,lon,lat corners; events with a geometry point inside
+
+        Raises:
+            ValueError: If bbox is malformed
+        """
+        box = parse_bbox(bbox) if bbox else None
+        status = status.lower() if status and status.lower() in ('open', 'closed', 'all') else 'open'
+        with self._lock:
+            candidates: Optional[Set[str]] = None
+
+            def narrow(ids: Set[str]) -> None:
+                nonlocal candidates
+                candidates = ids if candidates is None else candidates & ids
+
+            if category:
+                narrow(set().union(*(self._by_category.get(key.strip(), set()) for key in category.split(','))))
+            if source:
+                narrow(set().union(*(self._by_source.get(key.strip(), set()) for key in source.split(','))))
+            if days and isinstance(days, int) and days > 0:
+                start = bisect_left(self._by_time, (time.time() - days * 86400, ''))
+                narrow({event_id for _, event_id in self._by_time[start:]})
+            if box is not None:
+                min_lon, min_lat, max_lon, max_lat = box
+                (first_col, first_row), (last_col, last_row) = _cell(min_lon, min_lat), _cell(max_lon, max_lat)
+                cell_ids = set()
+                for col in range(first_col, last_col + 1):
+                    for row in range(first_row, last_row + 1):
+                        cell_ids |= self._by_cell.get((col, row), set())
+                narrow({event_id for event_id in cell_ids
+                        if any(min_lon <= lon <= max_lon and min_lat <= lat <= max_lat
+                               for geometry in self._events[event_id].get('geometry') or []
+                               for lon, lat in _vertices(geometry))})
+            if status == 'open':
+                narrow(self._open)
+            elif status == 'closed':
+                narrow(set(self._events) - self._open)
+            if candidates is None:
+                candidates = set(self._events)
+
+            ordered = sorted(candidates, key=lambda event_id: (self._latest[event_id], event_id), reverse=True)
+            if limit and isinstance(limit, int) and limit > 0:
+                ordered = ordered[:limit]
+            return [self._events[event_id] for event_id in ordered]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'path': self.path,
+                'events': len(self._events),
+                'open': len(self._open),
+                'categories': {key: len(ids) for key, ids in sorted(self._by_category.items())},
+                'grid_cells': len(self._by_cell),
+                'synced_at': datetime.fromtimestamp(self.synced_at).isoformat() if self.synced_at else None
+            }
+
+    def sync(self, client, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the store up to date with EONET
+
+        The first sync (or full) loads every event. Later syncs fetch the
+        currently open events and the events closed since the last sync,
+        merge them by ID, and look up any event that was open here but is
+        no longer open upstream, so it is closed out with its final state.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return {"error": "A sync of the EONET event store is already running"}
+        try:
+            started = time.time()
+            full = full or self.synced_at is None
+            if full:
+                result = client.fetch_events({'status': 'all'})
+                if "error" in result:
+                    return {"error": result["error"]}
+                with self._lock:
+                    for event_id in list(self._events):
+                        self._remove(event_id)
+                    updated = self.upsert(result.get('events', []))
+                closed_out = 0
+            else:
+                days = math.ceil((started - self.synced_at) / 86400) + 1
+                opened = client.fetch_events({'status': 'open'})
+                if "error" in opened:
+                    return {"error": opened["error"]}
+                closed = client.fetch_events({'status': 'closed', 'days': days})
+                if "error" in closed:
+                    return {"error": closed["error"]}
+                events = opened.get('events', []) + closed.get('events', [])
+                seen = {event.get('id') for event in events}
+                vanished = sorted(self.open_ids() - seen)
+                lookups = client.get_events_by_ids(vanished)
+                failed = [event_id for event_id, event in zip(vanished, lookups) if "error" in event]
+                if failed:
+                    logger.warning("Could not close out %d EONET events: %s", len(failed), ', '.join(failed[:10]))
+                closed_events = [event for event in lookups if "error" not in event]
+                updated = self.upsert(events + closed_events)
+                closed_out = len(closed_events)
+            self.synced_at = started
+            self._save()
+            return {"full": full, "updated": updated, "closed_out": closed_out, **self.status()}
+        finally:
+            self._sync_lock.release()
+
+    def start_periodic_sync(self, client, interval_minutes: float = 30) -> threading.Thread:
+        """Run sync now and then every interval_minutes on a daemon thread"""
+        def run():
+            while True:
+                try:
+                    result = self.sync(client)
+                    if "error" in result:
+                        logger.warning("EONET event store sync stopped: %s", result["error"])
+                except Exception as e:
+                    logger.error("EONET event store sync failed: %s", e)
+                time.sleep(interval_minutes * 60)
+
+        thread = threading.Thread(target=run, name='nasa-eonet-store-sync', daemon=True)
+        thread.start()
+        return thread
+
+
+_store: Optional[EventStore] = None
+_store_lock = threading.Lock()
+
+
+def get_eonet_store() -> Optional[EventStore]:
+    """Get the local EONET event store, or None if EONET_STORE_PATH is not set"""
+    global _store
+    path = get_config().get_eonet_store_config()['path']
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = EventStore(path)
+        return _store
@@ -2,7 +2,93 @@
 EPIC - Earth Polychromatic Imaging Camera API
 """
 from .base import NASAAPIBase
-from typing import Dict, Any, Optional
+from .cache import NO_EXPIRY, create_cache
+from .image_store import get_image_store
+from .rate_limiter import ByteRateLimiter
+from typing import Dict, Any, List, Optional
+from bisect import bisect_left, bisect_right
+from datetime import date as Date, datetime
+import time
+
+
+COLLECTIONS = ("natural", "enhanced")
+
+# Archive formats: directory and file extension. Besides the full-resolution
+# PNG the archive publishes a 1024px JPEG and a thumbnail of every frame.
+ARCHIVE_FORMATS = {
+    "png": ("png", "png"),
+    "jpg": ("jpg", "jpg"),
+    "thumbs": ("thumbs", "jpg"),
+}
+
+# Longest date range a single range or download call accepts
+MAX_RANGE_DAYS = 31
+
+# Missing days between the indexed and the newest date that are probed one
+# by one on refresh; longer gaps reload the full date list
+MAX_TAIL_PROBE_DAYS = 14
+
+# Date index per collection. Always enabled: there are two small entries and
+# they are refreshed in place rather than expired.
+_date_index_cache = create_cache('epic_date_index', ttl=NO_EXPIRY, max_entries=len(COLLECTIONS), enabled=True)
+
+
+class DateIndex:
+    """
+    Sorted dates with imagery in an EPIC collection
+
+    Dates are YYYY-MM-DD strings, whose string order is date order, so
+    lookups bisect the list directly.
+    """
+
+    def __init__(self, dates: List[str]):
+        self.dates = sorted(set(dates))
+        self.checked_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def add(self, dates: List[str]) -> None:
+        # Swap in a new list so concurrent readers never see a partial update
+        self.dates = sorted(set(self.dates).union(dates))
+        self.checked_at = time.monotonic()
+
+    def touch(self) -> None:
+        """Mark the index as checked without changing its dates"""
+        self.checked_at = time.monotonic()
+
+    def nearest(self, date: str, direction: str = "nearest") -> Optional[str]:
+        """
+        Available date closest to date
+
+        Args:
+            date: Date in YYYY-MM-DD format
+            direction: "nearest", "before" (on or before date) or "after"
+                (on or after date); ties of "nearest" go to the earlier date
+
+        Returns:
+            The available date, or None if there is none in that direction
+        """
+        dates = self.dates
+        position = bisect_left(dates, date)
+        if position < len(dates) and dates[position] == date:
+            return date
+        before = dates[position - 1] if position > 0 else None
+        after = dates[position] if position < len(dates) else None
+        if direction == "before":
+            return before
+        if direction == "after":
+            return after
+        if before is None or after is None:
+            return before or after
+        target = Date.fromisoformat(date)
+        if (target - Date.fromisoformat(before)) <= (Date.fromisoformat(after) - target):
+            return before
+        return after
+
+    def between(self, start: str, end: str) -> List[str]:
+        """Available dates from start to end inclusive"""
+        return self.dates[bisect_left(self.dates, start):bisect_right(self.dates, end)]
 
 
 class EPICAPI(NASAAPIBase):
@@ -54,6 +140,320 @@ class EPICAPI(NASAAPIBase):
         
         return self._make_request(endpoint)
     
+    def get_images(self, collection: str = "natural", date: Optional[str] = None, nearest: bool = False) -> Any:
+        """
+        Get image metadata of a collection
+
+        Args:
+            collection: "natural" or "enhanced"
+            date: Date in YYYY-MM-DD format (optional, defaults to most recent available)
+            nearest: Use the available date closest to date when it has no imagery
+
+        Returns:
+            List of image metadata, or a dictionary with an "error" key. With
+            nearest, a dictionary with the requested date, the date used and
+            its images.
+        """
+        if nearest and date:
+            resolved = self.resolve_date(collection, date)
+            if "error" in resolved:
+                return resolved
+            images = self.get_images(collection, resolved["date"])
+            if isinstance(images, dict):
+                return images
+            return {"requested_date": date, "date": resolved["date"], "images": images}
+        if collection == "natural":
+            return self.get_natural_images(date)
+        if collection == "enhanced":
+            return self.get_enhanced_images(date)
+        return {"error": f"Invalid collection. Must be one of: {', '.join(COLLECTIONS)}"}
+
+    def download_images(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                        collection: str = "natural", derivatives: Optional[List[str]] = None,
+                        max_bytes_per_second: Optional[int] = None, max_images: int = 100) -> Dict[str, Any]:
+        """
+        Download every frame of a date or date range to the image store
+
+        Args:
+            start_date: First date in YYYY-MM-DD format (optional, defaults
+                to the most recent available date)
+            end_date: Last date (optional, defaults to start_date)
+            collection: "natural" or "enhanced"
+            derivatives: Reduced-size versions to download as well: "jpg"
+                (1024px JPEG) and/or "thumbs" (optional)
+            max_bytes_per_second: Combined download rate cap (optional,
+                defaults to DOWNLOAD_MAX_BYTES_PER_SECOND; 0 for none)
+            max_images: Maximum number of files to download in this call
+
+        Returns:
+            Dictionary containing the stored file of every frame and format,
+            counts of downloaded, already present and still pending files,
+            and per-date or per-file errors
+
+        Only dates in the collection's date index are requested. Files are
+        streamed to the content-addressed image store and saved
+        under the ref epic/<collection>/<format>/<image>. Files already
+        stored are skipped, so a call cut short by max_images, an error or
+        a restart resumes where it stopped when made again.
+        """
+        if collection not in COLLECTIONS:
+            return {"error": f"Invalid collection. Must be one of: {', '.join(COLLECTIONS)}"}
+        formats = ["png"] + [fmt for fmt in derivatives or [] if fmt != "png"]
+        invalid = [fmt for fmt in formats if fmt not in ARCHIVE_FORMATS]
+        if invalid:
+            return {"error": f"Invalid derivatives: {', '.join(invalid)}. Must be jpg or thumbs"}
+        store = get_image_store()
+        if store is None:
+            return {"error": "Image store is not configured (set IMAGE_STORE_PATH)"}
+
+        if start_date:
+            metadata = self.get_images_in_range(collection, start_date, end_date or start_date)
+            if "error" in metadata:
+                return metadata
+            dates = metadata["dates"]
+            errors = metadata["errors"]
+            image_lists = metadata["images"].values()
+        else:
+            latest = self.get_images(collection)
+            if isinstance(latest, dict):
+                return latest
+            dates = 1
+            errors = []
+            image_lists = [latest]
+
+        frames = [image for images in image_lists for image in images if image.get("image") and image.get("date")]
+
+        results = []
+        pending = []
+        for frame in frames:
+            for fmt in formats:
+                entry = {"image": frame["image"], "date": frame["date"][:10], "format": fmt}
+                record = store.get_ref(f"epic/{collection}/{fmt}/{frame['image']}")
+                if record is not None:
+                    results.append(dict(entry, status="present", **self._file_fields(record)))
+                else:
+                    pending.append(entry)
+
+        if max_bytes_per_second is None:
+            max_bytes_per_second = self.config.download_max_bytes_per_second
+        limiter = ByteRateLimiter(max_bytes_per_second) if max_bytes_per_second > 0 else None
+
+        def download(entry: Dict[str, Any]) -> Dict[str, Any]:
+            directory, extension = ARCHIVE_FORMATS[entry["format"]]
+            url = (f"{self.base_url}/EPIC/archive/{collection}/{entry['date'].replace('-', '/')}/"
+                   f"{directory}/{entry['image']}.{extension}")
+            return self._make_binary_request(url, {}, store, f"epic/{collection}/{entry['format']}/{entry['image']}",
+                                             limiter)
+
+        batch, pending = pending[:max_images], pending[max_images:]
+        downloaded = 0
+        bytes_downloaded = 0
+        for entry, record in zip(batch, self._map_concurrently(download, batch)):
+            if "error" in record or "sha256" not in record:
+                errors.append(dict(entry, error=record.get("error", "Unexpected JSON response")))
+                continue
+            downloaded += 1
+            bytes_downloaded += record["bytes"]
+            results.append(dict(entry, status="downloaded", **self._file_fields(record)))
+
+        results.sort(key=lambda entry: (entry["date"], entry["image"], formats.index(entry["format"])))
+        return {
+            "collection": collection,
+            "dates": dates,
+            "frames": len(frames),
+            "downloaded": downloaded,
+            "present": len(results) - downloaded,
+            "pending": len(pending),
+            "bytes_downloaded": bytes_downloaded,
+            "errors": errors,
+            "images": results
+        }
+
+    def get_date_index(self, collection: str = "natural", refresh: bool = False) -> Any:
+        """
+        Cached index of the dates with imagery in a collection
+
+        The full date list is loaded once. Afterwards, every
+        EPIC_DATES_REFRESH_SECONDS the newest date is checked with one
+        request, and only the days between it and the last indexed date are
+        probed; the full list is reloaded only for long gaps or on refresh.
+
+        Returns:
+            DateIndex, or a dictionary with an "error" key
+        """
+        if collection not in COLLECTIONS:
+            return {"error": f"Invalid collection. Must be one of: {', '.join(COLLECTIONS)}"}
+
+        index = _date_index_cache.get(collection)
+        if index is None or refresh or not len(index):
+            return self._load_date_index(collection)
+        if time.monotonic() - index.checked_at >= self.config.epic_dates_refresh_seconds:
+            return self._refresh_date_index(collection, index)
+        return index
+
+    def resolve_date(self, collection: str, date: str, direction: str = "nearest") -> Dict[str, Any]:
+        """
+        Resolve a date to an available date of a collection
+
+        Args:
+            collection: "natural" or "enhanced"
+            date: Date in YYYY-MM-DD format
+            direction: "nearest", "before" or "after"
+
+        Returns:
+            Dictionary containing the requested and resolved date, whether
+            they are the same and the offset in days
+        """
+        try:
+            date = self._format_date(date)
+        except ValueError as e:
+            return {"error": str(e)}
+        if direction not in ("nearest", "before", "after"):
+            return {"error": "direction must be one of nearest, before, after"}
+        index = self.get_date_index(collection)
+        if isinstance(index, dict):
+            return index
+
+        resolved = index.nearest(date, direction)
+        if resolved is None:
+            return {"error": f"No {collection} imagery {direction} {date}"}
+        return {
+            "collection": collection,
+            "requested_date": date,
+            "date": resolved,
+            "exact": resolved == date,
+            "offset_days": (Date.fromisoformat(resolved) - Date.fromisoformat(date)).days
+        }
+
+    def get_available_dates(self, collection: str = "natural", start_date: Optional[str] = None,
+                            end_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the dates with imagery in a collection
+
+        Args:
+            collection: "natural" or "enhanced"
+            start_date: First date in YYYY-MM-DD format (optional)
+            end_date: Last date in YYYY-MM-DD format (optional)
+
+        Returns:
+            Dictionary containing the first and last available dates and the
+            available dates within [start_date, end_date]
+        """
+        for value in (start_date, end_date):
+            if value:
+                try:
+                    self._format_date(value)
+                except ValueError as e:
+                    return {"error": str(e)}
+        index = self.get_date_index(collection)
+        if isinstance(index, dict):
+            return index
+
+        dates = index.between(start_date or "", end_date or "9999-12-31")
+        return {
+            "collection": collection,
+            "total": len(index),
+            "first": index.dates[0],
+            "last": index.dates[-1],
+            "count": len(dates),
+            "dates": dates
+        }
+
+    def get_images_in_range(self, collection: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        """
+        Get image metadata of every available date in a window
+
+        Args:
+            collection: "natural" or "enhanced"
+            start_date: First date in YYYY-MM-DD format
+            end_date: Last date in YYYY-MM-DD format (the window spans at most 31 days)
+
+        Returns:
+            Dictionary containing the image metadata per available date and
+            per-date errors
+
+        Only dates in the date index are requested, concurrently.
+        """
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return {"error": "Date must be in YYYY-MM-DD format"}
+        if end < start:
+            return {"error": "end_date must not be before start_date"}
+        if (end - start).days >= MAX_RANGE_DAYS:
+            return {"error": f"Date range must not exceed {MAX_RANGE_DAYS} days"}
+        index = self.get_date_index(collection)
+        if isinstance(index, dict):
+            return index
+
+        dates = index.between(start.isoformat(), end.isoformat())
+        images = {}
+        errors = []
+        for date, result in zip(dates, self._map_concurrently(lambda date: self.get_images(collection, date), dates)):
+            if isinstance(result, dict):
+                errors.append({"date": date, "error": result.get("error", "Unexpected response")})
+            else:
+                images[date] = result
+        return {
+            "collection": collection,
+            "dates": len(dates),
+            "images_total": sum(len(items) for items in images.values()),
+            "images": images,
+            "errors": errors
+        }
+
+    def _load_date_index(self, collection: str) -> Any:
+        """Build the date index of a collection from its full date list"""
+        raw = self.get_all_natural_dates() if collection == "natural" else self.get_all_enhanced_dates()
+        if isinstance(raw, dict):
+            return raw if "error" in raw else {"error": "Unexpected response for the date list"}
+        dates = (entry.get("date") if isinstance(entry, dict) else entry for entry in raw)
+        index = DateIndex([date[:10] for date in dates if isinstance(date, str) and date])
+        if not len(index):
+            return {"error": f"No {collection} imagery dates available"}
+        _date_index_cache.set(collection, index)
+        return index
+
+    def _refresh_date_index(self, collection: str, index: DateIndex) -> DateIndex:
+        """
+        Add dates newer than the last indexed one and return the index to use
+
+        If anything fails the current index is kept and marked as checked,
+        so an upstream outage costs one attempt per refresh interval rather
+        than one per call.
+        """
+        latest = self.get_images(collection)
+        if isinstance(latest, dict) or not latest or not latest[0].get("date"):
+            self.logger.warning("Could not check for new %s EPIC dates: %s", collection,
+                                latest.get("error") if isinstance(latest, dict) else "no images")
+            index.touch()
+            return index
+
+        newest = latest[0]["date"][:10]
+        last = index.dates[-1]
+        if newest <= last:
+            index.touch()
+            return index
+        gap = self._date_range(Date.fromisoformat(last), Date.fromisoformat(newest))[1:-1]
+        if len(gap) > MAX_TAIL_PROBE_DAYS:
+            reloaded = self._load_date_index(collection)
+            if isinstance(reloaded, dict):
+                self.logger.warning("Could not reload %s EPIC dates: %s", collection, reloaded.get("error"))
+                index.touch()
+                return index
+            return reloaded
+        probes = self._map_concurrently(lambda date: self.get_images(collection, date), gap)
+        if any(isinstance(result, dict) for result in probes):
+            # Keep the index as it is; the next refresh tries again
+            index.touch()
+            return index
+        index.add([newest] + [date for date, result in zip(gap, probes) if result])
+        return index
+
+    def _file_fields(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: record[key] for key in ("path", "uri", "sha256", "bytes", "width", "height")}
+
     def get_all_natural_dates(self) -> Dict[str, Any]:
         """
         Get all available dates for natural color images
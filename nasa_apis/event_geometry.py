@@ -0,0 +1,147 @@
+"""
+Simplification and compact encoding of EONET event geometry
+"""
+import math
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def _segment_distance(point: Tuple[float, float], start: Tuple[float, float], end: Tuple[float, float]) -> float:
+    """Distance in degrees from point to the segment start-end"""
+    (x, y), (x1, y1), (x2, y2) = point, start, end
+    dx, dy = x2 - x1, y2 - y1
+    length = dx * dx + dy * dy
+    if length == 0:
+        return math.hypot(x - x1, y - y1)
+    t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / length))
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+
+def simplify_line(points: List[Tuple[float, float]], tolerance: float) -> List[int]:
+    """
+    Indexes of the points kept by Douglas-Peucker line simplification
+
+    Points closer than tolerance (in degrees) to the simplified line are
+    dropped; the first and last points are always kept.
+    """
+    if len(points) <= 2 or tolerance <= 0:
+        return list(range(len(points)))
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, distance = first, 0.0
+        for i in range(first + 1, last):
+            d = _segment_distance(points[i], points[first], points[last])
+            if d > distance:
+                farthest, distance = i, d
+        if distance > tolerance:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [i for i, kept in enumerate(keep) if kept]
+
+
+def downsample_times(times: List[Optional[float]], min_interval_hours: float) -> List[int]:
+    """Indexes of points at least min_interval_hours after the previously kept one, plus the last point"""
+    if len(times) <= 2 or min_interval_hours <= 0:
+        return list(range(len(times)))
+    interval = min_interval_hours * 3600
+    kept = [0]
+    for i in range(1, len(times) - 1):
+        if times[i] is None or times[kept[-1]] is None or times[i] - times[kept[-1]] >= interval:
+            kept.append(i)
+    kept.append(len(times) - 1)
+    return kept
+
+
+def encode_track(geometry: List[Dict[str, Any]], precision: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Columnar encoding of Point geometries
+
+    Dates become second offsets from the first date, coordinates become
+    [lon, lat] pairs and magnitudes a parallel list, with the unit given
+    once when all points share it.
+    """
+    times = [_timestamp(point.get('date')) for point in geometry]
+    first = next((i for i, t in enumerate(times) if t is not None), None)
+    start = None if first is None else times[first]
+    coordinates = []
+    for point in geometry:
+        lon, lat = point['coordinates'][:2]
+        if precision is not None:
+            lon, lat = round(lon, precision), round(lat, precision)
+        coordinates.append([lon, lat])
+    track = {
+        'encoding': 'columns',
+        'start': None if first is None else geometry[first].get('date'),
+        'offsets_s': [None if t is None or start is None else int(t - start) for t in times],
+        'coordinates': coordinates
+    }
+    magnitudes = [point.get('magnitudeValue') for point in geometry]
+    if any(value is not None for value in magnitudes):
+        units = {point.get('magnitudeUnit') for point in geometry if point.get('magnitudeValue') is not None}
+        track['magnitude_values'] = magnitudes
+        track['magnitude_unit'] = units.pop() if len(units) == 1 else None
+        if track['magnitude_unit'] is None:
+            track['magnitude_units'] = [point.get('magnitudeUnit') for point in geometry]
+    return track
+
+
+def simplify_event(event: Dict[str, Any], tolerance: Optional[float] = None,
+                   min_interval_hours: Optional[float] = None, compact: bool = False,
+                   precision: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Copy of an event with a reduced geometry track
+
+    Args:
+        event: EONET event as returned by the API
+        tolerance: Line simplification tolerance in degrees (optional)
+        min_interval_hours: Keep at most one point per interval (optional)
+        compact: Replace the Point geometries by a columnar "track"
+        precision: Decimal places kept in compact coordinates (optional)
+
+    Returns:
+        The event with its Point geometries reduced (polygons are kept as
+        they are) and a "simplification" entry with the point counts
+
+    Time downsampling runs first, then line simplification over the
+    remaining points in time order.
+    """
+    geometry = event.get('geometry') or []
+    points, others = [], []
+    for item in geometry:
+        if item.get('type') == 'Point' and len(item.get('coordinates') or []) >= 2:
+            points.append(item)
+        else:
+            others.append(item)
+    points.sort(key=lambda item: _timestamp(item.get('date')) or 0.0)
+
+    kept = points
+    if min_interval_hours:
+        kept = [kept[i] for i in downsample_times([_timestamp(item.get('date')) for item in kept], min_interval_hours)]
+    if tolerance:
+        kept = [kept[i] for i in simplify_line([tuple(item['coordinates'][:2]) for item in kept], tolerance)]
+
+    simplified = {key: value for key, value in event.items() if key != 'geometry'}
+    if compact:
+        simplified['geometry'] = others
+        simplified['track'] = encode_track(kept, precision)
+    else:
+        kept_ids = {id(item) for item in kept + others}
+        simplified['geometry'] = [item for item in geometry if id(item) in kept_ids]
+    simplified['simplification'] = {
+        'points': len(points),
+        'kept': len(kept),
+        'dropped': len(points) - len(kept),
+        'other_geometries': len(others)
+    }
+    return simplified
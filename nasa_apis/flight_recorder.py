@@ -0,0 +1,147 @@
+"""
+Flight recorder: bounded ring buffer of recent upstream calls
+"""
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from config import get_config
+from .redaction import redact_text
+from .transport import PHASES
+
+
+logger = logging.getLogger(__name__)
+
+
+class FlightRecorder:
+    """
+    Keeps the last N upstream requests in memory
+
+    Recording only appends a small dict to a bounded deque; entries are
+    converted to their JSON form when dumped.
+    """
+
+    def __init__(self, size: int = 256, slow_threshold: float = 30.0,
+                 dump_dir: str = 'flight_recorder', min_dump_interval: float = 60.0):
+        self.enabled = size > 0
+        self.slow_threshold = slow_threshold
+        self.dump_dir = dump_dir
+        self.min_dump_interval = min_dump_interval
+        self._entries: deque = deque(maxlen=max(size, 1))
+        self._lock = threading.Lock()
+        self._last_auto_dump = 0.0
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Add an entry, dumping the buffer in the background if the request was slow"""
+        with self._lock:
+            self._entries.append(entry)
+
+        if self.slow_threshold > 0 and entry['duration'] >= self.slow_threshold:
+            now = time.monotonic()
+            if now - self._last_auto_dump >= self.min_dump_interval:
+                self._last_auto_dump = now
+                reason = f"slow request to {entry['endpoint']} ({entry['duration']:.1f}s)"
+                self.dump_in_background(reason)
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get recorded entries, oldest first"""
+        with self._lock:
+            entries = list(self._entries)
+        if limit is not None:
+            entries = entries[-limit:] if limit > 0 else []
+        return [self._format_entry(entry) for entry in entries]
+
+    def _format_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        attempts = []
+        for number, timing in enumerate(entry['attempts'], 1):
+            attempt = {
+                'attempt': number,
+                'status': timing['status'],
+                'error': redact_text(timing['error']) if timing['error'] else None,
+                'reused_connection': timing['reused_connection'],
+                'bytes': timing['bytes'],
+                'elapsed_ms': round(timing['elapsed'] * 1000, 3)
+            }
+            for phase in PHASES:
+                attempt[f"{phase}_ms"] = round(timing[phase] * 1000, 3)
+            attempts.append(attempt)
+
+        return {
+            'time': datetime.fromtimestamp(entry['started'], timezone.utc).isoformat(),
+            'tool': entry['tool'],
+            'trace_id': entry['trace_id'],
+            'client': entry['client'],
+            'endpoint': entry['endpoint'],
+            'params': entry['params'],
+            'attempts': attempts,
+            'status': attempts[-1]['status'] if attempts else None,
+            'bytes': sum(attempt['bytes'] for attempt in attempts),
+            'duration_ms': round(entry['duration'] * 1000, 3),
+            'error': redact_text(entry['error']) if entry['error'] else None
+        }
+
+    def dump(self, reason: str = 'on demand') -> str:
+        """Write all entries to a JSON file in the dump directory and return its path"""
+        entries = self.entries()
+        os.makedirs(self.dump_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        path = os.path.join(self.dump_dir, f"flight_{stamp}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'reason': reason, 'dumped_at': stamp, 'entries': entries}, f, indent=2, default=str)
+        logger.warning("Flight recorder dumped %d entries to %s (%s)", len(entries), path, reason)
+        return path
+
+    def dump_in_background(self, reason: str) -> None:
+        """Dump from a separate thread so the caller is never blocked on file I/O"""
+        thread = threading.Thread(target=self._safe_dump, args=(reason,), name='nasa-flight-dump', daemon=True)
+        thread.start()
+
+    def _safe_dump(self, reason: str) -> None:
+        try:
+            self.dump(reason)
+        except Exception as e:
+            logger.error("Flight recorder dump failed: %s", e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _create_flight_recorder() -> FlightRecorder:
+    recorder_config = get_config().get_flight_recorder_config()
+    return FlightRecorder(recorder_config['size'], recorder_config['slow_threshold'],
+                          recorder_config['dump_dir'])
+
+
+# Global flight recorder instance
+flight_recorder = _create_flight_recorder()
+
+
+def get_flight_recorder() -> FlightRecorder:
+    """Get global flight recorder instance"""
+    return flight_recorder
+
+
+def install_signal_handler(signum: Optional[int] = None) -> bool:
+    """
+    Dump the flight recorder when the process receives signum (SIGUSR1 by default)
+
+    Must be called from the main thread. Returns False on platforms without
+    the signal.
+    """
+    if signum is None:
+        signum = getattr(signal, 'SIGUSR1', None)
+    if signum is None:
+        return False
+
+    def handle(received, frame):
+        flight_recorder.dump_in_background(f"signal {received}")
+
+    signal.signal(signum, handle)
+    return True
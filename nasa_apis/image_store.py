@@ -0,0 +1,169 @@
+"""
+Content-addressed on-disk store for downloaded images
+"""
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from config import get_config
+
+
+# File extensions by content type; anything else is stored as .bin
+_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/gif': '.gif',
+}
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def image_dimensions(head: bytes) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Width and height read from the first bytes of an image
+
+    PNG and GIF keep their size at a fixed offset of the header; other
+    formats (and truncated headers) give (None, None).
+    """
+    if head.startswith(_PNG_SIGNATURE) and len(head) >= 24 and head[12:16] == b'IHDR':
+        return struct.unpack('>II', head[16:24])
+    if head[:6] in (b'GIF87a', b'GIF89a') and len(head) >= 10:
+        return struct.unpack('<HH', head[6:10])
+    return None, None
+
+
+class ImageStore:
+    """
+    Directory of blobs named by the SHA-256 of their content
+
+    Blobs are streamed to a temporary file while hashing, then moved to
+    <root>/<first two hex digits>/<hash><extension>. Identical content is
+    stored once: a blob whose hash already exists is discarded.
+
+    A blob can also be saved under a ref, a slash-separated name such as
+    "epic/natural/<image>", so callers can tell that it is already stored
+    before downloading it again.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    def path_for(self, digest: str, content_type: str = '') -> str:
+        extension = _EXTENSIONS.get(content_type.split(';')[0].strip().lower(), '.bin')
+        return os.path.join(self.root, digest[:2], digest + extension)
+
+    def _ref_path(self, ref: str) -> str:
+        parts = [part for part in ref.split('/') if part]
+        if not parts or any(part in ('.', '..') for part in parts):
+            raise ValueError(f"Invalid ref: {ref}")
+        return os.path.join(self.root, 'refs', *parts) + '.json'
+
+    def get_ref(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Record of the blob saved under ref, or None if missing or its file was removed"""
+        try:
+            with open(self._ref_path(ref), encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return record if os.path.exists(record.get('path', '')) else None
+
+    def _set_ref(self, ref: str, record: Dict[str, Any]) -> None:
+        path = self._ref_path(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+
+    def put(self, chunks: Iterable[bytes], content_type: str = '', ref: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store a blob given as byte chunks
+
+        Args:
+            chunks: Blob content
+            content_type: MIME type, used for the file extension
+            ref: Name to save the blob under as well (optional)
+
+        Returns:
+            Dictionary with the path, file URI, SHA-256, size in bytes,
+            content type, image width/height (when readable from the
+            header) and whether an identical blob was already stored
+        """
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in chunks:
+                    if len(head) < 32:
+                        head += chunk[:32 - len(head)]
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            path = self.path_for(sha256, content_type)
+            existed = os.path.exists(path)
+            if existed:
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        width, height = image_dimensions(head)
+        record = {
+            'path': os.path.abspath(path),
+            'uri': 'file://' + os.path.abspath(path),
+            'sha256': sha256,
+            'bytes': size,
+            'content_type': content_type.split(';')[0].strip() or None,
+            'width': width,
+            'height': height,
+            'deduplicated': existed
+        }
+        if ref:
+            self._set_ref(ref, record)
+        return record
+
+    def put_bytes(self, data: bytes, content_type: str = '', ref: Optional[str] = None) -> Dict[str, Any]:
+        return self.put([data], content_type, ref)
+
+    def status(self) -> Dict[str, Any]:
+        """Number of stored blobs and their total size"""
+        blobs = 0
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            if directory == self._tmp_dir or directory.startswith(os.path.join(self.root, 'refs')):
+                continue
+            for name in files:
+                blobs += 1
+                total += os.path.getsize(os.path.join(directory, name))
+        return {'path': os.path.abspath(self.root), 'blobs': blobs, 'bytes': total}
+
+
+_store: Optional[ImageStore] = None
+_store_lock = threading.Lock()
+
+
+def get_image_store() -> Optional[ImageStore]:
+    """Get the image store, or None if IMAGE_STORE_PATH is empty"""
+    global _store
+    path = get_config().get_image_store_config()['path']
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore(path)
+        return _store
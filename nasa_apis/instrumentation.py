@@ -0,0 +1,51 @@
+"""
+Instrumentation applied to every MCP tool invocation
+"""
+import functools
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from .memory import get_memory_tracker
+from .profiling import get_profiler
+from .tracing import get_tracer
+
+
+# Name of the MCP tool currently being served in this task
+_current_tool: ContextVar[Optional[str]] = ContextVar('nasa_current_tool', default=None)
+
+
+def get_current_tool() -> Optional[str]:
+    """Get the name of the MCP tool being served, if any"""
+    return _current_tool.get()
+
+
+def instrument_tool(func: Callable) -> Callable:
+    """
+    Wrap an async MCP tool function with request-scoped instrumentation
+
+    The wrapper keeps the original signature visible to the MCP server so
+    tool schemas are unaffected.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _current_tool.set(name)
+        profiler = get_profiler()
+        profiled = profiler.armed and profiler.tool_started(name)
+        memory = get_memory_tracker()
+        memory_start = memory.call_started() if memory.enabled else None
+        try:
+            with get_tracer().start_span(f"tool {name}", tool=name) as span:
+                result = await func(*args, **kwargs)
+                if isinstance(result, dict) and 'error' in result:
+                    span.record_error(str(result['error']))
+                if memory_start is not None and memory.call_finished(name, memory_start):
+                    span.set_attribute('memory.over_threshold', True)
+                return result
+        finally:
+            _current_tool.reset(token)
+            if profiled:
+                profiler.tool_finished(name)
+
+    return wrapper
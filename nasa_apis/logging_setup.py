@@ -0,0 +1,114 @@
+"""
+Process-wide, non-blocking logging setup
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+from config import get_config
+from .redaction import redact_text
+from .tracing import get_current_span
+
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s%(trace)s'
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class RedactingFormatter(logging.Formatter):
+    """Formatter that masks API keys in the final log line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redact_text(super().format(record))
+
+
+class TraceContextFilter(logging.Filter):
+    """Stamps records with the active trace id while still on the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace_id = get_current_span().trace_id
+        record.trace = f" [trace {trace_id}]" if trace_id else ''
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks and leaves formatting to the listener
+
+    The stock QueueHandler formats every message on the calling thread;
+    here msg and args travel as-is and are only merged by the background
+    writer, after level filtering. Records are dropped, and counted, when
+    the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging() -> None:
+    """
+    Set up logging once per process
+
+    Log records go through a bounded queue to a background listener that
+    writes to stderr and, when LOG_FILE is set, to a size-rotated file.
+    Like logging.basicConfig, nothing is changed if the root logger already
+    has handlers.
+    """
+    global _configured
+    if _configured:
+        return
+
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+
+        root = logging.getLogger()
+        if root.handlers:
+            return
+
+        config = get_config()
+        log_config = config.get_log_config()
+        root.setLevel(getattr(logging, log_config['level'].upper(), logging.INFO))
+
+        formatter = RedactingFormatter(LOG_FORMAT)
+        handlers = []
+
+        # stdout carries the MCP stdio protocol, so console logs go to stderr
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+        if log_config['file']:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_config['file'],
+                maxBytes=log_config['max_bytes'],
+                backupCount=log_config['backup_count'],
+                encoding='utf-8',
+                delay=True
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+
+        log_queue: queue.Queue = queue.Queue(maxsize=log_config['queue_size'])
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(TraceContextFilter())
+        root.addHandler(queue_handler)
+
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
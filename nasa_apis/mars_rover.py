@@ -2,7 +2,122 @@
 Mars Rover Photos API
 """
 from .base import NASAAPIBase
-from typing import Dict, Any, Optional, List
+from .cache import NO_EXPIRY, create_cache
+from .rover_index import get_rover_photo_index
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
+from collections import deque
+from contextlib import aclosing
+import asyncio
+import math
+
+
+# Photos per page of the photos endpoints
+PAGE_SIZE = 25
+
+# Sols past the manifest's max_sol that a sol range query still covers, for
+# photos newer than the cached manifest
+SOLS_BEYOND_MANIFEST = 30
+
+# Rovers whose missions have ended; their manifests never change
+RETIRED_ROVERS = ("spirit", "opportunity")
+
+# Parsed manifests keyed by rover. Always enabled: the planner relies on them
+# and there is one small entry per rover.
+_manifest_cache = create_cache('rover_manifests', max_entries=8, enabled=True)
+
+
+class RoverManifest:
+    """
+    Per-sol photo counts and cameras of a rover mission manifest
+
+    Only sols and dates up to max_sol / max_date are covered; anything
+    newer may have photos the manifest doesn't know about yet.
+    """
+    
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = raw
+        manifest = raw.get("photo_manifest", {})
+        self.max_sol = manifest.get("max_sol", -1)
+        self.max_date = manifest.get("max_date") or ''
+        self.by_sol: Dict[int, Tuple[int, frozenset]] = {}
+        self.by_date: Dict[str, Tuple[int, frozenset]] = {}
+        for entry in manifest.get("photos", []):
+            summary = (entry.get("total_photos", 0), frozenset(entry.get("cameras", [])))
+            self.by_sol[entry.get("sol")] = summary
+            if entry.get("earth_date"):
+                self.by_date[entry["earth_date"]] = summary
+    
+    def lookup(self, sol: Optional[int] = None, earth_date: Optional[str] = None) -> Optional[Tuple[int, frozenset]]:
+        """
+        Photo count and cameras of a sol or Earth date
+        
+        Returns (0, empty set) for covered days without photos and None for
+        days newer than the manifest.
+        """
+        if sol is not None:
+            if sol > self.max_sol:
+                return None
+            return self.by_sol.get(sol, (0, frozenset()))
+        if earth_date > self.max_date:
+            return None
+        return self.by_date.get(earth_date, (0, frozenset()))
+    
+    def page_bound(self, sol: Optional[int] = None, earth_date: Optional[str] = None,
+                   camera: Optional[str] = None) -> Optional[int]:
+        """
+        Number of pages that can hold photos, or None if unknown
+        
+        Exact without a camera filter; with one it is an upper bound, since
+        the manifest only has per-sol totals.
+        """
+        summary = self.lookup(sol, earth_date)
+        if summary is None:
+            return None
+        total, cameras = summary
+        if camera and camera.upper() not in cameras:
+            return 0
+        return math.ceil(total / PAGE_SIZE)
+
+
+def compact_photos(photos: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Normalize a list of photo records
+
+    Every raw photo embeds its full rover and camera objects. The compact
+    form lists each rover and camera once; photos keep only their own
+    fields and refer to them by rover_id and camera_id.
+
+    Returns:
+        Dictionary with "photos", "rovers" and "cameras" lists
+    """
+    rovers: Dict[Any, Dict[str, Any]] = {}
+    cameras: Dict[Any, Dict[str, Any]] = {}
+    compact = []
+    for photo in photos:
+        rover = photo.get("rover") or {}
+        camera = photo.get("camera") or {}
+        rovers.setdefault(rover.get("id"), rover)
+        cameras.setdefault(camera.get("id"), camera)
+        record = {key: value for key, value in photo.items() if key not in ("rover", "camera")}
+        record["rover_id"] = rover.get("id")
+        record["camera_id"] = camera.get("id")
+        compact.append(record)
+    return {"photos": compact, "rovers": list(rovers.values()), "cameras": list(cameras.values())}
+
+
+def _shape(result: Dict[str, Any], compact: bool, key: str = "photos") -> Dict[str, Any]:
+    """Return result with its photo list under key in the compact format, if requested"""
+    if not compact or "error" in result or key not in result:
+        return result
+    normalized = compact_photos(result[key])
+    shaped = {name: value for name, value in result.items() if name != key}
+    shaped.update(format="compact", rovers=normalized["rovers"], cameras=normalized["cameras"])
+    shaped[key] = normalized["photos"]
+    return shaped
+
+
+class PhotoQueryError(Exception):
+    """Raised by iter_photos when a page request fails"""
 
 
 class MarsRoverAPI(NASAAPIBase):
@@ -11,6 +126,7 @@ class MarsRoverAPI(NASAAPIBase):
     def __init__(self, api_key: str = "DEMO_KEY"):
         super().__init__(api_key)
         self.base_endpoint = f"{self.base_url}/mars-photos/api/v1/rovers"
+        self.manifest_endpoint = f"{self.base_url}/mars-photos/api/v1/manifests"
         self.rovers = ["curiosity", "opportunity", "spirit", "perseverance"]
         self.cameras = {
             "curiosity": ["FHAZ", "RHAZ", "MAST", "CHEMCAM", "MAHLI", "MARDI", "NAVCAM"],
@@ -21,7 +137,8 @@ class MarsRoverAPI(NASAAPIBase):
                            "FRONT_HAZCAM_RIGHT_A", "REAR_HAZCAM_LEFT", "REAR_HAZCAM_RIGHT", "SKYCAM", "SHERLOC_WATSON"]
         }
     
-    def get_photos_by_sol(self, rover: str, sol: int, camera: Optional[str] = None, page: int = 1) -> Dict[str, Any]:
+    def get_photos_by_sol(self, rover: str, sol: int, camera: Optional[str] = None, page: int = 1,
+                          compact: bool = False) -> Dict[str, Any]:
         """
         Get rover photos by Martian sol (day)
         
@@ -30,6 +147,7 @@ class MarsRoverAPI(NASAAPIBase):
             sol: Martian sol number
             camera: Camera name (optional)
             page: Page number for pagination
+            compact: List rover and camera objects once instead of in every photo
             
         Returns:
             Dictionary containing rover photos
@@ -47,10 +165,10 @@ class MarsRoverAPI(NASAAPIBase):
                 return {"error": f"Invalid camera for {rover}. Available cameras: {', '.join(self.cameras[rover.lower()])}"}
             params["camera"] = camera.upper()
         
-        endpoint = f"{self.base_endpoint}/{rover.lower()}/photos"
-        return self._make_request(endpoint, params)
+        return _shape(self._photos_page(rover, params, sol=sol, camera=camera), compact)
     
-    def get_photos_by_earth_date(self, rover: str, earth_date: str, camera: Optional[str] = None, page: int = 1) -> Dict[str, Any]:
+    def get_photos_by_earth_date(self, rover: str, earth_date: str, camera: Optional[str] = None, page: int = 1,
+                                 compact: bool = False) -> Dict[str, Any]:
         """
         Get rover photos by Earth date
         
@@ -59,6 +177,7 @@ class MarsRoverAPI(NASAAPIBase):
             earth_date: Earth date in YYYY-MM-DD format
             camera: Camera name (optional)
             page: Page number for pagination
+            compact: List rover and camera objects once instead of in every photo
             
         Returns:
             Dictionary containing rover photos
@@ -81,15 +200,109 @@ class MarsRoverAPI(NASAAPIBase):
                 return {"error": f"Invalid camera for {rover}. Available cameras: {', '.join(self.cameras[rover.lower()])}"}
             params["camera"] = camera.upper()
         
-        endpoint = f"{self.base_endpoint}/{rover.lower()}/photos"
-        return self._make_request(endpoint, params)
+        return _shape(self._photos_page(rover, params, earth_date=earth_date, camera=camera), compact)
+    
+    async def iter_photos(self, rover: str, sol: Optional[int] = None, earth_date: Optional[str] = None,
+                          camera: Optional[str] = None, read_ahead: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over all photos of a sol or Earth date, page by page
+        
+        Args:
+            rover: Rover name
+            sol: Martian sol number (either sol or earth_date)
+            earth_date: Earth date in YYYY-MM-DD format
+            camera: Camera name (optional)
+            read_ahead: Pages requested ahead of the one being consumed
+                (optional, defaults to PAGE_READ_AHEAD)
+            
+        Yields:
+            Photo records, in page order
+        
+        Raises:
+            PhotoQueryError: If a page request fails
+        
+        Pages are fetched on worker threads; at most read_ahead + 1 pages
+        are held at a time. Iteration stops at the first page with fewer
+        than PAGE_SIZE photos, and prefetched pages past it are dropped.
+        """
+        if (sol is None) == (earth_date is None):
+            raise PhotoQueryError("Exactly one of sol or earth_date is required")
+        if read_ahead is None:
+            read_ahead = self.config.page_read_ahead
+        
+        if sol is not None:
+            fetch = lambda page: self.get_photos_by_sol(rover, sol, camera, page)
+        else:
+            fetch = lambda page: self.get_photos_by_earth_date(rover, earth_date, camera, page)
+        
+        pending = deque()
+        next_page = 1
+        try:
+            while True:
+                while len(pending) <= read_ahead:
+                    pending.append(asyncio.ensure_future(asyncio.to_thread(fetch, next_page)))
+                    next_page += 1
+                
+                result = await pending.popleft()
+                if "error" in result:
+                    raise PhotoQueryError(result["error"])
+                photos = result.get("photos", [])
+                for photo in photos:
+                    yield photo
+                if len(photos) < PAGE_SIZE:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def collect_photos(self, rover: str, sol: Optional[int] = None, earth_date: Optional[str] = None,
+                             cameras: Optional[List[str]] = None, limit: int = 100,
+                             read_ahead: Optional[int] = None, compact: bool = False) -> Dict[str, Any]:
+        """
+        Collect photos of a sol or Earth date across all pages and cameras
+        
+        Args:
+            rover: Rover name
+            sol: Martian sol number (either sol or earth_date)
+            earth_date: Earth date in YYYY-MM-DD format
+            cameras: Camera names (optional, defaults to all cameras)
+            limit: Maximum number of photos to return
+            read_ahead: Pages requested ahead (optional, defaults to PAGE_READ_AHEAD)
+            compact: List rover and camera objects once instead of in every photo
+            
+        Returns:
+            Dictionary containing the photos, the count per camera and
+            whether the limit cut the result short
+        """
+        photos = []
+        per_camera = {}
+        truncated = False
+        try:
+            for camera in cameras or [None]:
+                key = camera.upper() if camera else 'ALL'
+                per_camera[key] = 0
+                async with aclosing(self.iter_photos(rover, sol, earth_date, camera, read_ahead)) as pages:
+                    async for photo in pages:
+                        if len(photos) >= limit:
+                            truncated = True
+                            break
+                        photos.append(photo)
+                        per_camera[key] += 1
+                if truncated:
+                    break
+        except PhotoQueryError as e:
+            return {"error": str(e)}
+        
+        return _shape({"count": len(photos), "per_camera": per_camera, "truncated": truncated, "photos": photos},
+                      compact)
     
-    def get_latest_photos(self, rover: str) -> Dict[str, Any]:
+    def get_latest_photos(self, rover: str, compact: bool = False) -> Dict[str, Any]:
         """
         Get latest photos from rover
         
         Args:
             rover: Rover name
+            compact: List rover and camera objects once instead of in every photo
             
         Returns:
             Dictionary containing latest rover photos
@@ -98,7 +311,7 @@ class MarsRoverAPI(NASAAPIBase):
             return {"error": f"Invalid rover. Must be one of: {', '.join(self.rovers)}"}
         
         endpoint = f"{self.base_endpoint}/{rover.lower()}/latest_photos"
-        return self._make_request(endpoint)
+        return _shape(self._make_request(endpoint), compact, key="latest_photos")
     
     def get_manifest(self, rover: str) -> Dict[str, Any]:
         """
@@ -113,5 +326,181 @@ class MarsRoverAPI(NASAAPIBase):
         if rover.lower() not in self.rovers:
             return {"error": f"Invalid rover. Must be one of: {', '.join(self.rovers)}"}
         
-        endpoint = f"{self.base_endpoint}/{rover.lower()}"
-        return self._make_request(endpoint)
+        manifest = self._load_manifest(rover)
+        if isinstance(manifest, dict):
+            return manifest
+        return manifest.raw
+    
+    def plan_photo_query(self, rover: str, start_sol: int, end_sol: int,
+                         camera: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Work out which requests a sol range query needs, using the manifest
+        
+        Args:
+            rover: Rover name
+            start_sol: First sol
+            end_sol: Last sol
+            camera: Camera name (optional)
+            
+        Returns:
+            Dictionary containing the sols that can return photos with their
+            page counts (exact without a camera, an upper bound with one) and
+            the number of sols skipped because they have no matching photos
+        
+        end_sol is clamped to SOLS_BEYOND_MANIFEST sols past the manifest's
+        last sol.
+        """
+        if rover.lower() not in self.rovers:
+            return {"error": f"Invalid rover. Must be one of: {', '.join(self.rovers)}"}
+        if end_sol < start_sol:
+            return {"error": "end_sol must not be before start_sol"}
+        manifest = self._load_manifest(rover)
+        if isinstance(manifest, dict):
+            return manifest
+        requested_end = end_sol
+        end_sol = min(end_sol, manifest.max_sol + SOLS_BEYOND_MANIFEST)
+        if end_sol < start_sol:
+            return {"error": f"start_sol is past the rover's last sol ({manifest.max_sol})"}
+        
+        sols = []
+        for sol in range(start_sol, end_sol + 1):
+            pages = manifest.page_bound(sol=sol, camera=camera)
+            if pages != 0:
+                sols.append({
+                    "sol": sol,
+                    "photos": None if pages is None else manifest.lookup(sol=sol)[0],
+                    "pages": pages,
+                    "exact": pages is not None and not camera
+                })
+        return {
+            "rover": rover.lower(),
+            "camera": camera.upper() if camera else None,
+            "manifest_max_sol": manifest.max_sol,
+            "end_sol": end_sol,
+            "end_sol_clamped": end_sol < requested_end,
+            "sols_in_range": end_sol - start_sol + 1,
+            "sols_skipped": end_sol - start_sol + 1 - len(sols),
+            "min_requests": sum(1 if entry["pages"] is None else (entry["pages"] if entry["exact"] else 1)
+                                for entry in sols),
+            "sols": sols
+        }
+    
+    def get_photos_by_sol_range(self, rover: str, start_sol: int, end_sol: int, camera: Optional[str] = None,
+                                limit: Optional[int] = 100, compact: bool = False) -> Dict[str, Any]:
+        """
+        Get photos across a sol range, requesting only pages that can hold photos
+        
+        Args:
+            rover: Rover name
+            start_sol: First sol
+            end_sol: Last sol
+            camera: Camera name (optional)
+            limit: Maximum number of photos to return (None for all)
+            compact: List rover and camera objects once instead of in every photo
+            
+        Returns:
+            Dictionary containing the photos in sol order, the number of
+            upstream requests and per-page errors
+        
+        Sols covered by the local photo index are read from it. For the
+        rest, pages are fetched concurrently in sol order until limit photos
+        are collected. With a camera filter, or past the manifest, the page
+        count is not exact, so the next page of a sol is requested only
+        after a full page.
+        """
+        if rover.lower() not in self.rovers:
+            return {"error": f"Invalid rover. Must be one of: {', '.join(self.rovers)}"}
+        
+        indexed = []
+        index = get_rover_photo_index()
+        if index is not None:
+            indexed_end = min(end_sol, index.synced_sol(rover))
+            if indexed_end >= start_sol:
+                indexed = index.photos(rover, start_sol=start_sol, end_sol=indexed_end, camera=camera,
+                                       limit=None if limit is None else limit + 1)
+                start_sol = indexed_end + 1
+        
+        queue = deque()
+        sols_skipped = 0
+        end_sol_clamped = False
+        if start_sol <= end_sol and (limit is None or len(indexed) <= limit):
+            plan = self.plan_photo_query(rover, start_sol, end_sol, camera)
+            if "error" in plan:
+                return plan
+            sols_skipped = plan["sols_skipped"]
+            end_sol_clamped = plan["end_sol_clamped"]
+            for entry in plan["sols"]:
+                pages = entry["pages"] if entry["exact"] else 1
+                queue.extend((entry["sol"], page, entry["pages"], entry["exact"]) for page in range(1, pages + 1))
+        
+        pages_fetched: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        errors = []
+        collected = len(indexed)
+        while queue and (limit is None or collected < limit):
+            batch = [queue.popleft() for _ in range(min(self.config.max_concurrency, len(queue)))]
+            results = self._map_concurrently(
+                lambda task: self.get_photos_by_sol(rover, task[0], camera, task[1]), batch
+            )
+            for (sol, page, bound, exact), result in zip(batch, results):
+                if "error" in result:
+                    errors.append({"sol": sol, "page": page, "error": result["error"]})
+                    continue
+                photos = result.get("photos", [])
+                pages_fetched[(sol, page)] = photos
+                collected += len(photos)
+                if not exact and len(photos) == PAGE_SIZE and (bound is None or page < bound):
+                    queue.appendleft((sol, page + 1, bound, exact))
+        
+        photos = indexed + [photo for key in sorted(pages_fetched) for photo in pages_fetched[key]]
+        return _shape({
+            "count": len(photos[:limit]),
+            "from_index": min(len(indexed), len(photos[:limit])),
+            "requests": len(pages_fetched) + len(errors),
+            "sols_skipped": sols_skipped,
+            "end_sol_clamped": end_sol_clamped,
+            "truncated": (limit is not None and collected > limit) or bool(queue),
+            "errors": errors,
+            "photos": photos[:limit]
+        }, compact)
+    
+    def _photos_page(self, rover: str, params: Dict[str, Any], sol: Optional[int] = None,
+                     earth_date: Optional[str] = None, camera: Optional[str] = None) -> Dict[str, Any]:
+        """One photos page, from the local index, the manifest or the API"""
+        page = params["page"]
+        index = get_rover_photo_index()
+        if index is not None and index.covers(rover, sol=sol, earth_date=earth_date):
+            return {"photos": index.photos(rover, sol=sol, earth_date=earth_date, camera=camera, page=page,
+                                           page_size=PAGE_SIZE)}
+        if self._known_empty(rover, page, sol=sol, earth_date=earth_date, camera=camera):
+            return {"photos": []}
+        
+        endpoint = f"{self.base_endpoint}/{rover.lower()}/photos"
+        return self._make_request(endpoint, params)
+    
+    def _load_manifest(self, rover: str) -> Any:
+        """Cached RoverManifest of a rover, or a dictionary with an "error" key"""
+        rover = rover.lower()
+        manifest = _manifest_cache.get(rover)
+        if manifest is not None:
+            return manifest
+        
+        endpoint = f"{self.manifest_endpoint}/{rover}"
+        raw = self._make_request(endpoint)
+        if "error" in raw:
+            return raw
+        if not isinstance(raw.get("photo_manifest"), dict):
+            return {"error": f"Unexpected manifest response for {rover}"}
+        manifest = RoverManifest(raw)
+        ttl = NO_EXPIRY if rover in RETIRED_ROVERS else self.config.rover_manifest_ttl
+        _manifest_cache.set(rover, manifest, ttl)
+        return manifest
+    
+    def _known_empty(self, rover: str, page: int, sol: Optional[int] = None, earth_date: Optional[str] = None,
+                     camera: Optional[str] = None) -> bool:
+        """Whether the manifest shows that a photos page has no photos"""
+        manifest = self._load_manifest(rover)
+        if isinstance(manifest, dict):
+            # Without a manifest the request is simply made
+            return False
+        pages = manifest.page_bound(sol=sol, earth_date=earth_date, camera=camera)
+        return pages is not None and page > pages
@@ -2,90 +2,203 @@
 InSight Mars Weather API
 """
 from .base import NASAAPIBase
-from typing import Dict, Any
+from .cache import NO_EXPIRY, create_cache
+from typing import Dict, Any, List, Optional
+from array import array
+from collections import Counter
+import math
+
+
+# Sensor fields of a sol: payload key -> (name, unit)
+_SENSORS = {
+    'AT': ('temperature', 'Celsius'),
+    'PRE': ('pressure', 'Pa'),
+    'HWS': ('wind_speed', 'm/s'),
+}
+
+# The mission has ended and the feed no longer changes, so the parsed
+# series is cached without expiry, even when response caching is off
+_series_cache = create_cache('insight_sols', ttl=NO_EXPIRY, max_entries=1, enabled=True)
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class SolSeries:
+    """
+    InSight weather as a per-sol time series
+
+    Sensor statistics (average, minimum, maximum) are stored in typed
+    columns in sol order; NaN marks a sensor missing on a sol.
+    """
+
+    def __init__(self):
+        self.sols = array('i')
+        self.values = {name: {stat: array('d') for stat in ('av', 'mn', 'mx')} for name, _ in _SENSORS.values()}
+        self.wind_degrees = array('d')
+        self.wind_points: List[Optional[str]] = []
+        self.first_utc: List[Optional[str]] = []
+        self.last_utc: List[Optional[str]] = []
+        self.seasons: List[Dict[str, Optional[str]]] = []
+
+    def __len__(self) -> int:
+        return len(self.sols)
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any]) -> 'SolSeries':
+        series = cls()
+        sol_keys = sorted((key for key in data.get("sol_keys", []) if key in data and key.isdigit()), key=int)
+        for sol in sol_keys:
+            sol_data = data[sol]
+            series.sols.append(int(sol))
+            for key, (name, _) in _SENSORS.items():
+                sensor = sol_data.get(key) or {}
+                for stat, column in series.values[name].items():
+                    column.append(_to_float(sensor.get(stat)))
+            wind_dir = (sol_data.get("WD") or {}).get("most_common") or {}
+            series.wind_degrees.append(_to_float(wind_dir.get("compass_degrees")))
+            series.wind_points.append(wind_dir.get("compass_point"))
+            series.first_utc.append(sol_data.get("First_UTC"))
+            series.last_utc.append(sol_data.get("Last_UTC"))
+            series.seasons.append({
+                "season": sol_data.get("Season"),
+                "northern_season": sol_data.get("Northern_season"),
+                "southern_season": sol_data.get("Southern_season")
+            })
+        return series
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Weather of the sol at index, in the get_weather format"""
+        weather_info = {
+            "sol": str(self.sols[index]),
+            "first_utc": self.first_utc[index],
+            "last_utc": self.last_utc[index],
+            **self.seasons[index]
+        }
+        for name, unit in _SENSORS.values():
+            columns = self.values[name]
+            stats = [columns[stat][index] for stat in ('av', 'mn', 'mx')]
+            if not all(math.isnan(value) for value in stats):
+                average, minimum, maximum = (None if math.isnan(value) else value for value in stats)
+                weather_info[name] = {"average": average, "minimum": minimum, "maximum": maximum, "unit": unit}
+        if self.wind_points[index] is not None or not math.isnan(self.wind_degrees[index]):
+            weather_info["wind_direction"] = {
+                "compass_point": self.wind_points[index],
+                "compass_degrees": None if math.isnan(self.wind_degrees[index]) else self.wind_degrees[index]
+            }
+        return weather_info
+
+    def select(self, start_sol: Optional[int] = None, end_sol: Optional[int] = None) -> List[int]:
+        """Indexes of the sols within [start_sol, end_sol]"""
+        return [index for index, sol in enumerate(self.sols)
+                if (start_sol is None or sol >= start_sol) and (end_sol is None or sol <= end_sol)]
+
+    def aggregate(self, indexes: List[int]) -> Dict[str, Any]:
+        """Minimum, maximum and mean of each sensor across the given sols"""
+        result: Dict[str, Any] = {
+            "sols": len(indexes),
+            "first_sol": str(self.sols[indexes[0]]) if indexes else None,
+            "last_sol": str(self.sols[indexes[-1]]) if indexes else None
+        }
+        for name, unit in _SENSORS.values():
+            columns = self.values[name]
+            averages = [columns['av'][i] for i in indexes if not math.isnan(columns['av'][i])]
+            minimums = [columns['mn'][i] for i in indexes if not math.isnan(columns['mn'][i])]
+            maximums = [columns['mx'][i] for i in indexes if not math.isnan(columns['mx'][i])]
+            if averages or minimums or maximums:
+                result[name] = {
+                    "mean": math.fsum(averages) / len(averages) if averages else None,
+                    "minimum": min(minimums) if minimums else None,
+                    "maximum": max(maximums) if maximums else None,
+                    "sols_with_data": len(averages),
+                    "unit": unit
+                }
+        points = Counter(self.wind_points[i] for i in indexes if self.wind_points[i] is not None)
+        if points:
+            result["wind_direction"] = {"most_common": points.most_common(1)[0][0], "counts": dict(points)}
+        return result
 
 
 class MarsWeatherAPI(NASAAPIBase):
     """NASA InSight Mars Weather API client"""
-    
+
     def __init__(self, api_key: str = "DEMO_KEY"):
         super().__init__(api_key)
         self.endpoint = f"{self.base_url}/insight_weather/"
-    
+        self.series_cache = _series_cache
+
     def get_weather(self) -> Dict[str, Any]:
         """
         Get Mars weather data from NASA InSight Weather API.
         Returns the latest available weather data from Mars.
         """
+        try:
+            series = self.get_series()
+            if isinstance(series, dict):
+                return series
+            return series.record(len(series) - 1)
+
+        except Exception as e:
+            return {"error": f"An error occurred: {str(e)}"}
+
+    def get_series(self) -> Any:
+        """
+        Get every sol of the InSight feed as a SolSeries
+
+        The feed is downloaded and parsed once; later calls are served from
+        the cache.
+
+        Returns:
+            SolSeries, or a dictionary with an "error" key
+        """
+        series = self.series_cache.get('series')
+        if series is not None:
+            return series
+
         params = {
             "feedtype": "json",
             "ver": "1.0"
         }
-        
+        data = self._make_request(self.endpoint, params)
+        if "error" in data:
+            return data
+
+        series = SolSeries.from_payload(data)
+        if not len(series):
+            return {"error": "No weather data available"}
+        self.series_cache.set('series', series)
+        return series
+
+    def get_weather_history(self, start_sol: Optional[int] = None, end_sol: Optional[int] = None,
+                            aggregate: bool = False) -> Dict[str, Any]:
+        """
+        Get Mars weather for a range of sols
+
+        Args:
+            start_sol: First sol (optional, defaults to the first available)
+            end_sol: Last sol (optional, defaults to the last available)
+            aggregate: Return min/max/mean across the sols instead of each sol
+
+        Returns:
+            Dictionary containing the weather of each sol, or the aggregates
+        """
         try:
-            data = self._make_request(self.endpoint, params)
-            
-            if "error" in data:
-                return data
-            
-            # Get the latest sol (Martian day) data
-            sol_keys = data.get("sol_keys", [])
-            if not sol_keys:
-                return {"error": "No weather data available"}
-            
-            # Get the most recent sol data
-            latest_sol = sol_keys[-1]
-            latest_data = data[latest_sol]
-            
-            # Extract weather information
-            weather_info = {
-                "sol": latest_sol,
-                "first_utc": latest_data.get("First_UTC"),
-                "last_utc": latest_data.get("Last_UTC"),
-                "season": latest_data.get("Season"),
-                "northern_season": latest_data.get("Northern_season"),
-                "southern_season": latest_data.get("Southern_season")
+            series = self.get_series()
+            if isinstance(series, dict):
+                return series
+
+            indexes = series.select(start_sol, end_sol)
+            if aggregate:
+                return series.aggregate(indexes)
+            return {
+                "available_sols": [str(series.sols[0]), str(series.sols[-1])],
+                "count": len(indexes),
+                "sols": [series.record(index) for index in indexes]
             }
-            
-            # Extract temperature data (AT = Atmospheric Temperature)
-            if "AT" in latest_data:
-                temp_data = latest_data["AT"]
-                weather_info["temperature"] = {
-                    "average": temp_data.get("av"),
-                    "minimum": temp_data.get("mn"),
-                    "maximum": temp_data.get("mx"),
-                    "unit": "Celsius"
-                }
-            
-            # Extract pressure data (PRE = Pressure)
-            if "PRE" in latest_data:
-                pressure_data = latest_data["PRE"]
-                weather_info["pressure"] = {
-                    "average": pressure_data.get("av"),
-                    "minimum": pressure_data.get("mn"),
-                    "maximum": pressure_data.get("mx"),
-                    "unit": "Pa"
-                }
-            
-            # Extract wind data (HWS = Horizontal Wind Speed)
-            if "HWS" in latest_data:
-                wind_data = latest_data["HWS"]
-                weather_info["wind_speed"] = {
-                    "average": wind_data.get("av"),
-                    "minimum": wind_data.get("mn"),
-                    "maximum": wind_data.get("mx"),
-                    "unit": "m/s"
-                }
-            
-            # Extract wind direction data (WD = Wind Direction)
-            if "WD" in latest_data and "most_common" in latest_data["WD"]:
-                wind_dir = latest_data["WD"]["most_common"]
-                weather_info["wind_direction"] = {
-                    "compass_point": wind_dir.get("compass_point"),
-                    "compass_degrees": wind_dir.get("compass_degrees")
-                }
-            
-            return weather_info
-            
+
         except Exception as e:
             return {"error": f"An error occurred: {str(e)}"}
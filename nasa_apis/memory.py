@@ -0,0 +1,79 @@
+"""
+Optional per-tool memory accounting based on tracemalloc
+"""
+import logging
+import sys
+import tracemalloc
+from typing import Any, Optional
+
+from config import get_config
+from .metrics import get_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryTracker:
+    """
+    Measures peak and retained allocation of each tool call
+
+    Peak is the highest traced allocation above the level at call start;
+    retained is what is still allocated when the call returns (the result
+    plus anything the call added to caches). tracemalloc tracks the whole
+    process, so calls that overlap in time share their numbers.
+    """
+
+    def __init__(self, enabled: bool = False, alert_threshold: int = 50 * 1024 * 1024):
+        self.enabled = enabled
+        self.alert_threshold = alert_threshold
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def call_started(self) -> int:
+        """Reset the peak counter and return the currently traced size"""
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def call_finished(self, tool: str, start_size: int) -> bool:
+        """Record a finished call; returns True if it was over the alert threshold"""
+        current, peak = tracemalloc.get_traced_memory()
+        peak_delta = max(0, peak - start_size)
+        retained = current - start_size
+        flagged = self.alert_threshold > 0 and peak_delta >= self.alert_threshold
+        if flagged:
+            logger.warning("Tool %s peaked at %.1f MB (retained %.1f MB)", tool,
+                           peak_delta / 1048576, retained / 1048576)
+        get_metrics().record_tool_memory(tool, peak_delta, retained, flagged)
+        return flagged
+
+
+def estimate_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """Approximate deep size in bytes of JSON-like data (dicts, lists, scalars)"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, _seen) + estimate_size(value, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, _seen)
+    return size
+
+
+def _create_memory_tracker() -> MemoryTracker:
+    memory_config = get_config().get_memory_config()
+    return MemoryTracker(memory_config['enabled'], int(memory_config['alert_threshold_mb'] * 1024 * 1024))
+
+
+# Global memory tracker instance
+memory_tracker = _create_memory_tracker()
+
+
+def get_memory_tracker() -> MemoryTracker:
+    """Get global memory tracker instance"""
+    return memory_tracker
@@ -0,0 +1,147 @@
+"""
+In-process metrics for upstream NASA API requests
+"""
+import logging
+import threading
+from typing import Dict, Any, Callable
+
+from .transport import PHASES
+
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsRegistry:
+    """Thread-safe aggregation of request metrics per upstream host and per tool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._tool_memory: Dict[str, Dict[str, Any]] = {}
+        self._cache_tiers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def _new_host_stats(self) -> Dict[str, Any]:
+        return {
+            'requests': 0,
+            'errors': 0,
+            'reused_connections': 0,
+            'status_codes': {},
+            'bytes': 0,
+            'wire_bytes': 0,
+            'phases': {phase: {'total': 0.0, 'max': 0.0} for phase in PHASES}
+        }
+
+    def record_request(self, timing: Dict[str, Any]) -> None:
+        """Add a single request timing record to its host's aggregate"""
+        status = timing.get('status')
+        with self._lock:
+            stats = self._hosts.get(timing['host'])
+            if stats is None:
+                stats = self._hosts[timing['host']] = self._new_host_stats()
+
+            stats['requests'] += 1
+            if timing.get('error') or status is None or status >= 400:
+                stats['errors'] += 1
+            if timing.get('reused_connection'):
+                stats['reused_connections'] += 1
+            if status is not None:
+                stats['status_codes'][status] = stats['status_codes'].get(status, 0) + 1
+            stats['bytes'] += timing.get('bytes', 0)
+            stats['wire_bytes'] += timing.get('wire_bytes') or 0
+
+            for phase in PHASES:
+                value = timing.get(phase, 0.0)
+                phase_stats = stats['phases'][phase]
+                phase_stats['total'] += value
+                if value > phase_stats['max']:
+                    phase_stats['max'] = value
+
+    def record_tool_memory(self, tool: str, peak: int, retained: int, flagged: bool) -> None:
+        """Add a tool call's peak and retained allocation (bytes) to its aggregate"""
+        with self._lock:
+            stats = self._tool_memory.get(tool)
+            if stats is None:
+                stats = self._tool_memory[tool] = {
+                    'calls': 0, 'over_threshold': 0, 'peak_total': 0, 'peak_max': 0,
+                    'retained_total': 0, 'retained_max': 0
+                }
+            stats['calls'] += 1
+            if flagged:
+                stats['over_threshold'] += 1
+            stats['peak_total'] += peak
+            stats['peak_max'] = max(stats['peak_max'], peak)
+            stats['retained_total'] += retained
+            stats['retained_max'] = max(stats['retained_max'], retained)
+
+    def register_cache_tier(self, name: str, stats_fn: Callable[[], Dict[str, Any]]) -> None:
+        """
+        Report a cache tier in snapshots
+
+        stats_fn is called at snapshot time and should return a small dict,
+        e.g. entry count and approximate size in bytes.
+        """
+        with self._lock:
+            self._cache_tiers[name] = stats_fn
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get aggregated metrics per host, tool and cache tier, with times in milliseconds"""
+        with self._lock:
+            hosts = {}
+            for host, stats in self._hosts.items():
+                count = stats['requests']
+                hosts[host] = {
+                    'requests': count,
+                    'errors': stats['errors'],
+                    'reused_connections': stats['reused_connections'],
+                    'status_codes': {str(code): n for code, n in stats['status_codes'].items()},
+                    'bytes': stats['bytes'],
+                    'avg_bytes': round(stats['bytes'] / count) if count else 0,
+                    'wire_bytes': stats['wire_bytes'],
+                    'phases_ms': {
+                        phase: {
+                            'avg': round(values['total'] * 1000 / count, 3) if count else 0.0,
+                            'max': round(values['max'] * 1000, 3),
+                            'total': round(values['total'] * 1000, 3)
+                        }
+                        for phase, values in stats['phases'].items()
+                    }
+                }
+            tool_memory = {}
+            for tool, stats in self._tool_memory.items():
+                calls = stats['calls']
+                tool_memory[tool] = {
+                    'calls': calls,
+                    'over_threshold': stats['over_threshold'],
+                    'avg_peak_bytes': round(stats['peak_total'] / calls) if calls else 0,
+                    'max_peak_bytes': stats['peak_max'],
+                    'avg_retained_bytes': round(stats['retained_total'] / calls) if calls else 0,
+                    'max_retained_bytes': stats['retained_max']
+                }
+            cache_tiers = dict(self._cache_tiers)
+
+        tiers = {}
+        for name, stats_fn in cache_tiers.items():
+            try:
+                tiers[name] = stats_fn()
+            except Exception as e:
+                logger.warning("Failed to read stats of cache tier %s: %s", name, e)
+
+        snapshot = {'hosts': hosts, 'cache_tiers': tiers}
+        if tool_memory:
+            snapshot['tool_memory'] = tool_memory
+        return snapshot
+
+    def reset(self) -> None:
+        """Clear all collected metrics; registered cache tiers are kept"""
+        with self._lock:
+            self._hosts.clear()
+            self._tool_memory.clear()
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get global metrics registry"""
+    return metrics
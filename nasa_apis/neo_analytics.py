@@ -0,0 +1,318 @@
+"""
+Close-approach analytics over NeoWs results and the local NEO store
+"""
+import heapq
+import math
+from array import array
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Any, Iterable, List, Optional
+
+from .neo_store import NEOStore, get_neo_store
+
+try:
+    import numpy
+except ImportError:  # optional, the pure Python path gives the same results
+    numpy = None
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class ApproachTable:
+    """
+    Close approaches flattened into parallel numeric columns
+
+    One row per approach; object attributes (name, diameter, hazard flag)
+    are stored once per object and referenced by index, so hundreds of
+    thousands of rows stay compact. The columns are stdlib arrays, which
+    numpy reads without copying when it is installed.
+    """
+
+    def __init__(self):
+        self.object_ids: List[str] = []
+        self.object_names: List[str] = []
+        self.object_diameter_km = array('d')
+        self.object_hazardous = array('b')
+        self._object_index: Dict[str, int] = {}
+        self._day_ordinals: Dict[str, int] = {}
+
+        self.object = array('i')
+        self.day = array('i')
+        self.miss_km = array('d')
+        self.velocity_kms = array('d')
+
+    def __len__(self) -> int:
+        return len(self.object)
+
+    def _object(self, neo_id: str, name: str, diameter_km: float, hazardous: bool) -> int:
+        index = self._object_index.get(neo_id)
+        if index is None:
+            index = self._object_index[neo_id] = len(self.object_ids)
+            self.object_ids.append(neo_id)
+            self.object_names.append(name)
+            self.object_diameter_km.append(diameter_km)
+            self.object_hazardous.append(1 if hazardous else 0)
+        return index
+
+    def add_neo(self, neo: Dict[str, Any], orbiting_body: Optional[str] = 'Earth',
+                start: Optional[date] = None, end: Optional[date] = None) -> None:
+        """Add the close approaches of a NeoWs record (feed entry or lookup result)"""
+        diameter = neo.get('estimated_diameter', {}).get('kilometers', {})
+        mean_diameter = (_to_float(diameter.get('estimated_diameter_min'))
+                         + _to_float(diameter.get('estimated_diameter_max'))) / 2
+        first = start.toordinal() if start else None
+        last = end.toordinal() if end else None
+        index = None
+        for approach in neo.get('close_approach_data') or []:
+            if orbiting_body and approach.get('orbiting_body') != orbiting_body:
+                continue
+            day = self._day_ordinal(approach.get('close_approach_date'))
+            if day is None or (first and day < first) or (last and day > last):
+                continue
+            if index is None:
+                index = self._object(str(neo.get('id')), neo.get('name') or '', mean_diameter,
+                                     bool(neo.get('is_potentially_hazardous_asteroid')))
+            self.object.append(index)
+            self.day.append(day)
+            self.miss_km.append(_to_float(approach.get('miss_distance', {}).get('kilometers')))
+            self.velocity_kms.append(_to_float(approach.get('relative_velocity', {}).get('kilometers_per_second')))
+
+    def _day_ordinal(self, value: Any) -> Optional[int]:
+        """Day ordinal of a YYYY-MM-DD string, memoized since approach dates repeat a lot"""
+        ordinal = self._day_ordinals.get(value)
+        if ordinal is None:
+            try:
+                ordinal = self._day_ordinals[value] = date.fromisoformat(value).toordinal()
+            except (TypeError, ValueError):
+                return None
+        return ordinal
+
+    @classmethod
+    def from_neos(cls, neos: Iterable[Dict[str, Any]], **filters) -> 'ApproachTable':
+        table = cls()
+        for neo in neos:
+            table.add_neo(neo, **filters)
+        return table
+
+    @classmethod
+    def from_feed(cls, feed: Dict[str, Any], **filters) -> 'ApproachTable':
+        """Build from a get_feed result"""
+        return cls.from_neos((neo for neos in feed.get('near_earth_objects', {}).values() for neo in neos),
+                             **filters)
+
+    @classmethod
+    def from_store(cls, store: NEOStore, start: Optional[date] = None, end: Optional[date] = None) -> 'ApproachTable':
+        """Build from the next Earth approach of every asteroid in the local store"""
+        table = cls()
+        columns = store.columns
+        first = start.toordinal() if start else 1
+        last = end.toordinal() if end else date.max.toordinal()
+        days = columns['next_approach_day']
+        for row in range(len(store)):
+            day = days[row]
+            if not day or day < first or day > last:
+                continue
+            index = table._object(str(columns['id'][row]), store.names[row],
+                                  (columns['diameter_min_km'][row] + columns['diameter_max_km'][row]) / 2,
+                                  bool(columns['hazardous'][row]))
+            table.object.append(index)
+            table.day.append(day)
+            table.miss_km.append(columns['next_approach_miss_km'][row])
+            table.velocity_kms.append(columns['next_approach_velocity_kms'][row])
+        return table
+
+
+def _distribution(values: Iterable[float], bins: int = 10) -> Dict[str, Any]:
+    """Count, min, max, mean, percentiles and an equal-width histogram of the non-NaN values"""
+    if numpy is not None and isinstance(values, array):
+        return _distribution_numpy(values, bins)
+    values = sorted(value for value in values if not math.isnan(value))
+    count = len(values)
+    if not count:
+        return {'count': 0}
+
+    def percentile(p: float) -> float:
+        position = (count - 1) * p
+        low = int(position)
+        high = min(low + 1, count - 1)
+        return values[low] + (values[high] - values[low]) * (position - low)
+
+    low, high = values[0], values[-1]
+    width = (high - low) / bins or 1.0
+    histogram = Counter(min(int((value - low) / width), bins - 1) for value in values)
+    return {
+        'count': count,
+        'min': low,
+        'max': high,
+        'mean': math.fsum(values) / count,
+        'p10': percentile(0.1),
+        'p50': percentile(0.5),
+        'p90': percentile(0.9),
+        'histogram': [{'from': low + i * width, 'to': low + (i + 1) * width, 'count': histogram.get(i, 0)}
+                      for i in range(bins)]
+    }
+
+
+def _distribution_numpy(values: array, bins: int) -> Dict[str, Any]:
+    values = numpy.frombuffer(values, dtype=numpy.float64)
+    values = numpy.sort(values[~numpy.isnan(values)])
+    count = len(values)
+    if not count:
+        return {'count': 0}
+
+    low, high = float(values[0]), float(values[-1])
+    width = (high - low) / bins or 1.0
+    p10, p50, p90 = numpy.percentile(values, [10, 50, 90])
+    histogram = numpy.bincount(numpy.minimum(((values - low) / width).astype(numpy.int64), bins - 1),
+                               minlength=bins)
+    return {
+        'count': count,
+        'min': low,
+        'max': high,
+        'mean': math.fsum(values.tolist()) / count,
+        'p10': float(p10),
+        'p50': float(p50),
+        'p90': float(p90),
+        'histogram': [{'from': low + i * width, 'to': low + (i + 1) * width, 'count': int(histogram[i])}
+                      for i in range(bins)]
+    }
+
+
+def _closest_rows(table: ApproachTable) -> List[int]:
+    """Row of the closest (non-NaN) miss of every object"""
+    if numpy is not None and len(table):
+        objects = numpy.frombuffer(table.object, dtype=numpy.int32)
+        miss = numpy.frombuffer(table.miss_km, dtype=numpy.float64)
+        rows = numpy.flatnonzero(~numpy.isnan(miss))
+        # Stable sort by object then miss distance; the first row of each object is its closest
+        rows = rows[numpy.lexsort((miss[rows], objects[rows]))]
+        _, first = numpy.unique(objects[rows], return_index=True)
+        return rows[first].tolist()
+
+    closest = [-1] * len(table.object_ids)
+    for row, (index, miss) in enumerate(zip(table.object, table.miss_km)):
+        best = closest[index]
+        if best < 0 or miss < table.miss_km[best] or math.isnan(table.miss_km[best]):
+            closest[index] = row
+    return [row for row in closest if row >= 0 and not math.isnan(table.miss_km[row])]
+
+
+def _hazardous_by_day(table: ApproachTable) -> Counter:
+    """Number of distinct hazardous objects approaching on each day ordinal"""
+    if numpy is not None and len(table):
+        objects = numpy.frombuffer(table.object, dtype=numpy.int32).astype(numpy.int64)
+        days = numpy.frombuffer(table.day, dtype=numpy.int32).astype(numpy.int64)
+        hazardous = numpy.frombuffer(table.object_hazardous, dtype=numpy.int8)[objects] != 0
+        pairs = numpy.unique(days[hazardous] * len(table.object_ids) + objects[hazardous])
+        day_values, counts = numpy.unique(pairs // len(table.object_ids), return_counts=True)
+        return Counter(dict(zip(day_values.tolist(), counts.tolist())))
+
+    hazardous_pairs = {(day, index) for index, day in zip(table.object, table.day) if table.object_hazardous[index]}
+    return Counter(day for day, _ in hazardous_pairs)
+
+
+def summarize(table: ApproachTable, top_n: int = 10, bins: int = 10) -> Dict[str, Any]:
+    """
+    Compact summary of an approach table
+
+    Returns the closest miss per object (the top_n closest objects), miss
+    distance and velocity distributions, the number of distinct hazardous
+    objects approaching per date and the top_n objects by diameter to
+    miss distance ratio.
+    """
+    objects = len(table.object_ids)
+
+    closest = _closest_rows(table)
+
+    def describe(row: int) -> Dict[str, Any]:
+        index = table.object[row]
+        diameter = table.object_diameter_km[index]
+        return {
+            'id': table.object_ids[index],
+            'name': table.object_names[index],
+            'date': date.fromordinal(table.day[row]).isoformat(),
+            'miss_distance_km': table.miss_km[row],
+            'velocity_kms': None if math.isnan(table.velocity_kms[row]) else table.velocity_kms[row],
+            'diameter_km': None if math.isnan(diameter) else diameter,
+            'hazardous': bool(table.object_hazardous[index])
+        }
+
+    closest_rows = heapq.nsmallest(top_n, closest, key=table.miss_km.__getitem__)
+
+    ratio = {row: table.object_diameter_km[table.object[row]] / table.miss_km[row]
+             for row in closest
+             if table.miss_km[row] > 0 and not math.isnan(table.object_diameter_km[table.object[row]])}
+    ratio_rows = heapq.nlargest(top_n, ratio, key=ratio.__getitem__)
+
+    hazardous_by_date = _hazardous_by_day(table)
+
+    return {
+        'approaches': len(table),
+        'objects': objects,
+        'hazardous_objects': sum(table.object_hazardous),
+        'closest_approaches': [describe(row) for row in closest_rows],
+        'miss_distance_km': _distribution(table.miss_km, bins),
+        'velocity_kms': _distribution(table.velocity_kms, bins),
+        'hazardous_by_date': {date.fromordinal(day).isoformat(): count
+                              for day, count in sorted(hazardous_by_date.items())},
+        'top_size_to_distance': [dict(describe(row), size_to_distance=ratio[row]) for row in ratio_rows]
+    }
+
+
+def analyze_close_approaches(client, source: str = 'feed', start_date: Optional[str] = None,
+                             end_date: Optional[str] = None, asteroid_ids: Optional[List[str]] = None,
+                             orbiting_body: Optional[str] = 'Earth', top_n: int = 10) -> Dict[str, Any]:
+    """
+    Summarize close approaches from one of the NeoWs sources
+
+    Args:
+        client: AsteroidsAPI client used for the feed and lookup sources
+        source: "feed" (get_feed over the date range), "store" (next approach
+            of every asteroid in the local NEO store) or "asteroids" (every
+            recorded approach of the given asteroid_ids)
+        start_date: Start date in YYYY-MM-DD format (optional)
+        end_date: End date in YYYY-MM-DD format (optional)
+        asteroid_ids: NeoWs asteroid IDs, for the "asteroids" source
+        orbiting_body: Only approaches to this body, for the "asteroids" source
+        top_n: Number of objects in the closest and size-to-distance rankings
+
+    Returns:
+        Dictionary containing the summary, or a dictionary with an "error" key
+    """
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError as e:
+        return {"error": str(e)}
+
+    errors = {}
+    if source == 'feed':
+        feed = client.get_feed(start_date, end_date)
+        if "error" in feed:
+            return feed
+        table = ApproachTable.from_feed(feed)
+    elif source == 'store':
+        store = get_neo_store()
+        if store is None:
+            return {"error": "NEO catalog store is not configured (set NEO_STORE_PATH)"}
+        table = ApproachTable.from_store(store, start, end)
+    elif source == 'asteroids':
+        if not asteroid_ids:
+            return {"error": "asteroid_ids is required for the asteroids source"}
+        lookup = client.get_asteroids_by_ids(asteroid_ids)
+        errors = lookup['errors']
+        table = ApproachTable.from_neos(lookup['results'].values(), orbiting_body=orbiting_body,
+                                        start=start, end=end)
+    else:
+        return {"error": "source must be one of feed, store, asteroids"}
+
+    summary = summarize(table, top_n)
+    summary['source'] = source
+    if errors:
+        summary['errors'] = errors
+    return summary
@@ -0,0 +1,402 @@
+"""
+Local columnar store of the NeoWs asteroid catalog
+"""
+import json
+import logging
+import math
+import os
+import struct
+import sys
+import threading
+from array import array
+from datetime import date, datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from config import get_config
+
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'NEOSTORE'
+_VERSION = 1
+
+# Column name -> array typecode. Missing numbers are NaN, a missing next
+# approach is day ordinal 0 and orbit classes are indexes into a string table.
+COLUMNS = {
+    'id': 'q',
+    'diameter_min_km': 'd',
+    'diameter_max_km': 'd',
+    'hazardous': 'b',
+    'sentry_object': 'b',
+    'absolute_magnitude': 'd',
+    'orbit_class': 'H',
+    'next_approach_day': 'i',
+    'next_approach_miss_km': 'd',
+    'next_approach_velocity_kms': 'd',
+    'epoch_osculation': 'd',
+    'eccentricity': 'd',
+    'semi_major_axis': 'd',
+    'inclination': 'd',
+    'ascending_node_longitude': 'd',
+    'perihelion_argument': 'd',
+    'mean_anomaly': 'd',
+    'mean_motion': 'd',
+}
+
+# Orbital elements copied as-is from orbital_data
+ORBITAL_ELEMENTS = ('epoch_osculation', 'eccentricity', 'semi_major_axis', 'inclination',
+                    'ascending_node_longitude', 'perihelion_argument', 'mean_anomaly', 'mean_motion')
+
+SORT_KEYS = ('diameter', 'absolute_magnitude', 'next_approach', 'miss_distance', 'velocity', 'name')
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _pages_to_ranges(pages: List[int]) -> List[List[int]]:
+    ranges: List[List[int]] = []
+    for page in sorted(pages):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ranges
+
+
+def _ranges_to_pages(ranges: List[List[int]]) -> set:
+    return {page for first, last in ranges for page in range(first, last + 1)}
+
+
+class NEOStore:
+    """
+    Columnar mirror of the NeoWs browse catalog
+
+    Each field is kept in a typed array and the whole store is written to a
+    single binary file: a JSON header (column layout, names, orbit class
+    table and crawl checkpoint) followed by the raw column bytes. Crawls
+    save after every batch of pages, so an interrupted crawl resumes where
+    it stopped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._crawl_lock = threading.Lock()
+        self.columns: Dict[str, array] = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        self.names: List[str] = []
+        self.orbit_classes: List[str] = []
+        self._orbit_class_index: Dict[str, int] = {}
+        self._row_index: Dict[int, int] = {}
+        self.crawl_state: Dict[str, Any] = {'page_size': None, 'total_pages': None, 'done_pages': set(),
+                                            'completed_at': None}
+        if os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _load(self) -> None:
+        with open(self.path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{self.path} is not a NEO store file")
+            header_length, = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_length).decode('utf-8'))
+            if header['version'] != _VERSION:
+                raise ValueError(f"Unsupported NEO store version {header['version']}")
+            swap = header['byteorder'] != sys.byteorder
+            rows = header['rows']
+            for name, typecode in COLUMNS.items():
+                column = array(typecode)
+                column.frombytes(f.read(rows * column.itemsize))
+                if swap:
+                    column.byteswap()
+                self.columns[name] = column
+
+        self.names = header['names']
+        self.orbit_classes = header['orbit_classes']
+        self._orbit_class_index = {name: i for i, name in enumerate(self.orbit_classes)}
+        self._row_index = {neo_id: row for row, neo_id in enumerate(self.columns['id'])}
+        crawl = header['crawl']
+        self.crawl_state = {
+            'page_size': crawl['page_size'],
+            'total_pages': crawl['total_pages'],
+            'done_pages': _ranges_to_pages(crawl['done_pages']),
+            'completed_at': crawl['completed_at']
+        }
+
+    def save(self) -> None:
+        """Write the store atomically (to a temporary file that replaces the old one)"""
+        with self._lock:
+            header = {
+                'version': _VERSION,
+                'byteorder': sys.byteorder,
+                'rows': len(self.names),
+                'columns': COLUMNS,
+                'names': self.names,
+                'orbit_classes': self.orbit_classes,
+                'crawl': {
+                    'page_size': self.crawl_state['page_size'],
+                    'total_pages': self.crawl_state['total_pages'],
+                    'done_pages': _pages_to_ranges(self.crawl_state['done_pages']),
+                    'completed_at': self.crawl_state['completed_at']
+                }
+            }
+            header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(_MAGIC)
+                f.write(struct.pack('<I', len(header_bytes)))
+                f.write(header_bytes)
+                for name in COLUMNS:
+                    self.columns[name].tofile(f)
+            os.replace(tmp_path, self.path)
+
+    def add(self, neos: List[Dict[str, Any]], today: Optional[date] = None) -> int:
+        """Insert or update asteroids from NeoWs records; returns the number of records stored"""
+        today = today or datetime.now(timezone.utc).date()
+        stored = 0
+        with self._lock:
+            for neo in neos:
+                try:
+                    neo_id = int(neo['id'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                values = self._extract(neo, today)
+                row = self._row_index.get(neo_id)
+                if row is None:
+                    self._row_index[neo_id] = len(self.names)
+                    self.names.append(neo.get('name') or '')
+                    for name, value in values.items():
+                        self.columns[name].append(value)
+                else:
+                    self.names[row] = neo.get('name') or ''
+                    for name, value in values.items():
+                        self.columns[name][row] = value
+                stored += 1
+        return stored
+
+    def _extract(self, neo: Dict[str, Any], today: date) -> Dict[str, Any]:
+        diameter = neo.get('estimated_diameter', {}).get('kilometers', {})
+        orbital_data = neo.get('orbital_data') or {}
+        orbit_class = (orbital_data.get('orbit_class') or {}).get('orbit_class_type') or ''
+        class_index = self._orbit_class_index.get(orbit_class)
+        if class_index is None:
+            class_index = self._orbit_class_index[orbit_class] = len(self.orbit_classes)
+            self.orbit_classes.append(orbit_class)
+
+        next_day, miss_km, velocity = 0, math.nan, math.nan
+        for approach in neo.get('close_approach_data') or []:
+            if approach.get('orbiting_body') != 'Earth':
+                continue
+            try:
+                approach_day = datetime.strptime(approach['close_approach_date'], '%Y-%m-%d').date()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if approach_day >= today and (next_day == 0 or approach_day.toordinal() < next_day):
+                next_day = approach_day.toordinal()
+                miss_km = _to_float(approach.get('miss_distance', {}).get('kilometers'))
+                velocity = _to_float(approach.get('relative_velocity', {}).get('kilometers_per_second'))
+
+        values = {
+            'id': int(neo['id']),
+            'diameter_min_km': _to_float(diameter.get('estimated_diameter_min')),
+            'diameter_max_km': _to_float(diameter.get('estimated_diameter_max')),
+            'hazardous': 1 if neo.get('is_potentially_hazardous_asteroid') else 0,
+            'sentry_object': 1 if neo.get('is_sentry_object') else 0,
+            'absolute_magnitude': _to_float(neo.get('absolute_magnitude_h')),
+            'orbit_class': class_index,
+            'next_approach_day': next_day,
+            'next_approach_miss_km': miss_km,
+            'next_approach_velocity_kms': velocity,
+        }
+        for element in ORBITAL_ELEMENTS:
+            values[element] = _to_float(orbital_data.get(element))
+        return values
+
+    def row(self, row: int) -> Dict[str, Any]:
+        """A stored asteroid as a flat dictionary"""
+        columns = self.columns
+        next_day = columns['next_approach_day'][row]
+        result = {
+            'id': str(columns['id'][row]),
+            'name': self.names[row],
+            'diameter_min_km': columns['diameter_min_km'][row],
+            'diameter_max_km': columns['diameter_max_km'][row],
+            'hazardous': bool(columns['hazardous'][row]),
+            'sentry_object': bool(columns['sentry_object'][row]),
+            'absolute_magnitude': columns['absolute_magnitude'][row],
+            'orbit_class': self.orbit_classes[columns['orbit_class'][row]] or None,
+            'next_approach_date': date.fromordinal(next_day).isoformat() if next_day else None,
+            'next_approach_miss_km': columns['next_approach_miss_km'][row],
+            'next_approach_velocity_kms': columns['next_approach_velocity_kms'][row],
+        }
+        return {key: (None if isinstance(value, float) and math.isnan(value) else value)
+                for key, value in result.items()}
+
+    def find(self, neo_id: str) -> Optional[int]:
+        """Row of an asteroid by its NeoWs id, or None"""
+        try:
+            return self._row_index.get(int(neo_id))
+        except (TypeError, ValueError):
+            return None
+
+    def query(self, hazardous: Optional[bool] = None, min_diameter_km: Optional[float] = None,
+              max_diameter_km: Optional[float] = None, min_magnitude: Optional[float] = None,
+              max_magnitude: Optional[float] = None, orbit_class: Optional[str] = None,
+              approach_after: Optional[str] = None, approach_before: Optional[str] = None,
+              sort_by: str = 'diameter', descending: bool = True, limit: int = 50) -> Dict[str, Any]:
+        """
+        Filter and sort the catalog
+
+        Diameter filters and sorting use the mean of the estimated minimum
+        and maximum diameter. Approach filters refer to the next Earth
+        approach as of the crawl. Rows missing the sort value come last.
+        """
+        if sort_by not in SORT_KEYS:
+            return {"error": f"sort_by must be one of {', '.join(SORT_KEYS)}"}
+        try:
+            after = datetime.strptime(approach_after, '%Y-%m-%d').date().toordinal() if approach_after else None
+            before = datetime.strptime(approach_before, '%Y-%m-%d').date().toordinal() if approach_before else None
+        except ValueError as e:
+            return {"error": str(e)}
+
+        with self._lock:
+            columns = self.columns
+            rows = range(len(self.names))
+            diameter = [(low + high) / 2 for low, high in zip(columns['diameter_min_km'], columns['diameter_max_km'])]
+
+            if hazardous is not None:
+                flags = columns['hazardous']
+                rows = [row for row in rows if flags[row] == hazardous]
+            if min_diameter_km is not None:
+                rows = [row for row in rows if diameter[row] >= min_diameter_km]
+            if max_diameter_km is not None:
+                rows = [row for row in rows if diameter[row] <= max_diameter_km]
+            if min_magnitude is not None:
+                magnitude = columns['absolute_magnitude']
+                rows = [row for row in rows if magnitude[row] >= min_magnitude]
+            if max_magnitude is not None:
+                magnitude = columns['absolute_magnitude']
+                rows = [row for row in rows if magnitude[row] <= max_magnitude]
+            if orbit_class is not None:
+                class_index = self._orbit_class_index.get(orbit_class)
+                classes = columns['orbit_class']
+                rows = [row for row in rows if classes[row] == class_index]
+            if after is not None or before is not None:
+                days = columns['next_approach_day']
+                rows = [row for row in rows
+                        if days[row] and (after is None or days[row] >= after)
+                        and (before is None or days[row] <= before)]
+
+            if sort_by == 'name':
+                names = self.names
+                rows = sorted(rows, key=lambda row: names[row], reverse=descending)
+            else:
+                values = {
+                    'diameter': diameter,
+                    'absolute_magnitude': columns['absolute_magnitude'],
+                    'next_approach': [day or math.nan for day in columns['next_approach_day']],
+                    'miss_distance': columns['next_approach_miss_km'],
+                    'velocity': columns['next_approach_velocity_kms'],
+                }[sort_by]
+                present = [row for row in rows if not math.isnan(values[row])]
+                absent = [row for row in rows if math.isnan(values[row])]
+                rows = sorted(present, key=values.__getitem__, reverse=descending) + absent
+
+            return {
+                'total_matches': len(rows),
+                'catalog_size': len(self.names),
+                'results': [self.row(row) for row in rows[:limit]]
+            }
+
+    def status(self) -> Dict[str, Any]:
+        state = self.crawl_state
+        total = state['total_pages']
+        return {
+            'asteroids': len(self),
+            'page_size': state['page_size'],
+            'total_pages': total,
+            'crawled_pages': len(state['done_pages']),
+            'remaining_pages': None if total is None else total - len(state['done_pages']),
+            'completed_at': state['completed_at']
+        }
+
+    def crawl(self, client, max_pages: Optional[int] = None, page_size: int = 20,
+              batch_pages: int = 50, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Crawl neo/browse pages that are not in the store yet
+
+        Pages are fetched concurrently through client.browse_pages, which
+        goes through the shared rate limiter, and the store is saved after
+        every batch. refresh starts a new pass over the whole catalog,
+        updating the stored asteroids in place. max_pages bounds the number
+        of pages fetched by one call.
+        """
+        if not self._crawl_lock.acquire(blocking=False):
+            return {"error": "A crawl of the NEO catalog is already running"}
+        try:
+            state = self.crawl_state
+            if refresh or state['total_pages'] is None:
+                state.update(page_size=page_size, total_pages=None, done_pages=set(), completed_at=None)
+            page_size = state['page_size']
+            budget = max_pages
+
+            if state['total_pages'] is None:
+                first = client.browse_pages([0], page_size)[0]
+                if "error" in first:
+                    return {"error": first["error"], **self.status()}
+                state['total_pages'] = first.get('page', {}).get('total_pages', 0)
+                self.add(first.get('near_earth_objects', []))
+                state['done_pages'].add(0)
+                self.save()
+                if budget is not None:
+                    budget -= 1
+
+            pending = [page for page in range(state['total_pages']) if page not in state['done_pages']]
+            if budget is not None:
+                pending = pending[:max(budget, 0)]
+
+            for i in range(0, len(pending), batch_pages):
+                batch = pending[i:i + batch_pages]
+                results = client.browse_pages(batch, page_size)
+                error = None
+                for page, result in zip(batch, results):
+                    if "error" in result:
+                        error = error or result["error"]
+                        continue
+                    self.add(result.get('near_earth_objects', []))
+                    state['done_pages'].add(page)
+                if len(state['done_pages']) >= state['total_pages']:
+                    state['completed_at'] = datetime.now(timezone.utc).isoformat()
+                self.save()
+                logger.info("NEO catalog crawled %d/%d pages (%d asteroids)",
+                            len(state['done_pages']), state['total_pages'], len(self))
+                if error:
+                    return {"error": error, **self.status()}
+
+            if len(state['done_pages']) >= state['total_pages'] and state['completed_at'] is None:
+                state['completed_at'] = datetime.now(timezone.utc).isoformat()
+                self.save()
+            return self.status()
+        finally:
+            self._crawl_lock.release()
+
+
+_store: Optional[NEOStore] = None
+_store_lock = threading.Lock()
+
+
+def get_neo_store() -> Optional[NEOStore]:
+    """Get the local NEO catalog store, or None if NEO_STORE_PATH is not set"""
+    global _store
+    path = get_config().get_neo_store_config()['path']
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = NEOStore(path)
+        return _store
@@ -0,0 +1,347 @@
+"""
+Two-body (Keplerian) orbit propagation from NeoWs orbital elements
+"""
+import math
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Sequence
+
+from .neo_store import get_neo_store
+
+try:
+    import numpy
+except ImportError:  # optional, the pure Python path gives the same results
+    numpy = None
+
+
+AU_KM = 149597870.7
+# Gaussian gravitational constant in degrees per day, for a = 1 AU
+GAUSS_DEG_PER_DAY = math.degrees(0.01720209895)
+# Julian day of 2000-01-01 12:00 TT
+J2000 = 2451545.0
+KEPLER_ITERATIONS = 12
+
+# Mean heliocentric ecliptic J2000 elements of the Earth-Moon barycenter
+# (Standish, JPL approximate positions of the planets, 1800-2050)
+EARTH_ELEMENTS = {
+    'epoch_osculation': J2000,
+    'semi_major_axis': 1.00000261,
+    'eccentricity': 0.01671123,
+    'inclination': -0.00001531,
+    'ascending_node_longitude': 0.0,
+    'perihelion_argument': 102.93768193,
+    'mean_anomaly': 100.46457166 - 102.93768193,
+    'mean_motion': 0.98560912,
+}
+
+_ELEMENTS = ('epoch_osculation', 'semi_major_axis', 'eccentricity', 'inclination',
+             'ascending_node_longitude', 'perihelion_argument', 'mean_anomaly', 'mean_motion')
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def date_to_jd(day: date) -> float:
+    """Julian day at 00:00 of a date"""
+    return J2000 - 0.5 + (day - date(2000, 1, 1)).days
+
+
+def jd_to_date(jd: float) -> str:
+    """YYYY-MM-DD date of a Julian day"""
+    return (date(2000, 1, 1) + timedelta(days=math.floor(jd - J2000 + 0.5))).isoformat()
+
+
+class OrbitalElements:
+    """
+    Osculating elements of many bodies as parallel columns
+
+    Angles are stored in degrees as in orbital_data; the mean motion is
+    derived from the semi-major axis when missing. Hyperbolic or incomplete
+    element sets are skipped and reported in self.skipped.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.skipped: List[str] = []
+        self.columns = {element: array('d') for element in _ELEMENTS}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, body_id: str, name: str, elements: Dict[str, Any]) -> bool:
+        values = {element: _to_float(elements.get(element)) for element in _ELEMENTS}
+        if math.isnan(values['mean_motion']) and values['semi_major_axis'] > 0:
+            values['mean_motion'] = GAUSS_DEG_PER_DAY / values['semi_major_axis'] ** 1.5
+        if any(math.isnan(value) for value in values.values()) or not 0 <= values['eccentricity'] < 1:
+            self.skipped.append(body_id)
+            return False
+        self.ids.append(body_id)
+        self.names.append(name)
+        for element, value in values.items():
+            self.columns[element].append(value)
+        return True
+
+    @classmethod
+    def from_neos(cls, neos: Sequence[Dict[str, Any]]) -> 'OrbitalElements':
+        """Elements from NeoWs asteroid records (orbital_data)"""
+        elements = cls()
+        for neo in neos:
+            elements.add(str(neo.get('id')), neo.get('name') or '', neo.get('orbital_data') or {})
+        return elements
+
+    @classmethod
+    def from_store(cls, store, rows: Optional[Sequence[int]] = None) -> 'OrbitalElements':
+        """Elements from the local NEO store, for all rows or the given ones"""
+        elements = cls()
+        columns = store.columns
+        for row in range(len(store)) if rows is None else rows:
+            elements.add(str(columns['id'][row]), store.names[row],
+                         {element: columns[element][row] for element in _ELEMENTS})
+        return elements
+
+    @classmethod
+    def earth(cls) -> 'OrbitalElements':
+        elements = cls()
+        elements.add('earth', 'Earth', EARTH_ELEMENTS)
+        return elements
+
+    def _orientation(self, body: int):
+        """Perifocal unit vectors P and Q in heliocentric ecliptic coordinates"""
+        node = math.radians(self.columns['ascending_node_longitude'][body])
+        peri = math.radians(self.columns['perihelion_argument'][body])
+        incl = math.radians(self.columns['inclination'][body])
+        cos_node, sin_node = math.cos(node), math.sin(node)
+        cos_peri, sin_peri = math.cos(peri), math.sin(peri)
+        cos_incl, sin_incl = math.cos(incl), math.sin(incl)
+        p = (cos_node * cos_peri - sin_node * sin_peri * cos_incl,
+             sin_node * cos_peri + cos_node * sin_peri * cos_incl,
+             sin_peri * sin_incl)
+        q = (-cos_node * sin_peri - sin_node * cos_peri * cos_incl,
+             -sin_node * sin_peri + cos_node * cos_peri * cos_incl,
+             cos_peri * sin_incl)
+        return p, q
+
+
+def propagate(elements: OrbitalElements, epochs_jd: Sequence[float]) -> Dict[str, Any]:
+    """
+    Heliocentric positions of every body at every epoch
+
+    Args:
+        elements: Osculating elements of the bodies
+        epochs_jd: Epochs as Julian days
+
+    Returns:
+        Dictionary with x, y and z in AU, each a flat row-major
+        (body, epoch) array of len(elements) * len(epochs_jd) values
+    """
+    if numpy is not None and len(elements):
+        return _propagate_numpy(elements, epochs_jd)
+    return _propagate_python(elements, epochs_jd)
+
+
+def _propagate_python(elements: OrbitalElements, epochs_jd: Sequence[float]) -> Dict[str, Any]:
+    columns = elements.columns
+    x, y, z = array('d'), array('d'), array('d')
+    sin, cos, sqrt, radians = math.sin, math.cos, math.sqrt, math.radians
+    for body in range(len(elements)):
+        a = columns['semi_major_axis'][body]
+        e = columns['eccentricity'][body]
+        b = a * sqrt(1 - e * e)
+        n = radians(columns['mean_motion'][body])
+        m0 = radians(columns['mean_anomaly'][body])
+        epoch = columns['epoch_osculation'][body]
+        p, q = elements._orientation(body)
+        for jd in epochs_jd:
+            m = math.remainder(m0 + n * (jd - epoch), math.tau)
+            anomaly = m + e * sin(m)
+            for _ in range(KEPLER_ITERATIONS):
+                step = (anomaly - e * sin(anomaly) - m) / (1 - e * cos(anomaly))
+                anomaly -= step
+                if abs(step) < 1e-12:
+                    break
+            u = a * (cos(anomaly) - e)
+            v = b * sin(anomaly)
+            x.append(u * p[0] + v * q[0])
+            y.append(u * p[1] + v * q[1])
+            z.append(u * p[2] + v * q[2])
+    return {'x': x, 'y': y, 'z': z}
+
+
+def _propagate_numpy(elements: OrbitalElements, epochs_jd: Sequence[float]) -> Dict[str, Any]:
+    columns = {element: numpy.frombuffer(column, dtype=numpy.float64)[:, None]
+               for element, column in elements.columns.items()}
+    epochs = numpy.asarray(epochs_jd, dtype=numpy.float64)[None, :]
+    a, e = columns['semi_major_axis'], columns['eccentricity']
+    b = a * numpy.sqrt(1 - e * e)
+
+    m = numpy.radians(columns['mean_anomaly']) + numpy.radians(columns['mean_motion']) * (epochs - columns['epoch_osculation'])
+    m = numpy.remainder(m + numpy.pi, 2 * numpy.pi) - numpy.pi
+    anomaly = m + e * numpy.sin(m)
+    for _ in range(KEPLER_ITERATIONS):
+        step = (anomaly - e * numpy.sin(anomaly) - m) / (1 - e * numpy.cos(anomaly))
+        anomaly -= step
+        if numpy.abs(step).max(initial=0.0) < 1e-12:
+            break
+    u = a * (numpy.cos(anomaly) - e)
+    v = b * numpy.sin(anomaly)
+
+    node = numpy.radians(columns['ascending_node_longitude'])
+    peri = numpy.radians(columns['perihelion_argument'])
+    incl = numpy.radians(columns['inclination'])
+    cos_node, sin_node = numpy.cos(node), numpy.sin(node)
+    cos_peri, sin_peri = numpy.cos(peri), numpy.sin(peri)
+    cos_incl, sin_incl = numpy.cos(incl), numpy.sin(incl)
+    x = u * (cos_node * cos_peri - sin_node * sin_peri * cos_incl) + v * (-cos_node * sin_peri - sin_node * cos_peri * cos_incl)
+    y = u * (sin_node * cos_peri + cos_node * sin_peri * cos_incl) + v * (-sin_node * sin_peri + cos_node * cos_peri * cos_incl)
+    z = u * (sin_peri * sin_incl) + v * (cos_peri * sin_incl)
+    return {'x': array('d', x.ravel().tobytes()), 'y': array('d', y.ravel().tobytes()),
+            'z': array('d', z.ravel().tobytes())}
+
+
+def earth_distances(elements: OrbitalElements, epochs_jd: Sequence[float],
+                    positions: Optional[Dict[str, Any]] = None) -> array:
+    """Distance in AU from the Earth of every body at every epoch, flat row-major (body, epoch)"""
+    positions = positions or propagate(elements, epochs_jd)
+    earth = propagate(OrbitalElements.earth(), epochs_jd)
+    count = len(epochs_jd)
+    if numpy is not None and len(elements):
+        shape = (len(elements), count)
+        dx = numpy.frombuffer(positions['x'], dtype=numpy.float64).reshape(shape) - numpy.frombuffer(earth['x'], dtype=numpy.float64)
+        dy = numpy.frombuffer(positions['y'], dtype=numpy.float64).reshape(shape) - numpy.frombuffer(earth['y'], dtype=numpy.float64)
+        dz = numpy.frombuffer(positions['z'], dtype=numpy.float64).reshape(shape) - numpy.frombuffer(earth['z'], dtype=numpy.float64)
+        return array('d', numpy.sqrt(dx * dx + dy * dy + dz * dz).ravel().tobytes())
+
+    ex, ey, ez = earth['x'], earth['y'], earth['z']
+    distances = array('d')
+    for i, (x, y, z) in enumerate(zip(positions['x'], positions['y'], positions['z'])):
+        epoch = i % count
+        distances.append(math.sqrt((x - ex[epoch]) ** 2 + (y - ey[epoch]) ** 2 + (z - ez[epoch]) ** 2))
+    return distances
+
+
+# Largest number of epochs in a grid
+MAX_EPOCHS = 10000
+
+
+def epoch_grid(start_date: str, end_date: str, step_days: float = 1.0) -> List[float]:
+    """Julian days from start_date to end_date (inclusive) every step_days, at most MAX_EPOCHS"""
+    start = date_to_jd(datetime.strptime(start_date, '%Y-%m-%d').date())
+    end = date_to_jd(datetime.strptime(end_date, '%Y-%m-%d').date())
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+    if step_days <= 0:
+        raise ValueError("step_days must be positive")
+    count = int((end - start) / step_days) + 1
+    if count > MAX_EPOCHS:
+        raise ValueError(f"The grid would have {count} epochs, more than {MAX_EPOCHS}; "
+                         "use a shorter range or a larger step_days")
+    return [start + i * step_days for i in range(count)]
+
+
+def summarize_distances(elements: OrbitalElements, epochs_jd: Sequence[float],
+                        include_positions: bool = False, top_n: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Propagate every body over the grid and summarize its distance from the Earth
+
+    Bodies are ordered by their closest distance over the grid; top_n keeps
+    only the closest ones. include_positions adds the heliocentric position
+    and Earth distance at every epoch.
+    """
+    positions = propagate(elements, epochs_jd)
+    distances = earth_distances(elements, epochs_jd, positions)
+    count = len(epochs_jd)
+
+    bodies = []
+    for body in range(len(elements)):
+        row = distances[body * count:(body + 1) * count]
+        closest = min(range(count), key=row.__getitem__)
+        summary = {
+            'id': elements.ids[body],
+            'name': elements.names[body],
+            'closest_distance_au': row[closest],
+            'closest_distance_km': row[closest] * AU_KM,
+            'closest_date': jd_to_date(epochs_jd[closest]),
+            'distance_at_start_au': row[0],
+            'distance_at_end_au': row[-1]
+        }
+        if include_positions:
+            offset = body * count
+            summary['positions'] = [
+                {'date': jd_to_date(jd), 'x_au': positions['x'][offset + i], 'y_au': positions['y'][offset + i],
+                 'z_au': positions['z'][offset + i], 'earth_distance_au': row[i]}
+                for i, jd in enumerate(epochs_jd)
+            ]
+        bodies.append(summary)
+
+    bodies.sort(key=lambda summary: summary['closest_distance_au'])
+    return {
+        'bodies': len(bodies),
+        'epochs': count,
+        'start_date': jd_to_date(epochs_jd[0]),
+        'end_date': jd_to_date(epochs_jd[-1]),
+        'results': bodies if top_n is None else bodies[:top_n],
+        'skipped': elements.skipped
+    }
+
+
+# Largest bodies x epochs grid propagated in one call; the pure Python path is far slower
+MAX_SAMPLES = 4000000 if numpy is not None else 500000
+
+# Largest bodies x epochs grid returned with full positions
+MAX_POSITION_SAMPLES = 10000
+
+
+def propagate_asteroids(client, asteroid_ids: Optional[List[str]] = None, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None, step_days: float = 1.0,
+                        include_positions: bool = False, top_n: int = 20) -> Dict[str, Any]:
+    """
+    Propagate asteroid orbits over a date grid and report their Earth distances
+
+    Args:
+        client: AsteroidsAPI client used to look up asteroid_ids
+        asteroid_ids: NeoWs asteroid IDs (optional, defaults to every
+            asteroid in the local NEO store)
+        start_date: Start date in YYYY-MM-DD format (optional, defaults to today)
+        end_date: End date in YYYY-MM-DD format (optional, defaults to 30 days from start)
+        step_days: Grid spacing in days
+        include_positions: Include the position at every epoch
+        top_n: Number of bodies returned, closest first
+
+    Returns:
+        Dictionary containing the closest Earth distance of each body over
+        the grid, or a dictionary with an "error" key
+    """
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else datetime.now(timezone.utc).date()
+        epochs = epoch_grid(start.isoformat(), end_date or (start + timedelta(days=30)).isoformat(), step_days)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    errors = {}
+    if asteroid_ids:
+        lookup = client.get_asteroids_by_ids(asteroid_ids)
+        errors = lookup['errors']
+        elements = OrbitalElements.from_neos(list(lookup['results'].values()))
+    else:
+        store = get_neo_store()
+        if store is None or len(store) == 0:
+            return {"error": "Pass asteroid_ids or fill the local NEO store with crawl_neo_catalog"}
+        elements = OrbitalElements.from_store(store)
+
+    samples = len(elements) * len(epochs)
+    if samples > MAX_SAMPLES:
+        return {"error": f"{len(elements)} bodies x {len(epochs)} epochs is more than {MAX_SAMPLES} samples; "
+                         "use fewer asteroids, a shorter range or a larger step"}
+    if include_positions and samples > MAX_POSITION_SAMPLES:
+        return {"error": f"include_positions is limited to {MAX_POSITION_SAMPLES} body-epoch samples; "
+                         "use fewer asteroids, a shorter range or a larger step"}
+
+    result = summarize_distances(elements, epochs, include_positions, top_n)
+    if errors:
+        result['errors'] = errors
+    return result
@@ -0,0 +1,176 @@
+"""
+On-demand sampling CPU profiler for MCP tool invocations
+"""
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+from config import get_config
+
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of all threads at a fixed interval
+
+    Stacks are aggregated in collapsed ("folded") form, one line per unique
+    stack with its sample count, which flamegraph.pl, speedscope and
+    similar tools read directly.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='nasa-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(f"thread {thread_names.get(ident, ident)}")
+                stack.reverse()
+                self._stacks[';'.join(stack)] += 1
+            self.samples += 1
+
+    def write_folded(self, path: str) -> None:
+        """Write collapsed stacks to path"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilerController:
+    """
+    Starts and stops profiling sessions
+
+    A session either covers a time window or the next N calls of a named
+    tool. Tool instrumentation only reads the armed flag, so there is no
+    profiling overhead while no session is active.
+    """
+
+    def __init__(self, interval: float = 0.005, output_dir: str = 'profiles'):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.armed = False
+        self._lock = threading.Lock()
+        self._profiler: Optional[SamplingProfiler] = None
+        self._label = None
+        self._tool = None
+        self._remaining_calls = 0
+        self._in_flight = 0
+        self._timer: Optional[threading.Timer] = None
+
+    def start_window(self, seconds: float) -> Dict[str, Any]:
+        """Profile every thread for the given number of seconds"""
+        with self._lock:
+            if self._profiler is not None or self._tool is not None:
+                return {"error": "A profiling session is already active"}
+            self._start_sampling(f"window_{int(seconds)}s")
+            self._timer = threading.Timer(seconds, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+        return {"status": "profiling", "mode": "window", "seconds": seconds}
+
+    def profile_tool(self, tool: str, calls: int = 1) -> Dict[str, Any]:
+        """Profile the next calls invocations of tool"""
+        with self._lock:
+            if self._profiler is not None or self._tool is not None:
+                return {"error": "A profiling session is already active"}
+            self._tool = tool
+            self._remaining_calls = max(calls, 1)
+            self.armed = True
+        return {"status": "armed", "mode": "tool", "tool": tool, "calls": self._remaining_calls}
+
+    def tool_started(self, tool: str) -> bool:
+        """Called by tool instrumentation while armed; returns True if this call is profiled"""
+        with self._lock:
+            if tool != self._tool or self._remaining_calls <= 0:
+                return False
+            self._remaining_calls -= 1
+            self._in_flight += 1
+            if self._profiler is None:
+                self._start_sampling(tool)
+            return True
+
+    def tool_finished(self, tool: str) -> None:
+        """Called when a profiled tool call returns"""
+        with self._lock:
+            self._in_flight -= 1
+            done = self._remaining_calls <= 0 and self._in_flight <= 0
+        if done:
+            self.stop()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop the active session and write its collapsed stacks to disk"""
+        with self._lock:
+            profiler, label = self._profiler, self._label
+            if self._timer is not None:
+                self._timer.cancel()
+            self._profiler = None
+            self._label = None
+            self._tool = None
+            self._remaining_calls = 0
+            self._in_flight = 0
+            self._timer = None
+            self.armed = False
+
+        if profiler is None:
+            return {"error": "No profiling session is active"}
+
+        profiler.stop()
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        path = os.path.join(self.output_dir, f"profile_{label}_{stamp}.folded")
+        profiler.write_folded(path)
+        logger.info("Wrote %d profile samples to %s", profiler.samples, path)
+        return {"status": "stopped", "path": path, "samples": profiler.samples}
+
+    def _start_sampling(self, label: str) -> None:
+        self._profiler = SamplingProfiler(self.interval)
+        self._label = label
+        self.armed = True
+        self._profiler.start()
+
+
+def _create_profiler() -> ProfilerController:
+    profiling_config = get_config().get_profiling_config()
+    controller = ProfilerController(profiling_config['interval_ms'] / 1000, profiling_config['output_dir'])
+    if profiling_config['tool']:
+        controller.profile_tool(profiling_config['tool'], profiling_config['tool_calls'])
+    elif profiling_config['window_seconds'] > 0:
+        controller.start_window(profiling_config['window_seconds'])
+    return controller
+
+
+# Global profiler controller
+profiler = _create_profiler()
+
+
+def get_profiler() -> ProfilerController:
+    """Get global profiler controller"""
+    return profiler
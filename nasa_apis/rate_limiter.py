@@ -0,0 +1,110 @@
+"""
+Client-side rate limiting for api.nasa.gov requests
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator
+
+from config import get_config
+from .tracing import get_tracer
+
+
+class RateLimiter:
+    """
+    Sliding-window limiter enforcing per-minute and per-hour request budgets
+
+    acquire() blocks the calling thread until a request may be sent, so
+    concurrent fetches share one budget instead of tripping HTTP 429.
+    """
+
+    def __init__(self, requests_per_minute: int, requests_per_hour: int):
+        self.windows = [(60.0, requests_per_minute), (3600.0, requests_per_hour)]
+        self._sent = [deque(), deque()]
+        self._lock = threading.Lock()
+
+    def _reserve(self, now: float) -> float:
+        """Reserve a slot and return 0, or return how long to wait before retrying"""
+        wait = 0.0
+        for (period, limit), sent in zip(self.windows, self._sent):
+            while sent and sent[0] <= now - period:
+                sent.popleft()
+            if limit > 0 and len(sent) >= limit:
+                wait = max(wait, sent[0] + period - now)
+        if wait == 0.0:
+            for sent in self._sent:
+                sent.append(now)
+        return wait
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds spent waiting"""
+        with self._lock:
+            wait = self._reserve(time.monotonic())
+        if wait == 0.0:
+            return 0.0
+
+        waited = 0.0
+        with get_tracer().start_span('rate_limit.wait', limiter='client') as span:
+            while wait > 0.0:
+                time.sleep(wait)
+                waited += wait
+                with self._lock:
+                    wait = self._reserve(time.monotonic())
+            span.set_attribute('seconds', round(waited, 3))
+        return waited
+
+
+class ByteRateLimiter:
+    """
+    Token bucket capping the combined throughput of concurrent downloads
+
+    consume() blocks until the given number of bytes fits the budget; the
+    bucket holds at most one second worth of bytes.
+    """
+
+    def __init__(self, bytes_per_second: float):
+        self.rate = float(bytes_per_second)
+        self._available = self.rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, size: int) -> float:
+        """Block until size bytes may be read; returns the seconds spent waiting"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._available = min(self.rate, self._available + (now - self._updated) * self.rate)
+            self._updated = now
+            # Take the bytes now, going into debt if needed, and wait the debt off
+            self._available -= size
+            wait = -self._available / self.rate if self._available < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def throttle(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Pass byte chunks through, consuming each from the budget"""
+        try:
+            for chunk in chunks:
+                self.consume(len(chunk))
+                yield chunk
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str) -> RateLimiter:
+    """Get the process-wide limiter for an API key (limits are per key upstream)"""
+    with _limiters_lock:
+        limiter = _limiters.get(api_key)
+        if limiter is None:
+            limits = get_config().get_rate_limits()
+            limiter = _limiters[api_key] = RateLimiter(limits['requests_per_minute'],
+                                                       limits['requests_per_hour'])
+        return limiter
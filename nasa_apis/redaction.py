@@ -0,0 +1,32 @@
+"""
+Helpers for keeping API keys out of logs, dumps and traces
+"""
+import re
+from typing import Dict, Any, Optional
+
+
+# Query/body parameters whose values must never be written out
+SENSITIVE_PARAMS = ('api_key',)
+
+REDACTED = '***'
+
+# Matches both query strings (api_key=XYZ) and dict reprs ('api_key': 'XYZ')
+_SENSITIVE_VALUE_RE = re.compile(r'((?:%s)[\'"]?\s*[:=]\s*[\'"]?)[^&\s\'",}]+' % '|'.join(SENSITIVE_PARAMS))
+
+
+def redact_params(params: Optional[Dict[str, Any]], max_value_length: int = 512) -> Dict[str, Any]:
+    """Copy params with sensitive values masked and long values truncated"""
+    redacted = {}
+    for key, value in (params or {}).items():
+        if key in SENSITIVE_PARAMS:
+            redacted[key] = REDACTED
+        elif isinstance(value, str) and len(value) > max_value_length:
+            redacted[key] = value[:max_value_length] + '...'
+        else:
+            redacted[key] = value
+    return redacted
+
+
+def redact_text(text: str) -> str:
+    """Mask sensitive parameters embedded in free text such as URLs, error messages or log lines"""
+    return _SENSITIVE_VALUE_RE.sub(r'\1' + REDACTED, text)
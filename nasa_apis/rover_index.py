@@ -0,0 +1,303 @@
+"""
+Local index of Mars rover photo metadata
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from config import get_config
+
+
+logger = logging.getLogger(__name__)
+
+# Rovers whose photo metadata never changes again
+RETIRED_ROVERS = ('spirit', 'opportunity')
+# Recent sols of active rovers are synced again, as downlinks keep adding photos to them
+ACTIVE_TAIL_SOLS = 7
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rovers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    info TEXT NOT NULL DEFAULT '{}',
+    synced_sol INTEGER NOT NULL DEFAULT -1,
+    synced_date TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS cameras (
+    id INTEGER PRIMARY KEY,
+    rover INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    full_name TEXT,
+    UNIQUE (rover, name)
+);
+CREATE TABLE IF NOT EXISTS prefixes (
+    id INTEGER PRIMARY KEY,
+    prefix TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS photos (
+    id INTEGER PRIMARY KEY,
+    rover INTEGER NOT NULL,
+    sol INTEGER NOT NULL,
+    camera INTEGER NOT NULL,
+    earth_date TEXT NOT NULL,
+    prefix INTEGER NOT NULL,
+    file TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS photos_by_sol ON photos (rover, sol, camera);
+CREATE INDEX IF NOT EXISTS photos_by_date ON photos (rover, earth_date, camera);
+"""
+
+_PHOTO_QUERY = """SELECT photos.id, photos.sol, photos.earth_date, prefixes.prefix || photos.file AS img_src,
+                         cameras.id AS camera_id, cameras.name AS camera, cameras.full_name AS camera_full_name
+                  FROM photos JOIN cameras ON cameras.id = photos.camera
+                  JOIN prefixes ON prefixes.id = photos.prefix"""
+
+
+class RoverPhotoIndex:
+    """
+    SQLite index of rover photo metadata
+
+    Each photo is a compact row (id, sol, camera code, earth date, image
+    URL split into a shared directory prefix and a file name) with sorted
+    indexes by sol and by Earth date. Rover and camera objects are stored
+    once, so full API-shaped photos can be rebuilt locally. Per rover,
+    synced_sol marks how far the index is complete.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def _rover(self, name: str) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute('SELECT * FROM rovers WHERE name = ?', (name.lower(),)).fetchone()
+
+    def covers(self, rover: str, sol: Optional[int] = None, earth_date: Optional[str] = None) -> bool:
+        """Whether the index is complete for a sol or Earth date of a rover"""
+        row = self._rover(rover)
+        if row is None:
+            return False
+        if sol is not None:
+            return sol <= row['synced_sol']
+        # A sol spans two Earth dates, so the last synced date may be partial
+        return bool(earth_date) and earth_date < row['synced_date']
+
+    def synced_sol(self, rover: str) -> int:
+        row = self._rover(rover)
+        return -1 if row is None else row['synced_sol']
+
+    def upsert(self, rover: str, photos: List[Dict[str, Any]], synced_sol: Optional[int] = None) -> None:
+        """Store API photo records and optionally advance the rover's checkpoint, atomically"""
+        rover = rover.lower()
+        with self._lock:
+            with self._conn:
+                conn = self._conn
+                conn.execute('INSERT OR IGNORE INTO rovers (name) VALUES (?)', (rover,))
+                rover_id = conn.execute('SELECT id FROM rovers WHERE name = ?', (rover,)).fetchone()[0]
+                if photos and photos[0].get('rover'):
+                    conn.execute('UPDATE rovers SET info = ? WHERE id = ?',
+                                 (json.dumps(photos[0]['rover'], separators=(',', ':')), rover_id))
+                prefixes: Dict[str, int] = {}
+                cameras = set()
+                rows = []
+                for photo in photos:
+                    camera = photo.get('camera') or {}
+                    if camera.get('id') not in cameras:
+                        cameras.add(camera.get('id'))
+                        conn.execute('INSERT OR IGNORE INTO cameras (id, rover, name, full_name) VALUES (?, ?, ?, ?)',
+                                     (camera.get('id'), rover_id, camera.get('name'), camera.get('full_name')))
+                    img_src = photo.get('img_src') or ''
+                    prefix, _, file = img_src.rpartition('/')
+                    prefix += '/' if _ else ''
+                    prefix_id = prefixes.get(prefix)
+                    if prefix_id is None:
+                        conn.execute('INSERT OR IGNORE INTO prefixes (prefix) VALUES (?)', (prefix,))
+                        prefix_id = prefixes[prefix] = conn.execute(
+                            'SELECT id FROM prefixes WHERE prefix = ?', (prefix,)).fetchone()[0]
+                    rows.append((photo['id'], rover_id, photo.get('sol'), camera.get('id'),
+                                 photo.get('earth_date') or '', prefix_id, file))
+                conn.executemany('INSERT OR REPLACE INTO photos VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+                if synced_sol is not None:
+                    synced_date = conn.execute('SELECT MAX(earth_date) FROM photos WHERE rover = ? AND sol <= ?',
+                                               (rover_id, synced_sol)).fetchone()[0] or ''
+                    conn.execute('UPDATE rovers SET synced_sol = ?, synced_date = ? WHERE id = ?',
+                                 (synced_sol, synced_date, rover_id))
+
+    def photos(self, rover: str, sol: Optional[int] = None, earth_date: Optional[str] = None,
+               start_sol: Optional[int] = None, end_sol: Optional[int] = None, camera: Optional[str] = None,
+               page: Optional[int] = None, limit: Optional[int] = None, page_size: int = 25) -> List[Dict[str, Any]]:
+        """
+        Photos of a sol, Earth date or sol range in the API format
+
+        page selects one page of page_size photos (1-based); otherwise up to
+        limit photos are returned. Photos are ordered by sol and id.
+        """
+        row = self._rover(rover)
+        if row is None:
+            return []
+        sql, params = self._filter(row['id'], sol, earth_date, start_sol, end_sol, [camera] if camera else None)
+        sql += ' ORDER BY photos.sol, photos.id'
+        if page is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [page_size, (page - 1) * page_size]
+        elif limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(_PHOTO_QUERY + sql, params).fetchall()
+
+        rover_info = json.loads(row['info'])
+        return [{
+            'id': photo['id'],
+            'sol': photo['sol'],
+            'camera': {'id': photo['camera_id'], 'name': photo['camera'], 'rover_id': rover_info.get('id'),
+                       'full_name': photo['camera_full_name']},
+            'img_src': photo['img_src'],
+            'earth_date': photo['earth_date'],
+            'rover': rover_info
+        } for photo in rows]
+
+    def query(self, rover: str, start_sol: Optional[int] = None, end_sol: Optional[int] = None,
+              cameras: Optional[List[str]] = None, start_date: Optional[str] = None,
+              end_date: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        """Compact photo records (id, sol, camera, earth_date, img_src) matching the filters"""
+        row = self._rover(rover)
+        if row is None:
+            return {"total": 0, "photos": []}
+        sql, params = self._filter(row['id'], None, None, start_sol, end_sol, cameras, start_date, end_date)
+        with self._lock:
+            total = self._conn.execute('SELECT COUNT(*) FROM photos JOIN cameras ON cameras.id = photos.camera'
+                                       + sql, params).fetchone()[0]
+            rows = self._conn.execute(_PHOTO_QUERY + sql + ' ORDER BY photos.sol, photos.id LIMIT ? OFFSET ?',
+                                      params + [limit, offset]).fetchall()
+        return {
+            "total": total,
+            "synced_sol": row['synced_sol'],
+            "photos": [{'id': photo['id'], 'sol': photo['sol'], 'camera': photo['camera'],
+                        'earth_date': photo['earth_date'], 'img_src': photo['img_src']} for photo in rows]
+        }
+
+    def _filter(self, rover_id: int, sol: Optional[int], earth_date: Optional[str], start_sol: Optional[int],
+                end_sol: Optional[int], cameras: Optional[List[str]], start_date: Optional[str] = None,
+                end_date: Optional[str] = None):
+        sql = ' WHERE photos.rover = ?'
+        params: List[Any] = [rover_id]
+        for clause, value in (('photos.sol = ?', sol), ('photos.earth_date = ?', earth_date),
+                              ('photos.sol >= ?', start_sol), ('photos.sol <= ?', end_sol),
+                              ('photos.earth_date >= ?', start_date), ('photos.earth_date <= ?', end_date)):
+            if value is not None:
+                sql += ' AND ' + clause
+                params.append(value)
+        if cameras:
+            sql += ' AND cameras.name IN (%s)' % ','.join('?' * len(cameras))
+            params.extend(camera.upper() for camera in cameras)
+        return sql, params
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT rovers.name, rovers.synced_sol, rovers.synced_date, COUNT(photos.id) AS photos '
+                'FROM rovers LEFT JOIN photos ON photos.rover = rovers.id GROUP BY rovers.id'
+            ).fetchall()
+        return {row['name']: {'synced_sol': row['synced_sol'], 'synced_date': row['synced_date'] or None,
+                              'photos': row['photos']} for row in rows}
+
+    def sync(self, client, rovers: Optional[List[str]] = None, max_sols: Optional[int] = None,
+             batch_sols: int = 50) -> Dict[str, Any]:
+        """
+        Index sols after each rover's checkpoint, up to its manifest's max_sol
+
+        Sols are fetched in batches through client.get_photos_by_sol_range,
+        which only requests pages the manifest says hold photos. Each batch
+        is written together with the checkpoint, so an interrupted sync
+        resumes where it stopped. For active rovers the checkpoint stays
+        ACTIVE_TAIL_SOLS behind max_sol so late downlinks are picked up.
+        max_sols bounds the number of sols covered per rover by one call.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return {"error": "A sync of the rover photo index is already running"}
+        try:
+            results = {}
+            for rover in rovers or client.rovers:
+                results[rover] = self._sync_rover(client, rover.lower(), max_sols, batch_sols)
+            return results
+        finally:
+            self._sync_lock.release()
+
+    def _sync_rover(self, client, rover: str, max_sols: Optional[int], batch_sols: int) -> Dict[str, Any]:
+        manifest = client.get_manifest(rover)
+        if "error" in manifest:
+            return {"error": manifest["error"]}
+        max_sol = (manifest.get('photo_manifest') or {}).get('max_sol')
+        if not isinstance(max_sol, int):
+            return {"error": f"The {rover} manifest has no max_sol"}
+        complete_through = max_sol if rover in RETIRED_ROVERS else max_sol - ACTIVE_TAIL_SOLS
+
+        start = self.synced_sol(rover) + 1
+        end = max_sol if max_sols is None else min(max_sol, start + max_sols - 1)
+        indexed = 0
+        while start <= end:
+            batch_end = min(end, start + batch_sols - 1)
+            result = client.get_photos_by_sol_range(rover, start, batch_end, limit=None)
+            if "error" in result:
+                return {"error": result["error"], "indexed_photos": indexed, "synced_sol": self.synced_sol(rover)}
+            photos = result['photos']
+            checkpoint = batch_end
+            if result['errors']:
+                # Keep only the sols before the first failed page
+                checkpoint = min(error['sol'] for error in result['errors']) - 1
+                photos = [photo for photo in photos if photo['sol'] <= checkpoint]
+            self.upsert(rover, photos, max(min(checkpoint, complete_through), self.synced_sol(rover)))
+            indexed += len(photos)
+            logger.info("Rover photo index for %s fetched sols %d-%d (%d photos)", rover, start, checkpoint, indexed)
+            if result['errors']:
+                return {"error": result['errors'][0]['error'], "indexed_photos": indexed,
+                        "synced_sol": self.synced_sol(rover)}
+            start = batch_end + 1
+
+        return {"indexed_photos": indexed, "synced_sol": self.synced_sol(rover), "max_sol": max_sol}
+
+    def start_periodic_sync(self, client, interval_hours: float = 24) -> threading.Thread:
+        """Run sync now and then every interval_hours on a daemon thread"""
+        def run():
+            while True:
+                try:
+                    results = self.sync(client)
+                    if isinstance(results.get("error"), str):
+                        results = {'all rovers': results}
+                    for rover, result in results.items():
+                        if "error" in result:
+                            logger.warning("Rover photo index sync of %s stopped: %s", rover, result["error"])
+                except Exception as e:
+                    logger.error("Rover photo index sync failed: %s", e)
+                time.sleep(interval_hours * 3600)
+
+        thread = threading.Thread(target=run, name='nasa-rover-index-sync', daemon=True)
+        thread.start()
+        return thread
+
+
+_index: Optional[RoverPhotoIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_rover_photo_index() -> Optional[RoverPhotoIndex]:
+    """Get the local rover photo index, or None if ROVER_INDEX_PATH is not set"""
+    global _index
+    path = get_config().get_rover_index_config()['path']
+    if not path:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = RoverPhotoIndex(path)
+        return _index
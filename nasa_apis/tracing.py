@@ -0,0 +1,297 @@
+"""
+Lightweight distributed tracing for MCP tools, client methods and HTTP attempts
+"""
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+import requests
+
+from config import get_config
+
+
+logger = logging.getLogger(__name__)
+
+# Span currently active in this thread/task; asyncio tasks inherit it automatically
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('nasa_current_span', default=None)
+
+
+class Span:
+    """A single timed operation within a trace"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'sampled',
+                 'start_time', '_start', 'duration', 'status', 'attributes')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.sampled = sampled
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.status = 'ok'
+        self.attributes = dict(attributes) if attributes else {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def record_error(self, message: str) -> None:
+        self.status = 'error'
+        self.attributes['error'] = message
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'duration_ms': round((self.duration or 0.0) * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+
+class _NoopSpan:
+    """Stand-in span used when tracing is disabled"""
+
+    trace_id = None
+    span_id = None
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_error(self, message: str) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class FileSpanExporter:
+    """Appends finished spans to a local JSON Lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + '\n')
+
+
+class CollectorSpanExporter:
+    """Posts batches of finished spans as JSON to a collector URL"""
+
+    def __init__(self, url: str, timeout: float = 5):
+        self.url = url
+        self.timeout = timeout
+        # Plain session so exporting is never traced or timed itself
+        self.session = requests.Session()
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        response = self.session.post(self.url, json={'spans': spans}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class BatchSpanProcessor:
+    """Queues finished spans and exports them in batches from a background thread"""
+
+    def __init__(self, exporter, max_queue_size: int = 2048, batch_size: int = 128,
+                 flush_interval: float = 2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._run, name='nasa-span-exporter', daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        """Queue a finished span; drops it rather than blocking when the queue is full"""
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            batch.append(item)
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._export(batch)
+            if stop:
+                return
+
+    def _export(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning("Failed to export %d spans: %s", len(batch), e)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Flush queued spans and stop the export thread"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class Tracer:
+    """Creates spans and hands finished, sampled spans to a processor"""
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 1.0, processor=None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.processor = processor
+
+    def _new_span(self, name: str, attributes: Optional[Dict[str, Any]]) -> Span:
+        parent = _current_span.get()
+        if parent is None:
+            return Span(name, f"{random.getrandbits(128):032x}", None,
+                        random.random() < self.sample_rate, attributes)
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+
+    @contextmanager
+    def start_span(self, name: str, **attributes) -> Iterator[Any]:
+        """
+        Start a span as a child of the current span
+
+        Root spans make the sampling decision for their whole trace.
+        """
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+
+        span = self._new_span(name, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            if span.sampled and self.processor is not None:
+                self.processor.on_end(span)
+
+    def record_span(self, name: str, start_time: float, duration: float,
+                    attributes: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """Record an already finished operation as a child of the current span"""
+        if not self.enabled:
+            return
+
+        span = self._new_span(name, attributes)
+        span.start_time = start_time
+        span.duration = duration
+        if error:
+            span.record_error(error)
+        if span.sampled and self.processor is not None:
+            self.processor.on_end(span)
+
+    def shutdown(self) -> None:
+        if self.processor is not None:
+            self.processor.shutdown()
+
+
+def _create_tracer() -> Tracer:
+    tracing_config = get_config().get_tracing_config()
+    if not tracing_config['enabled']:
+        return Tracer(enabled=False)
+
+    if tracing_config['export_url']:
+        exporter = CollectorSpanExporter(tracing_config['export_url'])
+    else:
+        exporter = FileSpanExporter(tracing_config['export_file'])
+
+    tracer = Tracer(True, tracing_config['sample_rate'], BatchSpanProcessor(exporter))
+    atexit.register(tracer.shutdown)
+    return tracer
+
+
+# Global tracer instance
+tracer = _create_tracer()
+
+
+def get_tracer() -> Tracer:
+    """Get global tracer instance"""
+    return tracer
+
+
+def get_current_span():
+    """Get the active span, or a no-op span outside of any trace"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def traced(name: str) -> Callable:
+    """Decorator running a synchronous function inside a span"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.start_span(name) as span:
+                result = func(*args, **kwargs)
+                if isinstance(result, dict) and 'error' in result:
+                    span.record_error(str(result['error']))
+                return result
+        return wrapper
+    return decorator
+
+
+def bind_context(func: Callable) -> Callable:
+    """
+    Bind func to a copy of the current context
+
+    Use this when handing work to another thread (e.g. an executor) so that
+    spans created there stay in the caller's trace.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return run
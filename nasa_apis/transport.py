@@ -0,0 +1,194 @@
+"""
+HTTP transport with per-phase request timing
+"""
+import socket
+import time
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+
+# Phases recorded for every request, in the order they happen
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'body', 'decode')
+
+# Timing record of the request currently being sent on this thread/task
+_current_timing: ContextVar[Optional[Dict[str, Any]]] = ContextVar('nasa_request_timing', default=None)
+
+
+def new_timing(url: str) -> Dict[str, Any]:
+    """Create an empty timing record for a request to url"""
+    timing = {
+        'host': urlsplit(url).hostname or '',
+        'start_time': time.time(),
+        'elapsed': 0.0,
+        'status': None,
+        'reused_connection': True,
+        'bytes': 0,
+        'wire_bytes': None,
+        'error': None
+    }
+    for phase in PHASES:
+        timing[phase] = 0.0
+    return timing
+
+
+class _TimedConnectionMixin:
+    """Records DNS and TCP connect time of new connections into the current timing record"""
+
+    def _new_conn(self) -> socket.socket:
+        timing = _current_timing.get()
+        if timing is None:
+            return super()._new_conn()
+
+        timing['reused_connection'] = False
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except (UnicodeError, ValueError):
+            # Let urllib3 report malformed host names the usual way
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timing['dns'] = resolved - start
+
+        # Connect to the resolved addresses in order, as urllib3 would
+        dns_host = self._dns_host
+        error = None
+        try:
+            for _, _, _, _, sockaddr in addresses:
+                self._dns_host = sockaddr[0]
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    error = e
+            else:
+                if error is None:
+                    error = NewConnectionError(self, "Failed to establish a new connection: getaddrinfo returns an empty list")
+                raise error
+        finally:
+            self._dns_host = dns_host
+
+        timing['connect'] = time.perf_counter() - resolved
+        return sock
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    """HTTP connection with DNS/connect timing"""
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    """HTTPS connection with DNS/connect/TLS timing"""
+
+    def connect(self) -> None:
+        timing = _current_timing.get()
+        start = time.perf_counter()
+        super().connect()
+        if timing is not None:
+            elapsed = time.perf_counter() - start
+            timing['tls'] = max(0.0, elapsed - timing['dns'] - timing['connect'])
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """requests adapter whose connection pools record per-phase timings"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+
+
+def create_session() -> requests.Session:
+    """Create a requests session that records per-phase timings"""
+    session = requests.Session()
+    adapter = TimedHTTPAdapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Chunk size used when streaming response bodies
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def send(session: requests.Session, url: str, params: Optional[Dict[str, Any]],
+         timeout: float, timing: Dict[str, Any], read_body: bool = True) -> requests.Response:
+    """
+    Send a GET request and read its body, filling in timing
+
+    Connection setup phases are recorded by the timed connection classes,
+    TTFB is the remaining time until the response headers arrive and body
+    is the time spent downloading the response content. With read_body
+    False the body is left unread, to be streamed with iter_body.
+    """
+    token = _current_timing.set(timing)
+    start = time.perf_counter()
+    try:
+        response = session.get(url, params=params, timeout=timeout, stream=True)
+        headers_at = time.perf_counter()
+        timing['status'] = response.status_code
+        timing['ttfb'] = max(0.0, headers_at - start - timing['dns'] - timing['connect'] - timing['tls'])
+
+        if read_body:
+            timing['bytes'] = len(response.content)
+            timing['body'] = time.perf_counter() - headers_at
+    finally:
+        _current_timing.reset(token)
+        timing['elapsed'] = time.perf_counter() - start
+
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit():
+        timing['wire_bytes'] = int(content_length)
+    return response
+
+
+def iter_body(response: requests.Response, timing: Dict[str, Any],
+              chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Stream the body of a response sent with read_body=False in chunks
+
+    Bytes and download time are added to timing as the chunks are read;
+    the connection is released when the body is exhausted or the
+    iterator is closed.
+    """
+    start = time.perf_counter()
+    try:
+        for chunk in response.iter_content(chunk_size):
+            timing['bytes'] += len(chunk)
+            yield chunk
+    finally:
+        response.close()
+        elapsed = time.perf_counter() - start
+        timing['body'] += elapsed
+        timing['elapsed'] += elapsed
+
+
+def decode_json(response: requests.Response, timing: Dict[str, Any]) -> Any:
+    """Decode a JSON response body, recording the decode time"""
+    start = time.perf_counter()
+    try:
+        return response.json()
+    except ValueError:
+        timing['error'] = 'decode'
+        raise
+    finally:
+        timing['decode'] = time.perf_counter() - start
+        timing['elapsed'] += timing['decode']
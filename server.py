@@ -1,6 +1,19 @@
+import asyncio
+
 from mcp.server.fastmcp import FastMCP
 from app import NASAAPIManager
-from typing import Optional
+from nasa_apis.apod_archive import get_apod_archive
+from nasa_apis.flight_recorder import get_flight_recorder, install_signal_handler
+from nasa_apis.instrumentation import instrument_tool
+from nasa_apis.metrics import get_metrics
+from nasa_apis.neo_analytics import analyze_close_approaches
+from nasa_apis.neo_store import get_neo_store
+from nasa_apis.orbits import propagate_asteroids
+from nasa_apis.profiling import get_profiler
+from nasa_apis.rover_index import get_rover_photo_index
+from nasa_apis.eonet_store import get_eonet_store
+from config import get_config
+from typing import List, Optional
 
 # Initialize MCP server
 mcp = FastMCP("nasa-apis-mcp")
@@ -8,8 +21,16 @@ mcp = FastMCP("nasa-apis-mcp")
 # Initialize NASA API Manager
 nasa_manager = NASAAPIManager()
 
+
+def tool():
+    """Register an MCP tool wrapped with request instrumentation"""
+    def decorator(func):
+        return mcp.tool()(instrument_tool(func))
+    return decorator
+
+
 # APOD Tools
-@mcp.tool()
+@tool()
 async def get_astronomy_picture_of_the_day(api_key: str = "DEMO_KEY", date: Optional[str] = None, hd: bool = True) -> dict:
     """
     Get NASA's Astronomy Picture of the Day.
@@ -25,7 +46,7 @@ async def get_astronomy_picture_of_the_day(api_key: str = "DEMO_KEY", date: Opti
     api = nasa_manager.apod if api_key == nasa_manager.api_key else nasa_manager.apod.__class__(api_key)
     return api.get_picture_of_the_day(date, hd)
 
-@mcp.tool()
+@tool()
 async def get_apod_date_range(api_key: str = "DEMO_KEY", start_date: str = "", end_date: str = "") -> dict:
     """
     Get APOD pictures for a date range.
@@ -36,12 +57,14 @@ async def get_apod_date_range(api_key: str = "DEMO_KEY", start_date: str = "", e
         end_date: End date in YYYY-MM-DD format
 
     Returns:
-        List of APOD data for the specified date range
+        List of APOD data for the specified date range; if more than 366 uncached days
+        are needed or some chunks fail, a dictionary with the pictures, a next_start_date
+        to continue from and per-chunk errors
     """
     api = nasa_manager.apod if api_key == nasa_manager.api_key else nasa_manager.apod.__class__(api_key)
     return api.get_pictures_by_date_range(start_date, end_date)
 
-@mcp.tool()
+@tool()
 async def get_random_apod(api_key: str = "DEMO_KEY", count: int = 1) -> dict:
     """
     Get random APOD pictures.
@@ -56,24 +79,71 @@ async def get_random_apod(api_key: str = "DEMO_KEY", count: int = 1) -> dict:
     api = nasa_manager.apod if api_key == nasa_manager.api_key else nasa_manager.apod.__class__(api_key)
     return api.get_random_pictures(count)
 
+@tool()
+async def search_apod(query: str, limit: int = 20, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None, media_type: Optional[str] = None) -> dict:
+    """
+    Full-text search over APOD titles and explanations in the local archive mirror.
+
+    Args:
+        query: Words to search for (all must match, e.g. "crab nebula")
+        limit: Maximum number of results
+        start_date: Only entries on or after this date (YYYY-MM-DD, optional)
+        end_date: Only entries on or before this date (YYYY-MM-DD, optional)
+        media_type: Only entries of this media type (image or video, optional)
+
+    Returns:
+        Dictionary containing matching entries with date, title, URL and a text snippet
+    """
+    archive = get_apod_archive()
+    if archive is None:
+        return {"error": "APOD archive mirror is not configured (set APOD_ARCHIVE_PATH)"}
+    if archive.count() == 0:
+        return {"error": "APOD archive mirror is empty; run sync_apod_archive first"}
+
+    results = archive.search(query, limit, start_date, end_date, media_type)
+    return {"count": len(results), "results": results}
+
+@tool()
+async def sync_apod_archive(api_key: str = "DEMO_KEY", max_days: Optional[int] = 365) -> dict:
+    """
+    Mirror APOD entries newer than the last sync into the local archive.
+    Call again to continue; the sync is checkpointed after every batch.
+
+    Args:
+        api_key: NASA API key
+        max_days: Maximum number of days to sync in this call (None for all missing days)
+
+    Returns:
+        Dictionary containing the number of synced entries and the new sync checkpoint
+    """
+    archive = get_apod_archive()
+    if archive is None:
+        return {"error": "APOD archive mirror is not configured (set APOD_ARCHIVE_PATH)"}
+
+    api = nasa_manager.apod if api_key == nasa_manager.api_key else nasa_manager.apod.__class__(api_key)
+    return await asyncio.to_thread(archive.sync, api, max_days)
+
 # Asteroids Tools
-@mcp.tool()
+@tool()
 async def get_asteroid_feed(api_key: str = "DEMO_KEY", start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
     """
     Get asteroids approaching Earth within date range.
+    Ranges longer than 8 days are fetched in concurrent 8-day chunks and merged.
 
     Args:
         api_key: NASA API key
         start_date: Start date in YYYY-MM-DD format (optional)
-        end_date: End date in YYYY-MM-DD format (optional)
+        end_date: End date in YYYY-MM-DD format (optional, defaults to 7 days from start)
 
     Returns:
-        Dictionary containing asteroid feed data
+        Dictionary containing asteroid feed data; ranges over 92 days are truncated
+        and give a next_start_date to continue from
     """
     api = nasa_manager.asteroids if api_key == nasa_manager.api_key else nasa_manager.asteroids.__class__(api_key)
     return api.get_feed(start_date, end_date)
 
-@mcp.tool()
+@tool()
 async def get_asteroid_by_id(api_key: str = "DEMO_KEY", asteroid_id: str = "") -> dict:
     """
     Get specific asteroid details by ID.
@@ -88,7 +158,24 @@ async def get_asteroid_by_id(api_key: str = "DEMO_KEY", asteroid_id: str = "") -
     api = nasa_manager.asteroids if api_key == nasa_manager.api_key else nasa_manager.asteroids.__class__(api_key)
     return api.get_asteroid_by_id(asteroid_id)
 
-@mcp.tool()
+@tool()
+async def get_asteroids_by_ids(api_key: str = "DEMO_KEY", asteroid_ids: Optional[List[str]] = None,
+                               fields: Optional[List[str]] = None) -> dict:
+    """
+    Get many asteroids by ID in one call; duplicates are fetched once and cached asteroids are served locally.
+
+    Args:
+        api_key: NASA API key
+        asteroid_ids: NASA JPL asteroid database IDs
+        fields: Fields to keep per asteroid (optional); besides top-level fields, "orbital_summary" and "approach_summary" give compact summaries
+
+    Returns:
+        Dictionary containing asteroids keyed by ID and per-ID errors
+    """
+    api = nasa_manager.asteroids if api_key == nasa_manager.api_key else nasa_manager.asteroids.__class__(api_key)
+    return api.get_asteroids_by_ids(asteroid_ids or [], fields)
+
+@tool()
 async def browse_asteroids(api_key: str = "DEMO_KEY", page: int = 0, size: int = 20) -> dict:
     """
     Browse all asteroids in NASA database.
@@ -104,7 +191,7 @@ async def browse_asteroids(api_key: str = "DEMO_KEY", page: int = 0, size: int =
     api = nasa_manager.asteroids if api_key == nasa_manager.api_key else nasa_manager.asteroids.__class__(api_key)
     return api.browse_asteroids(page, size)
 
-@mcp.tool()
+@tool()
 async def get_asteroid_statistics(api_key: str = "DEMO_KEY") -> dict:
     """
     Get Near Earth Object statistics.
@@ -118,8 +205,107 @@ async def get_asteroid_statistics(api_key: str = "DEMO_KEY") -> dict:
     api = nasa_manager.asteroids if api_key == nasa_manager.api_key else nasa_manager.asteroids.__class__(api_key)
     return api.get_statistics()
 
+@tool()
+async def crawl_neo_catalog(api_key: str = "DEMO_KEY", max_pages: Optional[int] = 50, refresh: bool = False) -> dict:
+    """
+    Crawl the NeoWs browse catalog into the local NEO store, resuming where the last crawl stopped.
+    Call again to continue; the crawl is checkpointed after every batch.
+
+    Args:
+        api_key: NASA API key
+        max_pages: Maximum number of browse pages to fetch in this call (None for all remaining pages)
+        refresh: Start a new pass over the whole catalog, updating stored asteroids
+
+    Returns:
+        Dictionary containing crawl progress (crawled and remaining pages, stored asteroids)
+    """
+    store = get_neo_store()
+    if store is None:
+        return {"error": "NEO catalog store is not configured (set NEO_STORE_PATH)"}
+
+    api = nasa_manager.asteroids if api_key == nasa_manager.api_key else nasa_manager.asteroids.__class__(api_key)
+    return await asyncio.to_thread(store.crawl, api, max_pages, refresh=refresh)
+
+@tool()
+async def query_neo_catalog(hazardous: Optional[bool] = None, min_diameter_km: Optional[float] = None,
+                            max_diameter_km: Optional[float] = None, min_magnitude: Optional[float] = None,
+                            max_magnitude: Optional[float] = None, orbit_class: Optional[str] = None,
+                            approach_after: Optional[str] = None, approach_before: Optional[str] = None,
+                            sort_by: str = "diameter", descending: bool = True, limit: int = 50) -> dict:
+    """
+    Filter and sort the local NEO catalog store without upstream requests.
+
+    Args:
+        hazardous: Only potentially hazardous (true) or non-hazardous (false) asteroids (optional)
+        min_diameter_km: Minimum mean estimated diameter in km (optional)
+        max_diameter_km: Maximum mean estimated diameter in km (optional)
+        min_magnitude: Minimum absolute magnitude H (optional)
+        max_magnitude: Maximum absolute magnitude H (optional)
+        orbit_class: Orbit class, e.g. APO, ATE, AMO, IEO (optional)
+        approach_after: Next Earth approach on or after this date (YYYY-MM-DD, optional)
+        approach_before: Next Earth approach on or before this date (YYYY-MM-DD, optional)
+        sort_by: diameter, absolute_magnitude, next_approach, miss_distance, velocity or name
+        descending: Sort in descending order
+        limit: Maximum number of results
+
+    Returns:
+        Dictionary containing the number of matches and the first matching asteroids
+    """
+    store = get_neo_store()
+    if store is None:
+        return {"error": "NEO catalog store is not configured (set NEO_STORE_PATH)"}
+    if len(store) == 0:
+        return {"error": "NEO catalog store is empty; run crawl_neo_catalog first"}
+
+    return store.query(hazardous, min_diameter_km, max_diameter_km, min_magnitude, max_magnitude,
+                       orbit_class, approach_after, approach_before, sort_by, descending, limit)
+
+@tool()
+async def analyze_asteroid_approaches(api_key: str = "DEMO_KEY", source: str = "feed", start_date: Optional[str] = None,
+                                      end_date: Optional[str] = None, asteroid_ids: Optional[List[str]] = None,
+                                      orbiting_body: Optional[str] = "Earth", top_n: int = 10) -> dict:
+    """
+    Summarize asteroid close approaches instead of returning raw NeoWs data.
+
+    Args:
+        api_key: NASA API key
+        source: "feed" (asteroid feed over the date range), "store" (next approach of every asteroid in the local NEO catalog) or "asteroids" (all recorded approaches of asteroid_ids)
+        start_date: Start date in YYYY-MM-DD format (optional)
+        end_date: End date in YYYY-MM-DD format (optional)
+        asteroid_ids: NeoWs asteroid IDs (for the "asteroids" source)
+        orbiting_body: Only approaches to this body (for the "asteroids" source, default Earth)
+        top_n: Number of objects in the closest approach and size-to-distance rankings
+
+    Returns:
+        Dictionary containing closest approaches, miss distance and velocity distributions, hazardous objects per date and the top objects by size-to-distance ratio
+    """
+    api = nasa_manager.asteroids if api_key == nasa_manager.api_key else nasa_manager.asteroids.__class__(api_key)
+    return analyze_close_approaches(api, source, start_date, end_date, asteroid_ids, orbiting_body, top_n)
+
+@tool()
+async def propagate_asteroid_orbits(api_key: str = "DEMO_KEY", asteroid_ids: Optional[List[str]] = None,
+                                    start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                    step_days: float = 1.0, include_positions: bool = False, top_n: int = 20) -> dict:
+    """
+    Propagate asteroid orbits locally (two-body Keplerian) and report their distance from Earth over a date grid.
+
+    Args:
+        api_key: NASA API key
+        asteroid_ids: NeoWs asteroid IDs (optional, defaults to every asteroid in the local NEO catalog)
+        start_date: Start date in YYYY-MM-DD format (optional, defaults to today)
+        end_date: End date in YYYY-MM-DD format (optional, defaults to 30 days from start)
+        step_days: Grid spacing in days
+        include_positions: Include heliocentric positions (AU) and Earth distance at every epoch
+        top_n: Number of asteroids returned, closest to Earth first
+
+    Returns:
+        Dictionary containing the closest Earth distance and its date for each asteroid
+    """
+    api = nasa_manager.asteroids if api_key == nasa_manager.api_key else nasa_manager.asteroids.__class__(api_key)
+    return propagate_asteroids(api, asteroid_ids, start_date, end_date, step_days, include_positions, top_n)
+
 # Mars Weather Tool
-@mcp.tool()
+@tool()
 async def get_mars_weather_data(api_key: str = "DEMO_KEY") -> dict:
     """
     Get the latest Mars weather data from NASA InSight Weather API.
@@ -133,10 +319,29 @@ async def get_mars_weather_data(api_key: str = "DEMO_KEY") -> dict:
     api = nasa_manager.mars_weather if api_key == nasa_manager.api_key else nasa_manager.mars_weather.__class__(api_key)
     return api.get_weather()
 
+@tool()
+async def get_mars_weather_history(api_key: str = "DEMO_KEY", start_sol: Optional[int] = None,
+                                   end_sol: Optional[int] = None, aggregate: bool = False) -> dict:
+    """
+    Get InSight Mars weather for a range of sols, or min/max/mean across them. Served locally after the first call.
+
+    Args:
+        api_key: NASA API key
+        start_sol: First sol (optional, defaults to the first available)
+        end_sol: Last sol (optional, defaults to the last available)
+        aggregate: Return min/max/mean of temperature, pressure and wind speed across the sols
+
+    Returns:
+        Dictionary containing the weather of each sol, or aggregates across the range
+    """
+    api = nasa_manager.mars_weather if api_key == nasa_manager.api_key else nasa_manager.mars_weather.__class__(api_key)
+    return api.get_weather_history(start_sol, end_sol, aggregate)
+
 # Mars Rover Tools
-@mcp.tool()
+@tool()
 async def get_mars_rover_photos_by_sol(api_key: str = "DEMO_KEY", rover: str = "curiosity",
-                                      sol: int = 1000, camera: Optional[str] = None, page: int = 1) -> dict:
+                                      sol: int = 1000, camera: Optional[str] = None, page: int = 1,
+                                      compact: bool = False) -> dict:
     """
     Get Mars rover photos by Martian sol (day).
 
@@ -146,16 +351,18 @@ async def get_mars_rover_photos_by_sol(api_key: str = "DEMO_KEY", rover: str = "
         sol: Martian sol number
         camera: Camera name (optional)
         page: Page number for pagination
+        compact: List rover and camera objects once and reference them from each photo
 
     Returns:
         Dictionary containing rover photos
     """
     api = nasa_manager.mars_rover if api_key == nasa_manager.api_key else nasa_manager.mars_rover.__class__(api_key)
-    return api.get_photos_by_sol(rover, sol, camera, page)
+    return api.get_photos_by_sol(rover, sol, camera, page, compact)
 
-@mcp.tool()
+@tool()
 async def get_mars_rover_photos_by_date(api_key: str = "DEMO_KEY", rover: str = "curiosity",
-                                       earth_date: str = "2023-01-01", camera: Optional[str] = None, page: int = 1) -> dict:
+                                       earth_date: str = "2023-01-01", camera: Optional[str] = None, page: int = 1,
+                                       compact: bool = False) -> dict:
     """
     Get Mars rover photos by Earth date.
 
@@ -165,29 +372,56 @@ async def get_mars_rover_photos_by_date(api_key: str = "DEMO_KEY", rover: str =
         earth_date: Earth date in YYYY-MM-DD format
         camera: Camera name (optional)
         page: Page number for pagination
+        compact: List rover and camera objects once and reference them from each photo
 
     Returns:
         Dictionary containing rover photos
     """
     api = nasa_manager.mars_rover if api_key == nasa_manager.api_key else nasa_manager.mars_rover.__class__(api_key)
-    return api.get_photos_by_earth_date(rover, earth_date, camera, page)
+    return api.get_photos_by_earth_date(rover, earth_date, camera, page, compact)
+
+@tool()
+async def collect_mars_rover_photos(api_key: str = "DEMO_KEY", rover: str = "curiosity", sol: Optional[int] = None,
+                                    earth_date: Optional[str] = None, cameras: Optional[List[str]] = None,
+                                    limit: int = 100, read_ahead: Optional[int] = None,
+                                    compact: bool = False) -> dict:
+    """
+    Collect Mars rover photos of a sol or Earth date across all pages (and cameras) in one call.
+
+    Args:
+        api_key: NASA API key
+        rover: Rover name
+        sol: Martian sol number (either sol or earth_date)
+        earth_date: Earth date in YYYY-MM-DD format
+        cameras: Camera names (optional, defaults to all cameras)
+        limit: Maximum number of photos to return
+        read_ahead: Pages requested ahead of the one being read (optional)
+        compact: List rover and camera objects once and reference them from each photo
+
+    Returns:
+        Dictionary containing the photos and the number of photos per camera
+    """
+    api = nasa_manager.mars_rover if api_key == nasa_manager.api_key else nasa_manager.mars_rover.__class__(api_key)
+    return await api.collect_photos(rover, sol, earth_date, cameras, limit, read_ahead, compact)
 
-@mcp.tool()
-async def get_mars_rover_latest_photos(api_key: str = "DEMO_KEY", rover: str = "curiosity") -> dict:
+@tool()
+async def get_mars_rover_latest_photos(api_key: str = "DEMO_KEY", rover: str = "curiosity",
+                                       compact: bool = False) -> dict:
     """
     Get latest photos from Mars rover.
 
     Args:
         api_key: NASA API key
         rover: Rover name
+        compact: List rover and camera objects once and reference them from each photo
 
     Returns:
         Dictionary containing latest rover photos
     """
     api = nasa_manager.mars_rover if api_key == nasa_manager.api_key else nasa_manager.mars_rover.__class__(api_key)
-    return api.get_latest_photos(rover)
+    return api.get_latest_photos(rover, compact)
 
-@mcp.tool()
+@tool()
 async def get_mars_rover_manifest(api_key: str = "DEMO_KEY", rover: str = "curiosity") -> dict:
     """
     Get Mars rover mission manifest.
@@ -202,10 +436,84 @@ async def get_mars_rover_manifest(api_key: str = "DEMO_KEY", rover: str = "curio
     api = nasa_manager.mars_rover if api_key == nasa_manager.api_key else nasa_manager.mars_rover.__class__(api_key)
     return api.get_manifest(rover)
 
+@tool()
+async def get_mars_rover_photos_by_sol_range(api_key: str = "DEMO_KEY", rover: str = "curiosity", start_sol: int = 1000,
+                                             end_sol: int = 1000, camera: Optional[str] = None, limit: int = 100,
+                                             plan_only: bool = False, compact: bool = False) -> dict:
+    """
+    Get Mars rover photos across a sol range, using the cached mission manifest to request only pages that can hold photos.
+
+    Args:
+        api_key: NASA API key
+        rover: Rover name
+        start_sol: First sol
+        end_sol: Last sol
+        camera: Camera name (optional)
+        limit: Maximum number of photos to return
+        plan_only: Only return the query plan (sols with photos, page counts, minimum number of requests)
+        compact: List rover and camera objects once and reference them from each photo
+
+    Returns:
+        Dictionary containing the photos in sol order, or the query plan
+    """
+    api = nasa_manager.mars_rover if api_key == nasa_manager.api_key else nasa_manager.mars_rover.__class__(api_key)
+    if plan_only:
+        return api.plan_photo_query(rover, start_sol, end_sol, camera)
+    return api.get_photos_by_sol_range(rover, start_sol, end_sol, camera, limit, compact)
+
+@tool()
+async def query_mars_rover_photo_index(rover: str = "curiosity", start_sol: Optional[int] = None,
+                                       end_sol: Optional[int] = None, cameras: Optional[List[str]] = None,
+                                       start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                       limit: int = 100, offset: int = 0) -> dict:
+    """
+    Query the local rover photo index by sol range, Earth date range and cameras without upstream requests.
+
+    Args:
+        rover: Rover name
+        start_sol: First sol (optional)
+        end_sol: Last sol (optional)
+        cameras: Camera names (optional)
+        start_date: First Earth date in YYYY-MM-DD format (optional)
+        end_date: Last Earth date in YYYY-MM-DD format (optional)
+        limit: Maximum number of photos to return
+        offset: Number of matching photos to skip
+
+    Returns:
+        Dictionary containing the total number of matches and compact photo records (id, sol, camera, earth_date, img_src)
+    """
+    index = get_rover_photo_index()
+    if index is None:
+        return {"error": "Rover photo index is not configured (set ROVER_INDEX_PATH)"}
+    return index.query(rover, start_sol, end_sol, cameras, start_date, end_date, limit, offset)
+
+@tool()
+async def sync_mars_rover_photo_index(api_key: str = "DEMO_KEY", rover: Optional[str] = None,
+                                      max_sols: Optional[int] = 100) -> dict:
+    """
+    Index rover photo metadata for sols newer than the last sync.
+    Call again to continue; the index is checkpointed after every batch.
+
+    Args:
+        api_key: NASA API key
+        rover: Rover name (optional, defaults to all rovers)
+        max_sols: Maximum number of sols to index per rover in this call (None for all remaining sols)
+
+    Returns:
+        Dictionary containing, per rover, the number of indexed photos and the new sync checkpoint
+    """
+    index = get_rover_photo_index()
+    if index is None:
+        return {"error": "Rover photo index is not configured (set ROVER_INDEX_PATH)"}
+
+    api = nasa_manager.mars_rover if api_key == nasa_manager.api_key else nasa_manager.mars_rover.__class__(api_key)
+    return await asyncio.to_thread(index.sync, api, [rover] if rover else None, max_sols)
+
 # Earth Imagery Tools
-@mcp.tool()
+@tool()
 async def get_earth_imagery(api_key: str = "DEMO_KEY", lat: float = 29.78, lon: float = -95.33,
-                           date: Optional[str] = None, dim: float = 0.15, cloud_score: bool = False) -> dict:
+                           date: Optional[str] = None, dim: float = 0.15, cloud_score: bool = False,
+                           snap: bool = True) -> dict:
     """
     Get Earth imagery for specific coordinates.
 
@@ -216,16 +524,17 @@ async def get_earth_imagery(api_key: str = "DEMO_KEY", lat: float = 29.78, lon:
         date: Date in YYYY-MM-DD format (optional)
         dim: Image dimension in degrees (0.025 to 0.25)
         cloud_score: Calculate cloud score
+        snap: Use the image of the dim-sized grid cell holding the point, so nearby requests share the cache
 
     Returns:
-        Dictionary containing Earth imagery data
+        Dictionary describing the downloaded PNG: local path, file URI, SHA-256, size in bytes, width and height
     """
     api = nasa_manager.earth if api_key == nasa_manager.api_key else nasa_manager.earth.__class__(api_key)
-    return api.get_imagery(lat, lon, date, dim, cloud_score)
+    return api.get_imagery(lat, lon, date, dim, cloud_score, snap)
 
-@mcp.tool()
+@tool()
 async def get_earth_assets(api_key: str = "DEMO_KEY", lat: float = 29.78, lon: float = -95.33,
-                          date: Optional[str] = None, dim: float = 0.15) -> dict:
+                          date: Optional[str] = None, dim: float = 0.15, snap: bool = True) -> dict:
     """
     Get available Earth imagery assets for coordinates.
 
@@ -235,63 +544,217 @@ async def get_earth_assets(api_key: str = "DEMO_KEY", lat: float = 29.78, lon: f
         lon: Longitude
         date: Date in YYYY-MM-DD format (optional)
         dim: Search area dimension in degrees
+        snap: Search the dim-sized grid cell holding the point, so nearby requests share the cache
 
     Returns:
         Dictionary containing available assets
     """
     api = nasa_manager.earth if api_key == nasa_manager.api_key else nasa_manager.earth.__class__(api_key)
-    return api.get_assets(lat, lon, date, dim)
+    return api.get_assets(lat, lon, date, dim, snap)
+
+@tool()
+async def get_earth_batch(api_key: str = "DEMO_KEY", kind: str = "assets", points: Optional[List[List[float]]] = None,
+                          bbox: Optional[List[float]] = None, date: Optional[str] = None, dim: float = 0.15,
+                          cloud_score: bool = False, max_requests: int = 50) -> dict:
+    """
+    Get Earth assets or imagery for a list of points or every grid cell of a bounding box in one call.
+
+    Args:
+        api_key: NASA API key
+        kind: "assets" or "imagery"
+        points: [lat, lon] pairs (either points or bbox)
+        bbox: [min_lat, min_lon, max_lat, max_lon]
+        date: Date in YYYY-MM-DD format (optional)
+        dim: Grid cell size in degrees (0.025 to 0.25)
+        cloud_score: Calculate cloud score, for imagery
+        max_requests: Maximum number of upstream requests for uncached cells
+
+    Returns:
+        Dictionary containing one result per distinct grid cell, cache hit and fetch counts, and per-cell errors
+    """
+    api = nasa_manager.earth if api_key == nasa_manager.api_key else nasa_manager.earth.__class__(api_key)
+    return api.get_batch(kind, points, bbox, date, dim, cloud_score, max_requests)
 
 # EPIC Tools
-@mcp.tool()
-async def get_epic_natural_images(api_key: str = "DEMO_KEY", date: Optional[str] = None) -> dict:
+@tool()
+async def get_epic_natural_images(api_key: str = "DEMO_KEY", date: Optional[str] = None,
+                                  nearest: bool = False) -> dict:
     """
     Get natural color Earth images from EPIC.
 
     Args:
         api_key: NASA API key
         date: Date in YYYY-MM-DD format (optional)
+        nearest: If date has no imagery, use the closest date that has
 
     Returns:
         Dictionary containing natural color Earth images
     """
     api = nasa_manager.epic if api_key == nasa_manager.api_key else nasa_manager.epic.__class__(api_key)
+    if nearest:
+        return api.get_images("natural", date, nearest=True)
     return api.get_natural_images(date)
 
-@mcp.tool()
-async def get_epic_enhanced_images(api_key: str = "DEMO_KEY", date: Optional[str] = None) -> dict:
+@tool()
+async def get_epic_enhanced_images(api_key: str = "DEMO_KEY", date: Optional[str] = None,
+                                   nearest: bool = False) -> dict:
     """
     Get enhanced color Earth images from EPIC.
 
     Args:
         api_key: NASA API key
         date: Date in YYYY-MM-DD format (optional)
+        nearest: If date has no imagery, use the closest date that has
 
     Returns:
         Dictionary containing enhanced color Earth images
     """
     api = nasa_manager.epic if api_key == nasa_manager.api_key else nasa_manager.epic.__class__(api_key)
+    if nearest:
+        return api.get_images("enhanced", date, nearest=True)
     return api.get_enhanced_images(date)
 
+@tool()
+async def get_epic_available_dates(api_key: str = "DEMO_KEY", collection: str = "natural",
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+    """
+    Get the dates that have EPIC imagery, from a cached and incrementally refreshed index.
+
+    Args:
+        api_key: NASA API key
+        collection: "natural" or "enhanced"
+        start_date: First date in YYYY-MM-DD format (optional)
+        end_date: Last date in YYYY-MM-DD format (optional)
+
+    Returns:
+        Dictionary containing the first and last available dates and the available dates in the window
+    """
+    api = nasa_manager.epic if api_key == nasa_manager.api_key else nasa_manager.epic.__class__(api_key)
+    return api.get_available_dates(collection, start_date, end_date)
+
+@tool()
+async def resolve_epic_date(api_key: str = "DEMO_KEY", collection: str = "natural", date: str = "2024-01-01",
+                            direction: str = "nearest") -> dict:
+    """
+    Resolve a date to the closest date that has EPIC imagery.
+
+    Args:
+        api_key: NASA API key
+        collection: "natural" or "enhanced"
+        date: Date in YYYY-MM-DD format
+        direction: "nearest", "before" (on or before date) or "after" (on or after date)
+
+    Returns:
+        Dictionary containing the resolved date, whether it is exact and the offset in days
+    """
+    api = nasa_manager.epic if api_key == nasa_manager.api_key else nasa_manager.epic.__class__(api_key)
+    return api.resolve_date(collection, date, direction)
+
+@tool()
+async def get_epic_images_in_range(api_key: str = "DEMO_KEY", collection: str = "natural",
+                                   start_date: str = "2024-01-01", end_date: str = "2024-01-07") -> dict:
+    """
+    Get EPIC image metadata of every date with imagery in a window (at most 31 days), fetched concurrently.
+
+    Args:
+        api_key: NASA API key
+        collection: "natural" or "enhanced"
+        start_date: First date in YYYY-MM-DD format
+        end_date: Last date in YYYY-MM-DD format
+
+    Returns:
+        Dictionary containing the image metadata per available date and per-date errors
+    """
+    api = nasa_manager.epic if api_key == nasa_manager.api_key else nasa_manager.epic.__class__(api_key)
+    return api.get_images_in_range(collection, start_date, end_date)
+
+@tool()
+async def download_epic_images(api_key: str = "DEMO_KEY", start_date: Optional[str] = None,
+                               end_date: Optional[str] = None, collection: str = "natural",
+                               derivatives: Optional[List[str]] = None, max_bytes_per_second: Optional[int] = None,
+                               max_images: int = 100) -> dict:
+    """
+    Download all EPIC frames of a date or date range to the local image store, concurrently and resumably.
+
+    Args:
+        api_key: NASA API key
+        start_date: First date in YYYY-MM-DD format (optional, defaults to the most recent available date)
+        end_date: Last date in YYYY-MM-DD format (optional, defaults to start_date; at most 31 days)
+        collection: "natural" or "enhanced"
+        derivatives: Reduced-size versions to download as well: "jpg" (1024px) and/or "thumbs" (optional)
+        max_bytes_per_second: Combined download rate cap (optional, 0 for none)
+        max_images: Maximum number of files to download in this call; call again to resume
+
+    Returns:
+        Dictionary containing the local path, hash, size and dimensions of every frame, and download counts
+    """
+    api = nasa_manager.epic if api_key == nasa_manager.api_key else nasa_manager.epic.__class__(api_key)
+    return api.download_images(start_date, end_date, collection, derivatives, max_bytes_per_second, max_images)
+
 # EONET Tools
-@mcp.tool()
+@tool()
 async def get_natural_events(status: Optional[str] = None, limit: Optional[int] = None,
-                           days: Optional[int] = None, category: Optional[str] = None) -> dict:
+                           days: Optional[int] = None, category: Optional[str] = None,
+                           bbox: Optional[str] = None, tolerance: Optional[float] = None,
+                           min_interval_hours: Optional[float] = None, compact_geometry: bool = False,
+                           precision: Optional[int] = None) -> dict:
     """
     Get natural events from EONET.
 
     Args:
-        status: Event status ('open' or 'closed')
+        status: Event status ('open', 'closed' or 'all')
         limit: Limit number of events
         days: Get events from last N days
         category: Event category ID
+        bbox: Bounding box as upper-left and lower-right corners "lon,lat,lon,lat" (optional)
+        tolerance: Simplify point tracks, dropping points within this many degrees of the line (optional, e.g. 0.1)
+        min_interval_hours: Keep at most one track point per this many hours (optional)
+        compact_geometry: Return point tracks as columns (time offsets, coordinates, magnitudes)
+        precision: Decimal places of compact coordinates (optional)
 
     Returns:
-        Dictionary containing natural events
+        Dictionary containing natural events; simplified events report kept and dropped points
     """
-    return nasa_manager.eonet.get_events(status, limit, days, category)
+    return nasa_manager.eonet.get_events(status, limit, days, category, bbox=bbox, tolerance=tolerance,
+                                         min_interval_hours=min_interval_hours, compact_geometry=compact_geometry,
+                                         precision=precision)
 
-@mcp.tool()
+@tool()
+async def get_natural_event(event_id: str, tolerance: Optional[float] = None,
+                            min_interval_hours: Optional[float] = None, compact_geometry: bool = False,
+                            precision: Optional[int] = None) -> dict:
+    """
+    Get a single EONET event by ID.
+
+    Args:
+        event_id: EONET event ID (e.g. "EONET_6331")
+        tolerance: Simplify the point track, dropping points within this many degrees of the line (optional)
+        min_interval_hours: Keep at most one track point per this many hours (optional)
+        compact_geometry: Return the point track as columns (time offsets, coordinates, magnitudes)
+        precision: Decimal places of compact coordinates (optional)
+
+    Returns:
+        Dictionary containing the event; a simplified event reports kept and dropped points
+    """
+    return nasa_manager.eonet.get_event_by_id(event_id, tolerance, min_interval_hours, compact_geometry, precision)
+
+@tool()
+async def sync_eonet_event_store(full: bool = False) -> dict:
+    """
+    Update the local EONET event store with events opened, changed or closed since the last sync.
+
+    Args:
+        full: Reload every event instead of syncing incrementally
+
+    Returns:
+        Dictionary containing the number of updated and closed-out events and the store status
+    """
+    store = get_eonet_store()
+    if store is None:
+        return {"error": "EONET event store is not configured (set EONET_STORE_PATH)"}
+    return store.sync(nasa_manager.eonet, full)
+
+@tool()
 async def get_event_categories() -> dict:
     """
     Get all natural event categories from EONET.
@@ -302,7 +765,7 @@ async def get_event_categories() -> dict:
     return nasa_manager.eonet.get_categories()
 
 # DONKI Tools
-@mcp.tool()
+@tool()
 async def get_solar_flares(api_key: str = "DEMO_KEY", start_date: Optional[str] = None,
                           end_date: Optional[str] = None) -> dict:
     """
@@ -319,7 +782,7 @@ async def get_solar_flares(api_key: str = "DEMO_KEY", start_date: Optional[str]
     api = nasa_manager.donki if api_key == nasa_manager.api_key else nasa_manager.donki.__class__(api_key)
     return api.get_solar_flares(start_date, end_date)
 
-@mcp.tool()
+@tool()
 async def get_coronal_mass_ejections(api_key: str = "DEMO_KEY", start_date: Optional[str] = None,
                                    end_date: Optional[str] = None) -> dict:
     """
@@ -336,8 +799,30 @@ async def get_coronal_mass_ejections(api_key: str = "DEMO_KEY", start_date: Opti
     api = nasa_manager.donki if api_key == nasa_manager.api_key else nasa_manager.donki.__class__(api_key)
     return api.get_coronal_mass_ejections(start_date, end_date)
 
+@tool()
+async def get_space_weather_timeline(api_key: str = "DEMO_KEY", start_date: Optional[str] = None,
+                                     end_date: Optional[str] = None, event_types: Optional[str] = None,
+                                     event_id: Optional[str] = None, include_details: bool = True) -> dict:
+    """
+    Get DONKI space weather events of several types as one time-ordered timeline.
+
+    Args:
+        api_key: NASA API key
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        event_types: Comma-separated types among CME, GST, IPS, FLR, SEP, MPC, RBE, HSS (optional, defaults to all)
+        event_id: Also return the chain of events linked to this DONKI activity ID (optional)
+        include_details: Include the full DONKI record of each event
+
+    Returns:
+        Dictionary containing the merged timeline, chains of linked events (e.g. CME -> IPS -> GST)
+        and per-type errors
+    """
+    api = nasa_manager.donki if api_key == nasa_manager.api_key else nasa_manager.donki.__class__(api_key)
+    return api.get_timeline(start_date, end_date, event_types, event_id, include_details)
+
 # NASA Library Tools
-@mcp.tool()
+@tool()
 async def search_nasa_media(q: str, media_type: Optional[str] = None, year_start: Optional[str] = None,
                            year_end: Optional[str] = None, page: int = 1, page_size: int = 100) -> dict:
     """
@@ -358,7 +843,7 @@ async def search_nasa_media(q: str, media_type: Optional[str] = None, year_start
                                            year_end=year_end, page=page, page_size=page_size)
 
 # Exoplanet Tools
-@mcp.tool()
+@tool()
 async def get_confirmed_exoplanets(limit: int = 100) -> dict:
     """
     Get confirmed exoplanets.
@@ -371,7 +856,7 @@ async def get_confirmed_exoplanets(limit: int = 100) -> dict:
     """
     return nasa_manager.exoplanet.get_confirmed_planets(limit)
 
-@mcp.tool()
+@tool()
 async def search_exoplanets_by_name(planet_name: str) -> dict:
     """
     Search exoplanets by name.
@@ -384,7 +869,7 @@ async def search_exoplanets_by_name(planet_name: str) -> dict:
     """
     return nasa_manager.exoplanet.search_planets_by_name(planet_name)
 
-@mcp.tool()
+@tool()
 async def get_habitable_exoplanets(limit: int = 50) -> dict:
     """
     Get potentially habitable exoplanets.
@@ -397,5 +882,92 @@ async def get_habitable_exoplanets(limit: int = 50) -> dict:
     """
     return nasa_manager.exoplanet.get_habitable_zone_planets(limit)
 
+# Admin Tools
+@tool()
+async def get_api_metrics(reset: bool = False) -> dict:
+    """
+    Get upstream request metrics aggregated per host.
+
+    Args:
+        reset: Clear the collected metrics after reading them
+
+    Returns:
+        Dictionary containing request counts, errors, body sizes and
+        DNS/connect/TLS/TTFB/body/JSON decode timings per host, cache tier
+        sizes and, when memory accounting is enabled, per-tool peak and
+        retained allocation
+    """
+    snapshot = get_metrics().snapshot()
+    if reset:
+        get_metrics().reset()
+    return snapshot
+
+@tool()
+async def dump_flight_recorder(limit: Optional[int] = None, write_file: bool = False) -> dict:
+    """
+    Get the most recent upstream API calls from the flight recorder.
+
+    Args:
+        limit: Only return the last N calls (optional, defaults to all)
+        write_file: Also write the full buffer to the dump directory
+
+    Returns:
+        Dictionary containing recent calls with tool, endpoint, redacted params,
+        attempts, phase timings, status and bytes
+    """
+    recorder = get_flight_recorder()
+    if not recorder.enabled:
+        return {"error": "Flight recorder is disabled (FLIGHT_RECORDER_SIZE=0)"}
+
+    result = {"entries": recorder.entries(limit)}
+    if write_file:
+        result["path"] = recorder.dump("admin tool")
+    return result
+
+@tool()
+async def start_profiling(tool_name: Optional[str] = None, calls: int = 1,
+                          duration_seconds: Optional[float] = None) -> dict:
+    """
+    Start a CPU profiling session.
+
+    Args:
+        tool_name: Profile the next calls of this tool (optional)
+        calls: Number of tool calls to profile when tool_name is set
+        duration_seconds: Profile all activity for this many seconds instead
+
+    Returns:
+        Dictionary describing the started session; collapsed stacks are
+        written to the profile output directory when it ends
+    """
+    if tool_name:
+        return get_profiler().profile_tool(tool_name, calls)
+    if duration_seconds and duration_seconds > 0:
+        return get_profiler().start_window(duration_seconds)
+    return {"error": "Either tool_name or duration_seconds must be given"}
+
+@tool()
+async def stop_profiling() -> dict:
+    """
+    Stop the active CPU profiling session early.
+
+    Returns:
+        Dictionary containing the path of the collapsed-stack output file
+    """
+    return get_profiler().stop()
+
 if __name__ == "__main__":
+    install_signal_handler()
+
+    archive_config = get_config().get_apod_archive_config()
+    if archive_config['auto_sync'] and get_apod_archive() is not None:
+        get_apod_archive().start_periodic_sync(nasa_manager.apod, archive_config['sync_interval_hours'])
+
+    rover_index_config = get_config().get_rover_index_config()
+    if rover_index_config['auto_sync'] and get_rover_photo_index() is not None:
+        get_rover_photo_index().start_periodic_sync(nasa_manager.mars_rover, rover_index_config['sync_interval_hours'])
+
+    eonet_store_config = get_config().get_eonet_store_config()
+    if eonet_store_config['auto_sync'] and get_eonet_store() is not None:
+        get_eonet_store().start_periodic_sync(nasa_manager.eonet, eonet_store_config['sync_interval_minutes'])
+
     mcp.run(transport="stdio")
\ No newline at end of file